@@ -490,6 +490,51 @@ def clean_object_store_caches(object_store: BaseObjectStore):
     check_caches(object_store.cache_targets())
 
 
+PUSH_DATASET_MAX_RETRIES = 10
+PUSH_DATASET_RETRY_DELAY = 10
+PUSH_DATASET_MAX_RETRY_DELAY = 3600
+
+
+@galaxy_task(
+    bind=True,
+    ignore_result=True,
+    max_retries=PUSH_DATASET_MAX_RETRIES,
+    action="push a dataset written behind to remote storage",
+)
+def push_dataset(
+    self,
+    object_store: BaseObjectStore,
+    sa_session: galaxy_scoped_session,
+    dataset_id: int,
+    task_user_id: Optional[int] = None,
+):
+    """Push a job output written behind by its object store and set it to the ok state.
+
+    Failed pushes are retried with exponential backoff, the dataset is set to the
+    error state once the retries are exhausted. The task must run on a host that
+    shares the object store cache with the job handlers.
+    """
+    dataset = sa_session.get(model.Dataset, dataset_id)
+    if dataset is None or dataset.purged:
+        return
+    try:
+        pushed = object_store.push(dataset)
+    except Exception:
+        log.exception("Failed to push dataset %s to remote storage", dataset_id)
+        pushed = False
+    if not pushed:
+        if self.request.retries < self.max_retries:
+            raise self.retry(
+                countdown=min(PUSH_DATASET_RETRY_DELAY * 2**self.request.retries, PUSH_DATASET_MAX_RETRY_DELAY)
+            )
+        log.error("Giving up pushing dataset %s to remote storage, it remains in the object store cache", dataset_id)
+        dataset.state = model.Dataset.states.ERROR
+    elif dataset.state == model.Dataset.states.UPLOAD:
+        dataset.state = model.Dataset.states.OK
+    with transaction(sa_session):
+        sa_session.commit()
+
+
 @galaxy_task(action="send notifications to all recipients")
 def send_notification_to_recipients_async(
     request: NotificationCreateRequest, notification_manager: NotificationManager
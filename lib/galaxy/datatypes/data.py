@@ -187,6 +187,13 @@ def _get_file_size(data):
     return file_size
 
 
+def _file_exists(data):
+    # ask the object store, so that remote datasets are not pulled into the cache just to check they exist
+    if data.dataset.object_store and not data.dataset.external_filename:
+        return data.dataset.object_store.exists(data.dataset)
+    return os.path.exists(data.get_file_name())
+
+
 @p_dataproviders.decorators.has_dataproviders
 class Data(metaclass=DataMeta):
     """
@@ -485,7 +492,7 @@ class Data(metaclass=DataMeta):
 
     def _serve_binary_file_contents_as_text(self, trans, data, headers, file_size, max_peek_size):
         headers["content-type"] = "text/html"
-        with open(data.get_file_name(), "rb") as fh:
+        with data.open_range(0, max_peek_size) as fh:
             return (
                 trans.fill_template_mako(
                     "/dataset/binary_file.mako",
@@ -586,7 +593,7 @@ class Data(metaclass=DataMeta):
         downloading = to_ext is not None
         file_size = _get_file_size(dataset)
 
-        if not os.path.exists(dataset.get_file_name()):
+        if not _file_exists(dataset):
             raise ObjectNotFound(f"File Not Found ({dataset.get_file_name()}).")
 
         if downloading:
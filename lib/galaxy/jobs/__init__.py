@@ -14,13 +14,17 @@ import shutil
 import sys
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from json import loads
 from typing import (
     Any,
+    Callable,
     Dict,
     Iterable,
     List,
     Optional,
+    Set,
+    Tuple,
     TYPE_CHECKING,
 )
 
@@ -71,6 +75,7 @@ from galaxy.model.base import transaction
 from galaxy.model.store import copy_dataset_instance_metadata_attributes
 from galaxy.model.store.discover import MaxDiscoveredFilesExceededError
 from galaxy.objectstore import (
+    ObjectRef,
     ObjectStorePopulator,
     serialize_static_object_store_config,
 )
@@ -1609,7 +1614,7 @@ class MinimalJobWrapper(HasResourceParameters):
         dest_params = self.job_destination.params
         return self.get_job().get_destination_configuration(dest_params, self.app.config, key, default)
 
-    def enqueue(self):
+    def enqueue(self, flush=True):
         job = self.get_job()
         # Change to queued state before handing to worker thread so the runner won't pick it up again
         self.change_state(model.Job.states.QUEUED, flush=False, job=job)
@@ -1617,8 +1622,9 @@ class MinimalJobWrapper(HasResourceParameters):
         self.set_job_destination(self.job_destination, None, flush=False, job=job)
         # Set object store after job destination so can leverage parameters...
         self._set_object_store_ids(job)
-        with transaction(self.sa_session):
-            self.sa_session.commit()
+        if flush:
+            with transaction(self.sa_session):
+                self.sa_session.commit()
         return True
 
     def set_job_destination(self, job_destination, external_id=None, flush=True, job=None):
@@ -1735,20 +1741,44 @@ class MinimalJobWrapper(HasResourceParameters):
             self._setup_working_directory(job=job)
 
     def _finish_dataset(self, output_name, dataset, job, context, final_job_state, remote_metadata_directory):
-        implicit_collection_jobs = job.implicit_collection_jobs_association
-        purged = dataset.dataset.purged
-        if not purged and dataset.dataset.external_filename is None:
-            trynum = 0
-            while trynum < self.app.config.retry_job_output_collection:
-                try:
-                    # Attempt to short circuit NFS attribute caching
-                    os.stat(dataset.dataset.get_file_name())
-                    os.chown(dataset.dataset.get_file_name(), os.getuid(), -1)
-                    trynum = self.app.config.retry_job_output_collection
-                except (OSError, ObjectNotFound) as e:
-                    trynum += 1
-                    log.warning("Error accessing dataset with ID %i, will retry: %s", dataset.dataset.id, unicodify(e))
-                    time.sleep(2)
+        self._prepare_finished_dataset(dataset, context)
+        self._store_finished_dataset(job, dataset)
+        self._set_finished_dataset_metadata(
+            output_name, dataset, job, context, final_job_state, remote_metadata_directory
+        )
+
+    def _finish_datasets(self, finished_datasets, job, final_job_state, remote_metadata_directory, defer_push=False):
+        """Finish the ``(output_name, dataset, context)`` outputs of a job in stages.
+
+        Output files are stored in the object store by up to
+        ``job_finish_output_workers`` threads at once, all work on the datasets
+        themselves uses the database session and is done by the calling thread.
+        Returns the ids of the datasets whose push to remote storage was deferred.
+        """
+        for _, dataset, context in finished_datasets:
+            self._prepare_finished_dataset(dataset, context)
+
+        store_timer = self.app.execution_timer_factory.get_timer(
+            "internals.galaxy.jobs.job_wrapper_finish.store_outputs",
+            "job_wrapper.finish stored ${count} outputs for job ${job_id}",
+        )
+        # the same dataset may be the output of several associations, store it once
+        datasets = list({dataset.dataset.id: dataset for _, dataset, _ in finished_datasets}.values())
+        deferred_pushes = self._store_finished_datasets(job, datasets, defer_push=defer_push)
+        log.debug(store_timer.to_str(count=len(datasets), job_id=self.job_id))
+
+        metadata_timer = self.app.execution_timer_factory.get_timer(
+            "internals.galaxy.jobs.job_wrapper_finish.set_output_metadata",
+            "job_wrapper.finish set metadata of ${count} outputs for job ${job_id}",
+        )
+        for output_name, dataset, context in finished_datasets:
+            self._set_finished_dataset_metadata(
+                output_name, dataset, job, context, final_job_state, remote_metadata_directory
+            )
+        log.debug(metadata_timer.to_str(count=len(finished_datasets), job_id=self.job_id))
+        return deferred_pushes
+
+    def _prepare_finished_dataset(self, dataset, context):
         if getattr(dataset, "hidden_beneath_collection_instance", None):
             dataset.visible = False
         dataset.blurb = "done"
@@ -1763,9 +1793,88 @@ class MinimalJobWrapper(HasResourceParameters):
         dataset.tool_version = self.version_string
         if "uuid" in context:
             dataset.dataset.uuid = context["uuid"]
-        self.__update_output(job, dataset)
+
+    def _store_finished_datasets(self, job, datasets, defer_push: bool = False) -> Set[int]:
+        """Wait for the output files of ``datasets`` to appear and store them in the object store.
+
+        With ``job_finish_output_workers`` set, worker threads wait for the
+        output files and push them to the object store. They only get file
+        paths and plain object identifiers, datasets are loaded and updated on
+        the calling thread. With ``defer_push`` outputs of object stores that
+        write behind are only stored in their cache, the ids of these datasets
+        are returned.
+        """
+        max_workers = min(self.app.config.job_finish_output_workers, len(datasets))
+        if max_workers <= 1:
+            return {
+                dataset.dataset.id
+                for dataset in datasets
+                if self._store_finished_dataset(job, dataset, defer_push=defer_push)
+            }
+
+        output_files = []
+        for dataset in datasets:
+            if dataset.dataset.purged or dataset.dataset.external_filename is not None:
+                continue
+            file_name = dataset.dataset.get_file_name()
+            if file_name:
+                output_files.append((dataset.dataset.id, file_name))
+            else:
+                # the file is not visible yet, its name has to be resolved again on every try
+                self._wait_for_output_file(dataset.dataset.id, dataset.dataset.get_file_name)
+
+        def wait_for_output_file(output_file: Tuple[int, str]) -> None:
+            dataset_id, file_name = output_file
+            self._wait_for_output_file(dataset_id, lambda: file_name)
+
+        def update_from_file(output: ObjectRef) -> None:
+            self.object_store.update_from_file(output, defer_push=output.id in deferred_pushes)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # consume the results to raise the first exception
+            list(executor.map(wait_for_output_file, output_files))
+            outputs = [dataset.dataset for dataset in datasets if self.__prepare_output_update(job, dataset)]
+            deferred_pushes = {output.id for output in outputs if defer_push and self.object_store.defers_push(output)}
+            list(executor.map(update_from_file, [ObjectRef(output) for output in outputs]))
+        for dataset in datasets:
+            if not dataset.dataset.purged:
+                collect_extra_files(
+                    self.object_store, dataset, self.working_directory, self.outputs_to_working_directory
+                )
+        return deferred_pushes
+
+    def _store_finished_dataset(self, job, dataset, defer_push: bool = False) -> bool:
+        """Wait for the output file to appear and store it in the object store.
+
+        Returns whether the push of the output to remote storage was deferred.
+        """
+        purged = dataset.dataset.purged
+        if not purged and dataset.dataset.external_filename is None:
+            self._wait_for_output_file(dataset.dataset.id, dataset.dataset.get_file_name)
+        deferred_push = self.__update_output(job, dataset, defer_push=defer_push)
         if not purged:
             collect_extra_files(self.object_store, dataset, self.working_directory, self.outputs_to_working_directory)
+        return deferred_push
+
+    def _wait_for_output_file(self, dataset_id: int, get_file_name: Callable[[], str]) -> None:
+        trynum = 0
+        while trynum < self.app.config.retry_job_output_collection:
+            try:
+                # Attempt to short circuit NFS attribute caching
+                file_name = get_file_name()
+                os.stat(file_name)
+                os.chown(file_name, os.getuid(), -1)
+                trynum = self.app.config.retry_job_output_collection
+            except (OSError, ObjectNotFound) as e:
+                trynum += 1
+                log.warning("Error accessing dataset with ID %i, will retry: %s", dataset_id, unicodify(e))
+                time.sleep(2)
+
+    def _set_finished_dataset_metadata(
+        self, output_name, dataset, job, context, final_job_state, remote_metadata_directory
+    ):
+        implicit_collection_jobs = job.implicit_collection_jobs_association
+        purged = dataset.dataset.purged
         if job.states.ERROR == final_job_state:
             dataset.blurb = "error"
             if not implicit_collection_jobs:
@@ -1956,11 +2065,17 @@ class MinimalJobWrapper(HasResourceParameters):
 
         output_dataset_associations = job.output_datasets + job.output_library_datasets
         inp_data, out_data, out_collections = job.io_dicts()
+        deferred_pushes: Set[int] = set()
 
         if not extended_metadata:
             # importing metadata will discover outputs if extended metadata
+            discover_timer = self.app.execution_timer_factory.get_timer(
+                "internals.galaxy.jobs.job_wrapper_finish.discover_outputs",
+                "job_wrapper.finish discovered outputs for job ${job_id}",
+            )
             try:
                 self.discover_outputs(job, inp_data, out_data, out_collections, final_job_state=final_job_state)
+                log.debug(discover_timer.to_str(job_id=self.job_id))
             except MaxDiscoveredFilesExceededError as e:
                 final_job_state = job.states.ERROR
                 job.job_messages = [
@@ -1971,6 +2086,7 @@ class MinimalJobWrapper(HasResourceParameters):
                     }
                 ]
 
+            finished_datasets = []
             for dataset_assoc in output_dataset_associations:
                 is_discovered_dataset = getattr(dataset_assoc.dataset, "discovered", False)
                 context = self.get_dataset_finish_context(job_context, dataset_assoc)
@@ -1988,16 +2104,26 @@ class MinimalJobWrapper(HasResourceParameters):
                             copy_dataset_instance_metadata_attributes(dataset_assoc.dataset, dataset)
                             continue
                     output_name = dataset_assoc.name
-
-                    # Handles retry internally on error for instance...
-                    self._finish_dataset(output_name, dataset, job, context, final_job_state, remote_metadata_directory)
+                    finished_datasets.append((output_name, dataset, context))
+
+            # Outputs of object stores that write behind are pushed to remote storage by a
+            # task, they stay in the upload state (holding back dependent jobs) until then.
+            defer_push = final_job_state != job.states.ERROR and self.app.config.enable_celery_tasks
+            # Handles retry internally on error for instance...
+            deferred_pushes = self._finish_datasets(
+                finished_datasets, job, final_job_state, remote_metadata_directory, defer_push=defer_push
+            )
+            for dataset_assoc in output_dataset_associations:
                 if (
                     not final_job_state == job.states.ERROR
                     and not dataset_assoc.dataset.dataset.state == job.states.ERROR
                     and not dataset_assoc.dataset.dataset.state == model.Dataset.states.DEFERRED
                 ):
                     # We don't set datsets in error state to OK because discover_outputs may have already set the state to error
-                    dataset_assoc.dataset.dataset.state = model.Dataset.states.OK
+                    if dataset_assoc.dataset.dataset.id in deferred_pushes:
+                        dataset_assoc.dataset.dataset.state = model.Dataset.states.UPLOAD
+                    else:
+                        dataset_assoc.dataset.dataset.state = model.Dataset.states.OK
 
         if job.states.ERROR == final_job_state:
             for dataset_assoc in output_dataset_associations:
@@ -2084,6 +2210,11 @@ class MinimalJobWrapper(HasResourceParameters):
             self._collect_metrics(job, job_metrics_directory)
         with transaction(self.sa_session):
             self.sa_session.commit()
+        if deferred_pushes:
+            from galaxy.celery.tasks import push_dataset
+
+            for dataset_id in deferred_pushes:
+                push_dataset.delay(dataset_id=dataset_id)
         if job.state == job.states.ERROR:
             self._report_error()
         elif task_wrapper:
@@ -2092,7 +2223,11 @@ class MinimalJobWrapper(HasResourceParameters):
             task_wrapper.delay()
         cleanup_job = self.cleanup_job
         delete_files = cleanup_job == "always" or (job.state == job.states.OK and cleanup_job == "onsuccess")
+        cleanup_timer = self.app.execution_timer_factory.get_timer(
+            "internals.galaxy.jobs.job_wrapper_finish.cleanup", "job_wrapper.finish cleaned up job ${job_id}"
+        )
         self.cleanup(delete_files=delete_files)
+        log.debug(cleanup_timer.to_str(job_id=self.job_id))
         log.debug(finish_timer.to_str(job_id=self.job_id, tool_id=job.tool_id))
 
     def discover_outputs(self, job, inp_data, out_data, out_collections, final_job_state):
@@ -2459,19 +2594,32 @@ class MinimalJobWrapper(HasResourceParameters):
         else:
             return "anonymous@unknown"
 
-    def __update_output(self, job, hda, clean_only=False):
+    def __update_output(self, job, hda, clean_only=False, defer_push: bool = False) -> bool:
         """Handle writing outputs to the object store.
 
         This should be called regardless of whether the job was failed or not so
         that writing of partial results happens and so that the object store is
-        cleaned up if the dataset has been purged.
+        cleaned up if the dataset has been purged. Returns whether the push of
+        the output to remote storage was deferred.
+        """
+        if self.__prepare_output_update(job, hda, clean_only=clean_only):
+            defer_push = defer_push and self.object_store.defers_push(hda.dataset)
+            self.object_store.update_from_file(hda.dataset, defer_push=defer_push)
+            return defer_push
+        return False
+
+    def __prepare_output_update(self, job, hda, clean_only=False) -> bool:
+        """Create the object store entry of the output of `hda` or clean up after a purged output.
+
+        Returns whether the output file needs to be written to the object store.
         """
         dataset = hda.dataset
         dataset.set_total_size()
         if dataset not in job.output_library_datasets:
             purged = dataset.purged
             if not purged and not clean_only:
-                self.object_store.update_from_file(dataset, create=True)
+                self.object_store.create(dataset)
+                return True
             else:
                 # If the dataset is purged and Galaxy is configured to write directly
                 # to the object store from jobs - be sure that file is cleaned up. This
@@ -2481,6 +2629,7 @@ class MinimalJobWrapper(HasResourceParameters):
                     dataset.full_delete()
                 except ObjectNotFound:
                     pass
+        return False
 
     def __link_file_check(self):
         """outputs_to_working_directory breaks library uploads where data is
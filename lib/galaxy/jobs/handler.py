@@ -19,6 +19,7 @@ from typing import (
 )
 
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
 from sqlalchemy.sql.expression import (
     and_,
     func,
@@ -36,14 +37,20 @@ from galaxy.jobs import (
     JobWrapper,
     TaskWrapper,
 )
+from galaxy.jobs.job_counts import ActiveJobCountTracker
 from galaxy.jobs.mapper import JobNotReadyException
+from galaxy.jobs.readiness import JobReadinessTracker
+from galaxy.jobs.runners import BaseJobRunner
 from galaxy.managers.jobs import get_jobs_to_check_at_startup
 from galaxy.model.base import (
     check_database_connection,
     transaction,
 )
 from galaxy.structured_app import MinimalManagerApp
-from galaxy.util import unicodify
+from galaxy.util import (
+    chunk_iterable,
+    unicodify,
+)
 from galaxy.util.custom_logging import get_logger
 from galaxy.util.monitors import Monitors
 from galaxy.web_stack.handlers import HANDLER_ASSIGNMENT_METHODS
@@ -72,6 +79,13 @@ log = get_logger(__name__)
     "user_over_quota",
     "user_over_total_walltime",
 )
+JOB_DISPATCH_LOADER_OPTIONS = (
+    selectinload(model.Job.input_datasets),
+    selectinload(model.Job.input_library_datasets),
+    selectinload(model.Job.output_datasets),
+    selectinload(model.Job.output_library_datasets),
+    selectinload(model.Job.tasks),
+)
 DEFAULT_JOB_RUNNER_FAILURE_MESSAGE = "Unable to run job due to a misconfiguration of the Galaxy job running system.  Please contact a site administrator."
 
 
@@ -256,11 +270,25 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         # self.queue contains tuples: (job_id, tool_id)
 
         # Initialize structures for handling job limits
+        self.job_count_tracker = None
+        if self.app.config.job_handler_incremental_job_counts:
+            self.job_count_tracker = ActiveJobCountTracker(
+                self.sa_session,
+                resync_interval=self.app.config.job_handler_job_counts_resync_interval,
+            )
         self.__clear_job_count()
         # Contains job ids for jobs that are waiting (only use from monitor thread)
         self.waiting_jobs: List[int] = []
         # Contains wrappers of jobs that are limited or ready (so they aren't created unnecessarily/multiple times)
         self.job_wrappers: Dict[int, JobWrapper] = {}
+        # Incrementally maintained index of new jobs waiting on their inputs (only use from monitor thread)
+        self.readiness_tracker = None
+        if self.track_jobs_in_database and self.app.config.job_handler_incremental_readiness:
+            self.readiness_tracker = JobReadinessTracker(
+                self.sa_session,
+                self.app.config.server_name,
+                resync_interval=self.app.config.job_handler_readiness_resync_interval,
+            )
         name = "JobHandlerQueue.monitor_thread"
         self._init_monitor_thread(name, target=self.__monitor, config=app.config)
         self.job_grabber = None
@@ -421,67 +449,10 @@ class JobHandlerQueue(BaseJobHandlerQueue):
             # Clear the session so we get fresh states for job and all datasets
             self.sa_session.expunge_all()
             # Fetch all new jobs
-            hda_not_ready = (
-                self.sa_session.query(model.Job.id)
-                .enable_eagerloads(False)
-                .join(model.JobToInputDatasetAssociation)
-                .join(model.HistoryDatasetAssociation)
-                .join(model.Dataset)
-                .filter(
-                    and_(
-                        model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states)
-                    )
-                )
-                .subquery()
-            )
-            ldda_not_ready = (
-                self.sa_session.query(model.Job.id)
-                .enable_eagerloads(False)
-                .join(model.JobToInputLibraryDatasetAssociation)
-                .join(model.LibraryDatasetDatasetAssociation)
-                .join(model.Dataset)
-                .filter(
-                    and_(
-                        model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states)
-                    )
-                )
-                .subquery()
-            )
-            coalesce_exp = func.coalesce(
-                model.Job.table.c.user_id, model.Job.table.c.session_id
-            )  # accommodate jobs by anonymous users
-            rank = func.rank().over(partition_by=coalesce_exp, order_by=model.Job.table.c.id).label("rank")
-            job_filter_conditions = (
-                (model.Job.state == model.Job.states.NEW),
-                (model.Job.handler == self.app.config.server_name),
-                ~model.Job.table.c.id.in_(select(hda_not_ready)),
-                ~model.Job.table.c.id.in_(select(ldda_not_ready)),
-            )
-            if self.app.config.user_activation_on:
-                job_filter_conditions = job_filter_conditions + (
-                    or_((model.Job.user_id == null()), (model.User.active == true())),
-                )
-            if self.sa_session.bind.name == "sqlite":
-                query_objects = (model.Job,)
-            else:
-                query_objects = (model.Job, rank)
-            ready_query = (
-                self.sa_session.query(*query_objects)
-                .enable_eagerloads(False)
-                .outerjoin(model.User)
-                .filter(and_(*job_filter_conditions))
-                .order_by(model.Job.id)
-            )
-            if self.sa_session.bind.name == "sqlite":
-                jobs_to_check = ready_query.all()
+            if self.readiness_tracker is not None:
+                jobs_to_check = self.__get_ready_jobs_from_index()
             else:
-                ranked = ready_query.subquery()
-                jobs_to_check = (
-                    self.sa_session.query(model.Job)
-                    .join(ranked, model.Job.id == ranked.c.id)
-                    .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size)
-                    .all()
-                )
+                jobs_to_check = self.__get_ready_jobs()
             # Filter jobs with invalid input states
             jobs_to_check = self.__filter_jobs_with_invalid_input_states(jobs_to_check)
             # Fetch all "resubmit" jobs
@@ -500,8 +471,7 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         else:
             # Get job objects and append to watch queue for any which were
             # previously waiting
-            for job_id in self.waiting_jobs:
-                jobs_to_check.append(self.sa_session.query(model.Job).get(job_id))
+            job_ids_to_check = list(self.waiting_jobs)
             try:
                 while 1:
                     message = self.queue.get_nowait()
@@ -509,10 +479,12 @@ class JobHandlerQueue(BaseJobHandlerQueue):
                         raise StopSignalException()
                     # Unpack the message
                     job_id, tool_id = message
-                    # Get the job object and append to watch queue
-                    jobs_to_check.append(self.sa_session.query(model.Job).get(job_id))
+                    # Append the job id to watch queue
+                    job_ids_to_check.append(job_id)
             except Empty:
                 pass
+            jobs_by_id = self.__get_jobs_by_id(job_ids_to_check)
+            jobs_to_check = [jobs_by_id[job_id] for job_id in job_ids_to_check if job_id in jobs_by_id]
         # Ensure that we get new job counts on each iteration
         self.__clear_job_count()
         # Check resubmit jobs first so that limits of new jobs will still be enforced
@@ -523,15 +495,21 @@ class JobHandlerQueue(BaseJobHandlerQueue):
             if jw.is_ready_for_resubmission(job):
                 self.increase_running_job_count(job.user_id, jw.job_destination.id)
                 self.dispatcher.put(jw)
+        # Load the associations of all jobs, and the jobs they were copied from, in bulk rather than one by one
+        self.__load_job_associations(jobs_to_check)
+        copied_from_jobs = self.__get_jobs_by_id(
+            {job.copied_from_job_id for job in jobs_to_check if job.copied_from_job_id}
+        )
         # Iterate over new and waiting jobs and look for any that are
         # ready to run
         new_waiting_jobs = []
+        ready_job_wrappers = []
         for job in jobs_to_check:
             try:
                 # Check the job's dependencies, requeue if they're not done.
                 # Some of these states will only happen when using the in-memory job queue
                 if job.copied_from_job_id:
-                    copied_from_job = self.sa_session.query(model.Job).get(job.copied_from_job_id)
+                    copied_from_job = copied_from_jobs[job.copied_from_job_id]
                     job.numeric_metrics = copied_from_job.numeric_metrics
                     job.text_metrics = copied_from_job.text_metrics
                     job.dependencies = copied_from_job.dependencies
@@ -555,8 +533,7 @@ class JobHandlerQueue(BaseJobHandlerQueue):
                 elif job_state == JOB_INPUT_DELETED:
                     log.info("(%d) Job unable to run: one or more inputs deleted" % job.id)
                 elif job_state == JOB_READY:
-                    self.dispatcher.put(self.job_wrappers.pop(job.id))
-                    log.info("(%d) Job dispatched" % job.id)
+                    ready_job_wrappers.append(self.job_wrappers.pop(job.id))
                 elif job_state == JOB_DELETED:
                     log.info("(%d) Job deleted by user while still queued" % job.id)
                 elif job_state == JOB_ADMIN_DELETED:
@@ -583,6 +560,15 @@ class JobHandlerQueue(BaseJobHandlerQueue):
                     new_waiting_jobs.append(job.id)
             except Exception:
                 log.exception("failure running job %d", job.id)
+        # Dispatch all ready jobs at once
+        if ready_job_wrappers:
+            try:
+                for job_wrapper in self.dispatcher.put_many(ready_job_wrappers):
+                    log.info("(%d) Job dispatched" % job_wrapper.job_id)
+            except Exception:
+                log.exception(
+                    "failure running jobs %s", ", ".join(str(job_wrapper.job_id) for job_wrapper in ready_job_wrappers)
+                )
         # Update the waiting list
         if not self.track_jobs_in_database:
             self.waiting_jobs = new_waiting_jobs
@@ -593,6 +579,118 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         with transaction(self.sa_session):
             self.sa_session.commit()
 
+    def __get_jobs_by_id(self, job_ids):
+        jobs = {}
+        for chunk in chunk_iterable(job_ids):
+            for job in self.sa_session.scalars(select(model.Job).where(model.Job.id.in_(chunk))):
+                jobs[job.id] = job
+        return jobs
+
+    def __load_job_associations(self, jobs):
+        """
+        Populate the input and output associations (and tasks) of already loaded jobs with a few queries, instead of
+        lazy loading them one job at a time while checking and wrapping the jobs.
+        """
+        for chunk in chunk_iterable(job.id for job in jobs):
+            self.sa_session.scalars(
+                select(model.Job).where(model.Job.id.in_(chunk)).options(*JOB_DISPATCH_LOADER_OPTIONS)
+            ).all()
+
+    def __get_ready_jobs(self):
+        """
+        Query for new jobs assigned to this handler whose inputs are all ready, limited to the oldest
+        ``handler_ready_window_size`` jobs of every user.
+        """
+        hda_not_ready = (
+            self.sa_session.query(model.Job.id)
+            .enable_eagerloads(False)
+            .join(model.JobToInputDatasetAssociation)
+            .join(model.HistoryDatasetAssociation)
+            .join(model.Dataset)
+            .filter(
+                and_(model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states))
+            )
+            .subquery()
+        )
+        ldda_not_ready = (
+            self.sa_session.query(model.Job.id)
+            .enable_eagerloads(False)
+            .join(model.JobToInputLibraryDatasetAssociation)
+            .join(model.LibraryDatasetDatasetAssociation)
+            .join(model.Dataset)
+            .filter(
+                and_(model.Job.state == model.Job.states.NEW, model.Dataset.state.in_(model.Dataset.non_ready_states))
+            )
+            .subquery()
+        )
+        coalesce_exp = func.coalesce(
+            model.Job.table.c.user_id, model.Job.table.c.session_id
+        )  # accommodate jobs by anonymous users
+        rank = func.rank().over(partition_by=coalesce_exp, order_by=model.Job.table.c.id).label("rank")
+        job_filter_conditions = (
+            (model.Job.state == model.Job.states.NEW),
+            (model.Job.handler == self.app.config.server_name),
+            ~model.Job.table.c.id.in_(select(hda_not_ready)),
+            ~model.Job.table.c.id.in_(select(ldda_not_ready)),
+        )
+        if self.app.config.user_activation_on:
+            job_filter_conditions = job_filter_conditions + (
+                or_((model.Job.user_id == null()), (model.User.active == true())),
+            )
+        if self.sa_session.bind.name == "sqlite":
+            query_objects = (model.Job,)
+        else:
+            query_objects = (model.Job, rank)
+        ready_query = (
+            self.sa_session.query(*query_objects)
+            .enable_eagerloads(False)
+            .outerjoin(model.User)
+            .filter(and_(*job_filter_conditions))
+            .order_by(model.Job.id)
+        )
+        if self.sa_session.bind.name == "sqlite":
+            return ready_query.all()
+        else:
+            ranked = ready_query.subquery()
+            return (
+                self.sa_session.query(model.Job)
+                .join(ranked, model.Job.id == ranked.c.id)
+                .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size)
+                .all()
+            )
+
+    def __get_ready_jobs_from_index(self):
+        """
+        Same as ``__get_ready_jobs`` but uses the incrementally maintained readiness index instead of
+        checking the inputs of every new job.
+        """
+        ready_job_ids = self.readiness_tracker.ready_job_ids(
+            self.app.job_config.handler_ready_window_size,
+            exclude_inactive_users=self.app.config.user_activation_on,
+        )
+        new_job_ids = set()
+        jobs = []
+        for job_ids in chunk_iterable(ready_job_ids):
+            rows = (
+                self.sa_session.query(model.Job)
+                .enable_eagerloads(False)
+                .filter(
+                    and_(
+                        model.Job.id.in_(job_ids),
+                        model.Job.state == model.Job.states.NEW,
+                        model.Job.handler == self.app.config.server_name,
+                    )
+                )
+                .order_by(model.Job.id)
+                .all()
+            )
+            for job in rows:
+                new_job_ids.add(job.id)
+                jobs.append(job)
+        # Jobs that are no longer new have been dispatched, paused, deleted or reassigned in the meantime
+        self.readiness_tracker.discard(set(ready_job_ids) - new_job_ids)
+        return jobs
+
     def __filter_jobs_with_invalid_input_states(self, jobs):
         """
         Takes  list of jobs and filters out jobs whose input datasets are in invalid state and
@@ -827,12 +925,21 @@ class JobHandlerQueue(BaseJobHandlerQueue):
         self.user_job_count = None
         self.user_job_count_per_destination = None
         self.total_job_count_per_destination = None
+        self.job_counts_refreshed = False
+
+    def __tracked_job_counts(self):
+        # Apply job state transitions to the tracked counts at most once per iteration
+        assert self.job_count_tracker is not None
+        if not self.job_counts_refreshed:
+            self.job_count_tracker.refresh()
+            self.job_counts_refreshed = True
+        return self.job_count_tracker.counts.snapshot()
 
     def get_user_job_count(self, user_id):
         self.__cache_user_job_count()
         # This could have been incremented by a previous job dispatched on this iteration, even if we're not caching
         rval = self.user_job_count.get(user_id, 0)
-        if not self.app.config.cache_user_job_count:
+        if not self.app.config.cache_user_job_count and self.job_count_tracker is None:
             result = self.sa_session.execute(
                 select(func.count(model.Job.table.c.id)).where(
                     and_(
@@ -850,7 +957,9 @@ class JobHandlerQueue(BaseJobHandlerQueue):
 
     def __cache_user_job_count(self):
         # Cache the job count if necessary
-        if self.user_job_count is None and self.app.config.cache_user_job_count:
+        if self.user_job_count is None and self.job_count_tracker is not None:
+            self.user_job_count = self.__tracked_job_counts()[0]
+        elif self.user_job_count is None and self.app.config.cache_user_job_count:
             self.user_job_count = {}
             query = self.sa_session.execute(
                 select(model.Job.table.c.user_id, func.count(model.Job.table.c.user_id))
@@ -872,7 +981,7 @@ class JobHandlerQueue(BaseJobHandlerQueue):
     def get_user_job_count_per_destination(self, user_id):
         self.__cache_user_job_count_per_destination()
         cached = self.user_job_count_per_destination.get(user_id, {})
-        if self.app.config.cache_user_job_count:
+        if self.app.config.cache_user_job_count or self.job_count_tracker is not None:
             rval = cached
         else:
             # The cached count is still used even when we're not caching, it is
@@ -900,7 +1009,9 @@ class JobHandlerQueue(BaseJobHandlerQueue):
 
     def __cache_user_job_count_per_destination(self):
         # Cache the job count if necessary
-        if self.user_job_count_per_destination is None and self.app.config.cache_user_job_count:
+        if self.user_job_count_per_destination is None and self.job_count_tracker is not None:
+            self.user_job_count_per_destination = self.__tracked_job_counts()[1]
+        elif self.user_job_count_per_destination is None and self.app.config.cache_user_job_count:
             self.user_job_count_per_destination = {}
             result = self.sa_session.execute(
                 select(
@@ -919,6 +1030,11 @@ class JobHandlerQueue(BaseJobHandlerQueue):
             self.user_job_count_per_destination = {}
 
     def increase_running_job_count(self, user_id, destination_id):
+        if self.job_count_tracker is not None:
+            # Start from the tracked counts, they would never be loaded in this iteration otherwise
+            self.__cache_user_job_count()
+            self.__cache_user_job_count_per_destination()
+            self.__cache_total_job_count_per_destination()
         if (
             self.app.job_config.limits.registered_user_concurrent_jobs
             or self.app.job_config.limits.anonymous_user_concurrent_jobs
@@ -998,7 +1114,9 @@ class JobHandlerQueue(BaseJobHandlerQueue):
 
     def __cache_total_job_count_per_destination(self):
         # Cache the job count if necessary
-        if self.total_job_count_per_destination is None:
+        if self.total_job_count_per_destination is None and self.job_count_tracker is not None:
+            self.total_job_count_per_destination = self.__tracked_job_counts()[2]
+        elif self.total_job_count_per_destination is None:
             self.total_job_count_per_destination = {}
             result = self.sa_session.execute(
                 select(
@@ -1248,6 +1366,42 @@ class DefaultJobDispatcher:
             log.debug(f"({job_wrapper.job_id}) Dispatching to {job_wrapper.job_destination.runner} runner")
         runner.put(job_wrapper)
 
+    def put_many(self, job_wrappers):
+        """Dispatch several jobs at once, each runner receives all of its jobs in one call.
+
+        Returns the jobs that have been dispatched.
+        """
+        runner_job_wrappers: Dict[BaseJobRunner, List[JobWrapper]] = {}
+        for job_wrapper in job_wrappers:
+            try:
+                runner = self.get_job_runner(job_wrapper, get_task_runner=True)
+            except Exception:
+                log.exception(f"({job_wrapper.job_id}) Failed to find a job runner")
+                job_wrapper.fail(DEFAULT_JOB_RUNNER_FAILURE_MESSAGE)
+                continue
+            if runner is None:
+                # Something went wrong, we've already failed the job wrapper
+                continue
+            runner_job_wrappers.setdefault(runner, []).append(job_wrapper)
+        dispatched = []
+        for runner, runner_wrappers in runner_job_wrappers.items():
+            job_ids = ", ".join(str(job_wrapper.job_id) for job_wrapper in runner_wrappers)
+            log.debug(f"({job_ids}) Dispatching to {runner.runner_name}")
+            try:
+                dispatched.extend(runner.put_many(runner_wrappers))
+            except Exception:
+                log.exception(
+                    f"({job_ids}) Failed to dispatch jobs to {runner.runner_name}, dispatching them one by one"
+                )
+                for job_wrapper in runner_wrappers:
+                    try:
+                        if runner.put(job_wrapper):
+                            dispatched.append(job_wrapper)
+                    except Exception:
+                        log.exception(f"({job_wrapper.job_id}) Failed to dispatch job to {runner.runner_name}")
+                        job_wrapper.fail(DEFAULT_JOB_RUNNER_FAILURE_MESSAGE)
+        return dispatched
+
     def stop(self, job, job_wrapper):
         """
         Stop the given job. The input variable job may be either a Job or a Task.
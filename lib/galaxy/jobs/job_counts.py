@@ -0,0 +1,129 @@
+"""
+Incrementally maintained counts of queued and running jobs used to enforce job concurrency limits.
+
+Instead of aggregating over the whole job table on every handler iteration,
+:class:`ActiveJobCountTracker` keeps per-user, per-user-and-destination and
+per-destination counts that are adjusted from the state transitions of jobs
+that changed since the previous iteration. The job table is the shared source
+of these transitions, so counts include jobs of all handlers.
+"""
+
+import datetime
+import logging
+import time
+from collections import defaultdict
+from typing import (
+    Dict,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import select
+
+from galaxy import model
+from galaxy.jobs.readiness import DEFAULT_LOOKBACK
+from galaxy.model.orm.now import now
+
+log = logging.getLogger(__name__)
+
+# States counted against the per-user limit, and against the per-destination limits.
+USER_COUNTED_STATES = (model.Job.states.QUEUED, model.Job.states.RUNNING, model.Job.states.RESUBMITTED)
+DESTINATION_COUNTED_STATES = (model.Job.states.QUEUED, model.Job.states.RUNNING)
+
+ActiveJob = Tuple[Optional[int], Optional[str], str]
+
+
+class ActiveJobCounts:
+    """Job counts that are updated one job state transition at a time.
+
+    The counted states match the aggregate queries used by the job handler:
+    ``user_job_count`` counts queued, running and resubmitted jobs of registered
+    users, the per-destination counts only count queued and running jobs.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[int, ActiveJob] = {}
+        self.user_job_count: Dict[int, int] = defaultdict(int)
+        self.user_job_count_per_destination: Dict[Optional[int], Dict[Optional[str], int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self.total_job_count_per_destination: Dict[Optional[str], int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def update(self, job_id: int, user_id: Optional[int], destination_id: Optional[str], state: str) -> None:
+        """Record the current state of a job, replacing whatever was recorded for it before."""
+        previous = self._jobs.pop(job_id, None)
+        if previous is not None:
+            self._count(*previous, increment=-1)
+        if state in USER_COUNTED_STATES:
+            active_job = (user_id, destination_id, state)
+            self._jobs[job_id] = active_job
+            self._count(*active_job, increment=1)
+
+    def _count(self, user_id: Optional[int], destination_id: Optional[str], state: str, increment: int) -> None:
+        if user_id is not None:
+            _increment(self.user_job_count, user_id, increment)
+        if state in DESTINATION_COUNTED_STATES:
+            _increment(self.user_job_count_per_destination[user_id], destination_id, increment)
+            if not self.user_job_count_per_destination[user_id]:
+                del self.user_job_count_per_destination[user_id]
+            _increment(self.total_job_count_per_destination, destination_id, increment)
+
+    def snapshot(self) -> Tuple[Dict, Dict, Dict]:
+        """Return copies of the counts that callers are free to modify."""
+        return (
+            dict(self.user_job_count),
+            {user_id: dict(counts) for user_id, counts in self.user_job_count_per_destination.items()},
+            dict(self.total_job_count_per_destination),
+        )
+
+    def clear(self) -> None:
+        self._jobs.clear()
+        self.user_job_count.clear()
+        self.user_job_count_per_destination.clear()
+        self.total_job_count_per_destination.clear()
+
+
+def _increment(counts, key, increment):
+    counts[key] += increment
+    if counts[key] <= 0:
+        del counts[key]
+
+
+class ActiveJobCountTracker:
+    """Keep :class:`ActiveJobCounts` up to date with the job table.
+
+    Jobs whose state changed are found through the indexed ``update_time``
+    column. All active jobs are reloaded every ``resync_interval`` seconds as a
+    safety net for changes that do not touch ``update_time``.
+    """
+
+    def __init__(
+        self,
+        sa_session,
+        resync_interval: float,
+        lookback: datetime.timedelta = DEFAULT_LOOKBACK,
+    ):
+        self.sa_session = sa_session
+        self.resync_interval = resync_interval
+        self.lookback = lookback
+        self.counts = ActiveJobCounts()
+        self._last_refresh: Optional[datetime.datetime] = None
+        self._last_resync: Optional[float] = None
+
+    def refresh(self) -> None:
+        """Apply job state transitions that happened since the last refresh."""
+        refresh_time = now()
+        stmt = select(model.Job.id, model.Job.user_id, model.Job.destination_id, model.Job.state)
+        if self._last_resync is None or time.time() - self._last_resync >= self.resync_interval:
+            self.counts.clear()
+            stmt = stmt.where(model.Job.state.in_(USER_COUNTED_STATES))
+            self._last_resync = time.time()
+        else:
+            assert self._last_refresh is not None
+            stmt = stmt.where(model.Job.update_time >= self._last_refresh - self.lookback)
+        for job_id, user_id, destination_id, state in self.sa_session.execute(stmt):
+            self.counts.update(job_id, user_id, destination_id, state)
+        self._last_refresh = refresh_time
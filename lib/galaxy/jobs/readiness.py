@@ -0,0 +1,274 @@
+"""
+Incremental tracking of new jobs that are waiting on input datasets.
+
+The job handler normally re-runs a large query with anti-joins against every
+job input on each iteration to find ``NEW`` jobs whose inputs are all ready.
+:class:`JobReadinessTracker` replaces that with an index of (job, inputs not yet
+ready) that is only updated from rows changed since the previous iteration, so
+each iteration only needs to look at jobs whose inputs just became ready.
+"""
+
+import datetime
+import logging
+import time
+from collections import defaultdict
+from typing import (
+    AbstractSet,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import (
+    and_,
+    false,
+    func,
+    select,
+)
+
+from galaxy import model
+from galaxy.model.orm.now import now
+from galaxy.util import chunk_iterable
+
+log = logging.getLogger(__name__)
+
+UserKey = Union[int, str, None]
+
+# Rows are discovered through indexed ``update_time`` columns, look back a little
+# further than the last refresh to tolerate clock skew between Galaxy processes.
+DEFAULT_LOOKBACK = datetime.timedelta(seconds=30)
+
+
+class JobReadinessIndex:
+    """In-memory index of jobs and the input datasets they are still waiting on.
+
+    Each job maps to the set of dataset ids that were not ready when the job was
+    added. Marking datasets as ready removes them from every job waiting on
+    them, jobs whose set becomes empty are reported as ready.
+    """
+
+    def __init__(self):
+        self._waiting_on: Dict[int, Set[int]] = {}
+        self._waiters: Dict[int, Set[int]] = defaultdict(set)
+        self._user_keys: Dict[int, UserKey] = {}
+        self._user_ids: Dict[int, Optional[int]] = {}
+        self._ready: Set[int] = set()
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self._user_keys
+
+    def __len__(self) -> int:
+        return len(self._user_keys)
+
+    @property
+    def dataset_ids(self) -> Set[int]:
+        """Ids of datasets at least one indexed job is waiting on."""
+        return set(self._waiters)
+
+    @property
+    def ready_job_ids(self) -> List[int]:
+        """Ids of indexed jobs that are no longer waiting on any dataset, oldest first."""
+        return sorted(self._ready)
+
+    @property
+    def ready_user_ids(self) -> Set[int]:
+        """Ids of the users owning indexed jobs that are ready."""
+        return {user_id for job_id in self._ready if (user_id := self._user_ids.get(job_id)) is not None}
+
+    def user_key(self, job_id: int) -> UserKey:
+        return self._user_keys.get(job_id)
+
+    def add_job(
+        self, job_id: int, user_key: UserKey, not_ready_dataset_ids: Iterable[int], user_id: Optional[int] = None
+    ) -> bool:
+        """Start tracking a job, returns ``True`` if the job is ready right away."""
+        self.remove_job(job_id)
+        self._user_keys[job_id] = user_key
+        self._user_ids[job_id] = user_id
+        not_ready = set(not_ready_dataset_ids)
+        if not not_ready:
+            self._ready.add(job_id)
+            return True
+        self._waiting_on[job_id] = not_ready
+        for dataset_id in not_ready:
+            self._waiters[dataset_id].add(job_id)
+        return False
+
+    def remove_job(self, job_id: int) -> None:
+        self._user_keys.pop(job_id, None)
+        self._user_ids.pop(job_id, None)
+        self._ready.discard(job_id)
+        for dataset_id in self._waiting_on.pop(job_id, ()):
+            waiters = self._waiters.get(dataset_id)
+            if waiters is not None:
+                waiters.discard(job_id)
+                if not waiters:
+                    del self._waiters[dataset_id]
+
+    def datasets_ready(self, dataset_ids: Iterable[int]) -> List[int]:
+        """Mark datasets as ready and return ids of jobs that just became ready."""
+        newly_ready = []
+        for dataset_id in dataset_ids:
+            for job_id in self._waiters.pop(dataset_id, ()):
+                waiting_on = self._waiting_on[job_id]
+                waiting_on.discard(dataset_id)
+                if not waiting_on:
+                    del self._waiting_on[job_id]
+                    self._ready.add(job_id)
+                    newly_ready.append(job_id)
+        return sorted(newly_ready)
+
+    def ready_window(
+        self, window_size: Optional[int], excluded_user_ids: AbstractSet[Optional[int]] = frozenset()
+    ) -> List[int]:
+        """Return the oldest ``window_size`` ready jobs of every user, oldest first.
+
+        Jobs of ``excluded_user_ids`` are left out before the window is applied.
+        """
+        ready_job_ids = [job_id for job_id in self.ready_job_ids if self._user_ids[job_id] not in excluded_user_ids]
+        if not window_size:
+            return ready_job_ids
+        per_user: Dict[UserKey, int] = defaultdict(int)
+        window = []
+        for job_id in ready_job_ids:
+            user_key = self._user_keys[job_id]
+            if per_user[user_key] < window_size:
+                per_user[user_key] += 1
+                window.append(job_id)
+        return window
+
+    def clear(self) -> None:
+        self._waiting_on.clear()
+        self._waiters.clear()
+        self._user_keys.clear()
+        self._user_ids.clear()
+        self._ready.clear()
+
+
+class JobReadinessTracker:
+    """Keep a :class:`JobReadinessIndex` of a handler's ``NEW`` jobs up to date.
+
+    Jobs assigned to the handler and datasets whose state changed are found
+    through the indexed ``update_time`` columns of the ``job`` and ``dataset``
+    tables. A full resynchronization is performed every ``resync_interval``
+    seconds as a safety net for changes that do not touch ``update_time``.
+    """
+
+    def __init__(
+        self,
+        sa_session,
+        handler: str,
+        resync_interval: float,
+        lookback: datetime.timedelta = DEFAULT_LOOKBACK,
+    ):
+        self.sa_session = sa_session
+        self.handler = handler
+        self.resync_interval = resync_interval
+        self.lookback = lookback
+        self.index = JobReadinessIndex()
+        self._last_refresh: Optional[datetime.datetime] = None
+        self._last_resync: Optional[float] = None
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the database."""
+        refresh_time = now()
+        if self._last_resync is None or time.time() - self._last_resync >= self.resync_interval:
+            self.index.clear()
+            self._track_jobs(self._new_jobs())
+            self._last_resync = time.time()
+            log.debug("Resynchronized job readiness index, tracking %d new jobs", len(self.index))
+        else:
+            assert self._last_refresh is not None
+            since = self._last_refresh - self.lookback
+            self._track_jobs(self._new_jobs(since))
+            self.index.datasets_ready(self._datasets_ready_since(since))
+        self._last_refresh = refresh_time
+
+    def ready_job_ids(self, window_size: Optional[int] = None, exclude_inactive_users: bool = False) -> List[int]:
+        """Refresh the index and return ids of jobs whose inputs are all ready.
+
+        If ``exclude_inactive_users`` is set, jobs of users that are not active are left out.
+        """
+        self.refresh()
+        excluded_user_ids: Set[Optional[int]] = set()
+        if exclude_inactive_users:
+            excluded_user_ids = self._inactive_users(self.index.ready_user_ids)
+        return self.index.ready_window(window_size, excluded_user_ids)
+
+    def discard(self, job_ids: Iterable[int]) -> None:
+        """Stop tracking jobs, e.g. because they are no longer ``NEW``."""
+        for job_id in job_ids:
+            self.index.remove_job(job_id)
+
+    def _new_jobs(self, since: Optional[datetime.datetime] = None) -> List[Tuple[int, UserKey, Optional[int]]]:
+        user_key = func.coalesce(model.Job.table.c.user_id, model.Job.table.c.session_id)
+        conditions = [model.Job.state == model.Job.states.NEW, model.Job.handler == self.handler]
+        if since is not None:
+            conditions.append(model.Job.update_time >= since)
+        stmt = select(model.Job.id, user_key, model.Job.user_id).where(and_(*conditions))
+        return [
+            (job_id, key, user_id) for job_id, key, user_id in self.sa_session.execute(stmt) if job_id not in self.index
+        ]
+
+    def _track_jobs(self, jobs: List[Tuple[int, UserKey, Optional[int]]]) -> None:
+        if not jobs:
+            return
+        not_ready = self._not_ready_inputs([job_id for job_id, _, _ in jobs])
+        for job_id, user_key, user_id in jobs:
+            self.index.add_job(job_id, user_key, not_ready.get(job_id, ()), user_id=user_id)
+
+    def _inactive_users(self, user_ids: Set[int]) -> Set[Optional[int]]:
+        inactive: Set[Optional[int]] = set()
+        for chunk in chunk_iterable(user_ids):
+            stmt = select(model.User.id).where(and_(model.User.id.in_(chunk), model.User.active == false()))
+            inactive.update(self.sa_session.scalars(stmt))
+        return inactive
+
+    def _not_ready_inputs(self, job_ids: List[int]) -> Dict[int, Set[int]]:
+        not_ready: Dict[int, Set[int]] = defaultdict(set)
+        for input_job_id, input_id, association_id, association_dataset_id in (
+            (
+                model.JobToInputDatasetAssociation.job_id,
+                model.JobToInputDatasetAssociation.dataset_id,
+                model.HistoryDatasetAssociation.table.c.id,
+                model.HistoryDatasetAssociation.table.c.dataset_id,
+            ),
+            (
+                model.JobToInputLibraryDatasetAssociation.job_id,
+                model.JobToInputLibraryDatasetAssociation.ldda_id,
+                model.LibraryDatasetDatasetAssociation.table.c.id,
+                model.LibraryDatasetDatasetAssociation.table.c.dataset_id,
+            ),
+        ):
+            for chunk in chunk_iterable(job_ids):
+                stmt = (
+                    select(input_job_id, model.Dataset.id)
+                    .join(association_id.table, input_id == association_id)
+                    .join(model.Dataset, association_dataset_id == model.Dataset.id)
+                    .where(
+                        and_(
+                            input_job_id.in_(chunk),
+                            model.Dataset.state.in_(model.Dataset.non_ready_states),
+                        )
+                    )
+                )
+                for job_id, dataset_id in self.sa_session.execute(stmt):
+                    not_ready[job_id].add(dataset_id)
+        return not_ready
+
+    def _datasets_ready_since(self, since: datetime.datetime) -> List[int]:
+        ready = []
+        for chunk in chunk_iterable(self.index.dataset_ids):
+            stmt = select(model.Dataset.id).where(
+                and_(
+                    model.Dataset.id.in_(chunk),
+                    model.Dataset.update_time >= since,
+                    model.Dataset.state.not_in(model.Dataset.non_ready_states),
+                )
+            )
+            ready.extend(self.sa_session.scalars(stmt))
+        return ready
@@ -18,6 +18,7 @@ from queue import (
 from typing import (
     Any,
     Dict,
+    List,
     Optional,
     TYPE_CHECKING,
     Union,
@@ -76,6 +77,9 @@ log = get_logger(__name__)
 
 STOP_SIGNAL = object()
 
+# Work items calling these runner methods are handled by the finish workers, if configured.
+FINISH_METHODS = ("finish_job", "fail_job")
+
 
 JOB_RUNNER_PARAMETER_UNKNOWN_MESSAGE = "Invalid job runner parameter for this plugin: %s"
 JOB_RUNNER_PARAMETER_MAP_PROBLEM_MESSAGE = (
@@ -98,11 +102,33 @@ class RunnerParams(ParamsWithSpecs):
         raise Exception(JOB_RUNNER_PARAMETER_VALIDATION_FAILED_MESSAGE % name)
 
 
+class WorkQueue(Queue):
+    """Queue of ``(method, arg)`` work items for the worker threads of a job runner.
+
+    If ``finish_queue`` is set, items finishing or failing jobs are put there
+    instead, so that finishing many jobs at once does not hold up the
+    submission of new jobs.
+    """
+
+    def __init__(self, finish_queue: Optional[Queue] = None):
+        super().__init__()
+        self.finish_queue = finish_queue
+
+    def put(self, item, block=True, timeout=None):
+        if self.finish_queue is not None and getattr(item[0], "__name__", None) in FINISH_METHODS:
+            self.finish_queue.put(item, block, timeout)
+        else:
+            super().put(item, block, timeout)
+
+
 class BaseJobRunner:
     runner_name = "BaseJobRunner"
 
     start_methods = ["_init_monitor_thread", "_init_worker_threads"]
-    DEFAULT_SPECS = dict(recheck_missing_job_retries=dict(map=int, valid=lambda x: int(x) >= 0, default=0))
+    DEFAULT_SPECS = dict(
+        recheck_missing_job_retries=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+        finish_workers=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+    )
 
     def __init__(self, app: "GalaxyManagerApplication", nworkers: int, **kwargs):
         """Start the job runner"""
@@ -124,15 +150,24 @@ class BaseJobRunner:
             getattr(self, start_method, lambda: None)()
 
     def _init_worker_threads(self):
-        """Start ``nworkers`` worker threads."""
-        self.work_queue = Queue()
+        """Start ``nworkers`` worker threads, and ``finish_workers`` threads finishing jobs if configured."""
+        finish_workers = self.runner_params["finish_workers"]
+        self.finish_queue: Optional[Queue] = Queue() if finish_workers else None
+        self.work_queue = WorkQueue(self.finish_queue)
         self.work_threads = []
         log.debug(f"Starting {self.nworkers} {self.runner_name} workers")
         for i in range(self.nworkers):
-            worker = threading.Thread(name="%s.work_thread-%d" % (self.runner_name, i), target=self.run_next)
-            worker.daemon = True
-            worker.start()
-            self.work_threads.append(worker)
+            self._start_worker_thread("%s.work_thread-%d" % (self.runner_name, i), self.work_queue)
+        if self.finish_queue is not None:
+            log.debug(f"Starting {finish_workers} {self.runner_name} finish workers")
+            for i in range(finish_workers):
+                self._start_worker_thread("%s.finish_thread-%d" % (self.runner_name, i), self.finish_queue)
+
+    def _start_worker_thread(self, name: str, queue: Queue):
+        worker = threading.Thread(name=name, target=self.run_next, args=(queue,))
+        worker.daemon = True
+        worker.start()
+        self.work_threads.append(worker)
 
     def _alive_worker_threads(self, cycle=False):
         # yield endlessly as long as there are alive threads if cycle is True
@@ -145,12 +180,13 @@ class BaseJobRunner:
                         alive = True
                     yield thread
 
-    def run_next(self):
+    def run_next(self, queue=None):
         """Run the next item in the work queue (a job waiting to run)"""
+        queue = queue or self.work_queue
         while self._should_stop is False:
             with self.app.model.session():  # Create a Session instance and ensure it's closed.
                 try:
-                    (method, arg) = self.work_queue.get(timeout=1)
+                    (method, arg) = queue.get(timeout=1)
                 except Empty:
                     continue
                 if method is STOP_SIGNAL:
@@ -202,8 +238,11 @@ class BaseJobRunner:
                 self.app.model.session().add(job)
 
     # Causes a runner's `queue_job` method to be called from a worker thread
-    def put(self, job_wrapper: "MinimalJobWrapper"):
-        """Add a job to the queue (by job identifier), indicate that the job is ready to run."""
+    def put(self, job_wrapper: "MinimalJobWrapper") -> bool:
+        """Add a job to the queue (by job identifier), indicate that the job is ready to run.
+
+        Returns ``True`` if the job has been queued.
+        """
         put_timer = ExecutionTimer()
         try:
             queue_job = job_wrapper.enqueue()
@@ -214,10 +253,42 @@ class BaseJobRunner:
             message = e.client_message if hasattr(e, "client_message") else str(e)
             job_wrapper.fail(message, exception=e)
             log.debug(f"Job [{job_wrapper.job_id}] failed to queue {put_timer}")
-            return
+            return False
         if queue_job:
             self.mark_as_queued(job_wrapper)
             log.debug(f"Job [{job_wrapper.job_id}] queued {put_timer}")
+        return bool(queue_job)
+
+    def put_many(self, job_wrappers: List["MinimalJobWrapper"]) -> List["MinimalJobWrapper"]:
+        """Add several jobs to the queue, persisting their queued state in a single transaction.
+
+        If the transaction fails, jobs are queued one by one. Returns the jobs that have been queued.
+        """
+        put_timer = ExecutionTimer()
+        queued_job_wrappers = []
+        for job_wrapper in job_wrappers:
+            try:
+                if job_wrapper.enqueue(flush=False):
+                    queued_job_wrappers.append(job_wrapper)
+            except Exception as e:
+                message = e.client_message if hasattr(e, "client_message") else str(e)
+                job_wrapper.fail(message, exception=e)
+                log.debug(f"Job [{job_wrapper.job_id}] failed to queue {put_timer}")
+        if not queued_job_wrappers:
+            return []
+        job_ids = ", ".join(str(job_wrapper.job_id) for job_wrapper in queued_job_wrappers)
+        sa_session = self.app.model.context
+        try:
+            with transaction(sa_session):
+                sa_session.commit()
+        except Exception:
+            log.exception(f"Failed to persist the queued state of jobs [{job_ids}], queueing them one by one")
+            sa_session.rollback()
+            return [job_wrapper for job_wrapper in queued_job_wrappers if self.put(job_wrapper)]
+        for job_wrapper in queued_job_wrappers:
+            self.mark_as_queued(job_wrapper)
+        log.debug(f"Jobs [{job_ids}] queued {put_timer}")
+        return queued_job_wrappers
 
     def mark_as_queued(self, job_wrapper: "MinimalJobWrapper"):
         self.work_queue.put((self.queue_job, job_wrapper))
@@ -226,8 +297,11 @@ class BaseJobRunner:
         """Attempts to gracefully shut down the worker threads"""
         log.info("%s: Sending stop signal to %s job worker threads", self.runner_name, len(self.work_threads))
         self._should_stop = True
-        for _ in range(len(self.work_threads)):
+        for _ in range(self.nworkers):
             self.work_queue.put((STOP_SIGNAL, None))
+        if self.finish_queue is not None:
+            for _ in range(len(self.work_threads) - self.nworkers):
+                self.finish_queue.put((STOP_SIGNAL, None))
 
         if (join_timeout := self.app.config.monitor_thread_join_timeout) > 0:
             log.info("Waiting up to %d seconds for job worker threads to shutdown...", join_timeout)
@@ -839,6 +913,9 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
         # to 'watched' and then manage the watched jobs.
         self.watched = []
         self.monitor_queue = Queue()
+        # Runner specific states of watched jobs polled in bulk at the start of
+        # each monitor cycle, keyed by external job id.
+        self.batch_states: Dict[str, Any] = {}
 
     def _init_monitor_thread(self):
         name = f"{self.runner_name}.monitor_thread"
@@ -900,6 +977,7 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
         initially) or just override check_watched_item and allow the list processing to
         reuse the logic here.
         """
+        self.poll_batch_states()
         new_watched = []
         for async_job_state in self.watched:
             new_async_job_state = self.check_watched_item(async_job_state)
@@ -911,6 +989,31 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
     def check_watched_item(self, job_state):
         raise NotImplementedError()
 
+    def check_watched_items_batch(self, job_states: List[AsynchronousJobState]) -> Optional[Dict[str, Any]]:
+        """
+        Poll the states of many watched jobs at once and return them keyed by
+        external job id. Runners that can query the state of all their jobs in
+        a single request (one ``squeue`` call, one Kubernetes list) override
+        this, ``check_watched_item`` then uses ``self.batch_states`` and only
+        queries jobs missing from it individually.
+        """
+        return None
+
+    def poll_batch_states(self) -> Optional[Dict[str, Any]]:
+        """Refresh ``self.batch_states`` for the jobs currently watched.
+
+        Returns ``None`` if the batch state check failed, ``self.batch_states``
+        is empty in that case.
+        """
+        self.batch_states = {}
+        if self.watched:
+            try:
+                self.batch_states = self.check_watched_items_batch(self.watched) or {}
+            except Exception:
+                log.exception("%s: batch state check failed", self.runner_name)
+                return None
+        return self.batch_states
+
     def finish_job(self, job_state: AsynchronousJobState):
         """
         Get the output/error for a finished job, pass to `job_wrapper.finish`
@@ -159,7 +159,10 @@ class ShellJobRunner(AsynchronousJobRunner):
         """
         new_watched = []
 
-        job_states = self.__get_job_states()
+        job_states = self.poll_batch_states()
+        if job_states is None:
+            # keep watching all jobs unchanged, their states are checked again in the next cycle
+            return
 
         for ajs in self.watched:
             external_job_id = ajs.job_id
@@ -223,11 +226,12 @@ class ShellJobRunner(AsynchronousJobRunner):
                 ajs.runner_state = JobState.runner_states.MEMORY_LIMIT_REACHED
                 ajs.fail_message = "Tool failed due to insufficient memory. Try with more memory."
 
-    def __get_job_states(self):
+    def check_watched_items_batch(self, job_states):
+        """Get the states of all watched jobs with one status call per destination."""
         job_destinations = {}
-        job_states = {}
+        states = {}
         # unique the list of destinations
-        for ajs in self.watched:
+        for ajs in job_states:
             if ajs.job_destination.id not in job_destinations:
                 job_destinations[ajs.job_destination.id] = dict(
                     job_destination=ajs.job_destination, job_ids=[ajs.job_id]
@@ -242,8 +246,8 @@ class ShellJobRunner(AsynchronousJobRunner):
             shell, job_interface = self.get_cli_plugins(shell_params, job_params)
             cmd_out = shell.execute(job_interface.get_status(job_ids))
             assert cmd_out.returncode == 0, cmd_out.stderr
-            job_states.update(job_interface.parse_status(cmd_out.stdout, job_ids))
-        return job_states
+            states.update(job_interface.parse_status(cmd_out.stdout, job_ids))
+        return states
 
     def stop_job(self, job_wrapper):
         """Attempts to delete a dispatched job"""
@@ -283,7 +283,9 @@ class DRMAAJobRunner(AsynchronousJobRunner):
         state = None
         try:
             assert external_job_id not in (None, "None"), f"({galaxy_id_tag}/{external_job_id}) Invalid job id"
-            state = self.ds.job_status(external_job_id)
+            state = self.batch_states.get(external_job_id)
+            if state is None:
+                state = self.ds.job_status(external_job_id)
             # Reset exception retries
             for retry_exception in RETRY_EXCEPTIONS_LOWER:
                 setattr(ajs, f"{retry_exception}_retries", 0)
@@ -337,6 +339,7 @@ class DRMAAJobRunner(AsynchronousJobRunner):
         Called by the monitor thread to look at each watched job and deal
         with state changes.
         """
+        self.poll_batch_states()
         new_watched = []
         for ajs in self.watched:
             external_job_id = ajs.job_id
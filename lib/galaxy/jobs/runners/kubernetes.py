@@ -18,6 +18,7 @@ from galaxy.jobs.runners import (
     AsynchronousJobState,
     JobState,
 )
+from galaxy.jobs.runners.util.pykube_informer import Informer
 from galaxy.jobs.runners.util.pykube_util import (
     deduplicate_entries,
     DEFAULT_INGRESS_API_VERSION,
@@ -113,6 +114,8 @@ class KubernetesJobRunner(AsynchronousJobRunner):
             k8s_interactivetools_ingress_class=dict(map=str, default=None),
             k8s_interactivetools_tls_secret=dict(map=str, default=None),
             k8s_ingress_api_version=dict(map=str, default=DEFAULT_INGRESS_API_VERSION),
+            k8s_informer=dict(map=bool, default=False),
+            k8s_informer_resync_interval=dict(map=int, valid=lambda x: int(x) > 0, default=300),
         )
 
         if "runner_param_specs" not in kwargs:
@@ -133,6 +136,11 @@ class KubernetesJobRunner(AsynchronousJobRunner):
 
         self.setup_base_volumes()
 
+        self._job_informer = None
+        self._pod_informer = None
+        if self.runner_params["k8s_informer"]:
+            self.__start_informers()
+
     def setup_base_volumes(self):
         def generate_volumes(pvc_list):
             return [{"name": pvc["name"], "persistentVolumeClaim": {"claimName": pvc["name"]}} for pvc in pvc_list]
@@ -152,6 +160,43 @@ class KubernetesJobRunner(AsynchronousJobRunner):
         self.runner_params["k8s_volumes"].extend(get_volume_mounts_for("k8s_data_volume_claim")[0])
         self.runner_params["k8s_volumes"].extend(get_volume_mounts_for("k8s_working_volume_claim")[0])
 
+    def __start_informers(self):
+        """Cache the jobs and pods of this handler, kept up to date by watching the API server."""
+        common = dict(
+            namespace=self.runner_params["k8s_namespace"],
+            selector=self.__handler_selector(),
+            resync_interval=self.runner_params["k8s_informer_resync_interval"],
+        )
+        self._job_informer = Informer(self._pykube_api, Job, **common)
+        self._pod_informer = Informer(self._pykube_api, Pod, index_label="job-name", **common)
+        self._job_informer.start()
+        self._pod_informer.start()
+
+    def handle_stop(self):
+        for informer in (self._job_informer, self._pod_informer):
+            if informer is not None:
+                informer.stop()
+
+    def __handler_selector(self):
+        return {"app.galaxyproject.org/handler": self.__force_label_conformity(self.app.config.server_name)}
+
+    def __find_job_objects(self, job_name):
+        """Return the k8s jobs named ``job_name``, from the informer cache if possible."""
+        if self._job_informer is not None and self._job_informer.synced:
+            if (job_obj := self._job_informer.get(job_name)) is not None:
+                return [job_obj]
+        # not cached (yet), the job may have been created after the last watch event
+        jobs = find_job_object_by_name(self._pykube_api, job_name, self.runner_params["k8s_namespace"])
+        return jobs.response["items"]
+
+    def __find_pod_objects(self, job_name):
+        """Return the pods of the k8s job ``job_name``, from the informer cache if possible."""
+        if self._pod_informer is not None and self._pod_informer.synced:
+            if pod_objs := self._pod_informer.get_by_label(job_name):
+                return pod_objs
+        pods = find_pod_object_by_name(self._pykube_api, job_name, self.runner_params["k8s_namespace"])
+        return pods.response["items"]
+
     def queue_job(self, job_wrapper):
         """Create job script and submit it to Kubernetes cluster"""
         # prepare the job
@@ -745,12 +790,24 @@ class KubernetesJobRunner(AsynchronousJobRunner):
                 new_params[each_param] = job_destination.params[each_param]
         return new_params
 
+    def check_watched_items_batch(self, job_states):
+        """List the k8s jobs of this Galaxy handler with a single label selector query, keyed by job name."""
+        if self._job_informer is not None and self._job_informer.synced:
+            return self._job_informer.snapshot()
+        jobs = Job.objects(self._pykube_api).filter(
+            selector=self.__handler_selector(), namespace=self.runner_params["k8s_namespace"]
+        )
+        return {job["metadata"]["name"]: job for job in jobs.response["items"]}
+
     def check_watched_item(self, job_state):
         """Checks the state of a job already submitted on k8s. Job state is an AsynchronousJobState"""
-        jobs = find_job_object_by_name(self._pykube_api, job_state.job_id, self.runner_params["k8s_namespace"])
+        if job_state.job_id in self.batch_states:
+            job_objs = [self.batch_states[job_state.job_id]]
+        else:
+            job_objs = self.__find_job_objects(job_state.job_id)
 
-        if len(jobs.response["items"]) == 1:
-            job = Job(self._pykube_api, jobs.response["items"][0])
+        if len(job_objs) == 1:
+            job = Job(self._pykube_api, job_objs[0])
             job_destination = job_state.job_wrapper.job_destination
             succeeded = 0
             active = 0
@@ -837,7 +894,7 @@ class KubernetesJobRunner(AsynchronousJobRunner):
 
                 return None
 
-        elif len(jobs.response["items"]) == 0:
+        elif len(job_objs) == 0:
             if job_state.job_wrapper.get_job().state == model.Job.states.DELETED:
                 if job_state.job_wrapper.cleanup_job in ("always", "onsuccess"):
                     job_state.job_wrapper.cleanup()
@@ -949,12 +1006,12 @@ class KubernetesJobRunner(AsynchronousJobRunner):
         for being out of memory (pod status OOMKilled). If that is the case
         marks the job for resubmission (resubmit logic is part of destinations).
         """
-        pods = find_pod_object_by_name(self._pykube_api, job_state.job_id, self.runner_params["k8s_namespace"])
-        if not pods.response["items"]:
+        pod_objs = self.__find_pod_objects(job_state.job_id)
+        if not pod_objs:
             return False
 
         # pod = self._get_pod_for_job(job_state) # this was always None
-        pod = pods.response["items"][0]
+        pod = pod_objs[0]
         if (
             pod
             and "terminated" in pod["status"]["containerStatuses"][0]["state"]
@@ -968,22 +1025,22 @@ class KubernetesJobRunner(AsynchronousJobRunner):
         """
         checks the state of the pod to see if it is running.
         """
-        pods = find_pod_object_by_name(self._pykube_api, job_state.job_id, self.runner_params["k8s_namespace"])
-        if not pods.response["items"]:
+        pod_objs = self.__find_pod_objects(job_state.job_id)
+        if not pod_objs:
             return False
 
-        pod = Pod(self._pykube_api, pods.response["items"][0])
+        pod = Pod(self._pykube_api, pod_objs[0])
         return is_pod_running(self._pykube_api, pod, self.runner_params["k8s_namespace"])
 
     def __job_pending_due_to_unschedulable_pod(self, job_state):
         """
         checks the state of the pod to see if it is unschedulable.
         """
-        pods = find_pod_object_by_name(self._pykube_api, job_state.job_id, self.runner_params["k8s_namespace"])
-        if not pods.response["items"]:
+        pod_objs = self.__find_pod_objects(job_state.job_id)
+        if not pod_objs:
             return False
 
-        pod = Pod(self._pykube_api, pods.response["items"][0])
+        pod = Pod(self._pykube_api, pod_objs[0])
         return is_pod_unschedulable(self._pykube_api, pod, self.runner_params["k8s_namespace"])
 
     def __job_failed_due_to_unknown_exit_code(self, job_state):
@@ -991,11 +1048,11 @@ class KubernetesJobRunner(AsynchronousJobRunner):
         checks whether the pod exited prematurely due to an unknown exit code (i.e. not an exit code like OOM that
         we can handle). This would mean that the tool failed, but the job should be considered to have succeeded.
         """
-        pods = find_pod_object_by_name(self._pykube_api, job_state.job_id, self.runner_params["k8s_namespace"])
-        if not pods.response["items"]:
+        pod_objs = self.__find_pod_objects(job_state.job_id)
+        if not pod_objs:
             return False
 
-        pod = pods.response["items"][0]
+        pod = pod_objs[0]
         if (
             pod
             and "terminated" in pod["status"]["containerStatuses"][0]["state"]
@@ -1166,17 +1223,17 @@ class KubernetesJobRunner(AsynchronousJobRunner):
     def finish_job(self, job_state):
         self._handle_metadata_externally(job_state.job_wrapper, resolve_requirements=True)
         super().finish_job(job_state)
-        jobs = find_job_object_by_name(self._pykube_api, job_state.job_id, self.runner_params["k8s_namespace"])
-        if len(jobs.response["items"]) > 1:
+        job_objs = self.__find_job_objects(job_state.job_id)
+        if len(job_objs) > 1:
             log.warning(
                 "More than one job matches selector: %s. Possible configuration error in job id '%s'",
-                jobs.response["items"],
+                job_objs,
                 job_state.job_id,
             )
-        elif len(jobs.response["items"]) == 0:
+        elif len(job_objs) == 0:
             log.warning("No k8s job found which matches job id '%s'. Ignoring...", job_state.job_id)
         else:
-            job = Job(self._pykube_api, jobs.response["items"][0])
+            job = Job(self._pykube_api, job_objs[0])
             if self.__has_guest_ports(job_state.job_wrapper):
                 self.__cleanup_k8s_guest_ports(job_state.job_wrapper, job)
             self.__cleanup_k8s_job(job)
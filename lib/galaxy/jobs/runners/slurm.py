@@ -4,10 +4,17 @@ SLURM job control via the DRMAA API.
 
 import os
 import time
+from collections import defaultdict
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
 
 from galaxy import model
 from galaxy.jobs.runners.drmaa import DRMAAJobRunner
 from galaxy.util import (
+    chunk_iterable,
     commands,
     unicodify,
 )
@@ -35,11 +42,57 @@ SLURM_MEMORY_LIMIT_EXCEEDED_PARTIAL_WARNINGS = [
 OUT_OF_MEMORY_MSG = "This job was terminated because it used more memory than it was allocated."
 PROBABLY_OUT_OF_MEMORY_MSG = "This job was cancelled probably because it used more memory than it was allocated."
 
+# squeue states of jobs that have not finished, mapped to the names of the corresponding DRMAA job states.
+# Jobs in any other state (or no longer known to squeue) are checked individually through DRMAA, which
+# also reports how they terminated.
+SQUEUE_ACTIVE_STATES = {
+    "PENDING": "QUEUED_ACTIVE",
+    "CONFIGURING": "QUEUED_ACTIVE",
+    "RUNNING": "RUNNING",
+}
+# Number of job ids passed to a single squeue invocation
+SQUEUE_JOB_IDS_PER_CALL = 1000
+
 
 class SlurmJobRunner(DRMAAJobRunner):
     runner_name = "SlurmRunner"
     restrict_job_name_length = False
 
+    def check_watched_items_batch(self, job_states) -> Optional[Dict[str, str]]:
+        """Get the states of all watched jobs that are still queued or running with one squeue call per cluster."""
+        job_ids_by_cluster: Dict[Optional[str], List[str]] = defaultdict(list)
+        for ajs in job_states:
+            if ajs.job_id in (None, "None"):
+                continue
+            if "." in ajs.job_id:
+                # custom slurm-drmaa-with-cluster-support job id syntax
+                job_id, cluster = ajs.job_id.split(".", 1)
+                job_ids_by_cluster[cluster].append(job_id)
+            else:
+                job_ids_by_cluster[None].append(ajs.job_id)
+        states = {}
+        for cluster, job_ids in job_ids_by_cluster.items():
+            for chunk in chunk_iterable(job_ids, SQUEUE_JOB_IDS_PER_CALL):
+                cmd = ["squeue", "--noheader", "--format=%i %T"]
+                if cluster:
+                    cmd.extend(["-M", cluster])
+                cmd.extend(["--jobs", ",".join(chunk)])
+                try:
+                    stdout = commands.execute(cmd)
+                except commands.CommandLineException as e:
+                    if "Invalid job id" in unicodify(e.stderr):
+                        # none of the jobs are known to squeue anymore
+                        continue
+                    raise
+                for line in stdout.splitlines():
+                    fields = line.split()
+                    # with -M, squeue prints a 'CLUSTER: <name>' line first
+                    if len(fields) != 2 or fields[1] not in SQUEUE_ACTIVE_STATES:
+                        continue
+                    job_id = f"{fields[0]}.{cluster}" if cluster else fields[0]
+                    states[job_id] = getattr(self.drmaa.JobState, SQUEUE_ACTIVE_STATES[fields[1]])
+        return states
+
     def _complete_terminal_job(self, ajs, drmaa_state, **kwargs):
         def _get_slurm_state_with_sacct(job_id, cluster):
             cmd = ["sacct", "-n", "-o", "state%-32"]
@@ -0,0 +1,181 @@
+"""In-process caches of Kubernetes objects kept up to date with watch streams.
+
+An :class:`Informer` lists the objects of one kind matching a label selector,
+then follows a watch stream starting at the ``resourceVersion`` of that list to
+apply every change to an in-memory cache. Lookups are served from the cache,
+so polling the state of many jobs does not cost any API server request.
+
+The cache is rebuilt from a fresh list when the watch fails, when the API
+server reports that the ``resourceVersion`` is too old to resume from (HTTP
+410 Gone) and every ``resync_interval`` seconds as a safety net.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_RESYNC_INTERVAL = 300
+# The API server closes watches after this many seconds, the watch is then resumed.
+DEFAULT_WATCH_TIMEOUT = 60
+# Seconds to wait before listing again after a failed list or watch.
+ERROR_BACKOFF = 5
+HTTP_GONE = 410
+
+
+class Informer:
+    """Cache of the objects of a pykube object class, keyed by name.
+
+    ``object_class`` is a pykube API object class (e.g. ``Job`` or ``Pod``),
+    only objects in ``namespace`` matching the label ``selector`` are cached.
+    If ``index_label`` is set, objects can also be looked up by the value of
+    that label with :meth:`get_by_label`.
+    """
+
+    def __init__(
+        self,
+        api,
+        object_class,
+        namespace: Optional[str] = None,
+        selector: Optional[Dict[str, str]] = None,
+        index_label: Optional[str] = None,
+        resync_interval: float = DEFAULT_RESYNC_INTERVAL,
+        watch_timeout: int = DEFAULT_WATCH_TIMEOUT,
+    ):
+        self.api = api
+        self.object_class = object_class
+        self.namespace = namespace
+        self.selector = selector or {}
+        self.index_label = index_label
+        self.resync_interval = resync_interval
+        self.watch_timeout = watch_timeout
+        self.resource_version: Optional[str] = None
+        self._objects: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._should_stop = threading.Event()
+        self._last_list: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def kind(self) -> str:
+        return self.object_class.__name__
+
+    @property
+    def synced(self) -> bool:
+        """Whether the cache has been filled by a successful list."""
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        return self._synced.wait(timeout)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(name=f"{self.kind}.informer", target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._should_stop.set()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._objects.get(name)
+
+    def get_by_label(self, value: str) -> List[Dict[str, Any]]:
+        """Return the objects whose ``index_label`` is ``value``."""
+        with self._lock:
+            return [self._objects[name] for name in sorted(self._index.get(value, ()))]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._objects)
+
+    def run(self) -> None:
+        while not self._should_stop.is_set():
+            try:
+                if self._needs_list():
+                    self.list()
+                self.watch()
+            except Exception:
+                log.exception("%s informer failed, listing again in %s seconds", self.kind, ERROR_BACKOFF)
+                self.resource_version = None
+                self._should_stop.wait(ERROR_BACKOFF)
+
+    def _needs_list(self) -> bool:
+        return (
+            self.resource_version is None
+            or self._last_list is None
+            or time.time() - self._last_list >= self.resync_interval
+        )
+
+    def _query(self):
+        return self.object_class.objects(self.api).filter(namespace=self.namespace, selector=self.selector)
+
+    def list(self) -> None:
+        """Replace the cache with the current objects."""
+        response = self._query().response
+        with self._lock:
+            self._objects.clear()
+            self._index.clear()
+            for obj in response["items"]:
+                self._add(obj)
+        self.resource_version = response["metadata"]["resourceVersion"]
+        self._last_list = time.time()
+        self._synced.set()
+
+    def watch(self) -> None:
+        """Apply changes to the cache until the watch times out or a list is due."""
+        stream = self._query().watch(
+            since=self.resource_version, params={"timeoutSeconds": self.watch_timeout, "allowWatchBookmarks": "true"}
+        )
+        for event in stream.object_stream():
+            if self._should_stop.is_set():
+                return
+            self.apply(event.type, event.object.obj)
+            if self.resource_version is None or self._needs_list():
+                return
+
+    def apply(self, event_type: str, obj: Dict[str, Any]) -> None:
+        """Apply a single watch event to the cache."""
+        if event_type == "ERROR":
+            # obj is a Status object, a 410 means the resource version expired
+            if obj.get("code") != HTTP_GONE:
+                log.warning("%s informer watch error: %s", self.kind, obj.get("message"))
+            self.resource_version = None
+            return
+        if event_type in ("ADDED", "MODIFIED"):
+            with self._lock:
+                self._add(obj)
+        elif event_type == "DELETED":
+            with self._lock:
+                self._remove(obj["metadata"]["name"])
+        self.resource_version = obj["metadata"].get("resourceVersion", self.resource_version)
+
+    def _add(self, obj: Dict[str, Any]) -> None:
+        name = obj["metadata"]["name"]
+        self._remove(name)
+        self._objects[name] = obj
+        if self.index_label and (value := (obj["metadata"].get("labels") or {}).get(self.index_label)):
+            self._index[value].add(name)
+
+    def _remove(self, name: str) -> None:
+        obj = self._objects.pop(name, None)
+        if obj is None or not self.index_label:
+            return
+        value = (obj["metadata"].get("labels") or {}).get(self.index_label)
+        if value and (names := self._index.get(value)) is not None:
+            names.discard(name)
+            if not names:
+                del self._index[value]
+
+
+__all__ = ("Informer",)
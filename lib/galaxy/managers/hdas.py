@@ -477,6 +477,18 @@ class HDAStorageCleanerManager(base.StorageCleanerManager):
             self.dataset_manager.purge_datasets(request)
 
 
+def dbkey_from_metadata(metadata: Optional[Dict[str, Any]]) -> str:
+    """
+    Return the dbkey of a dataset instance from its (raw) metadata, like `DatasetInstance.dbkey`.
+    """
+    dbkey = (metadata or {}).get("dbkey", "?")
+    if not isinstance(dbkey, list):
+        dbkey = [dbkey]
+    if dbkey in [[None], []]:
+        return "?"
+    return str(dbkey[0])
+
+
 class HDASerializer(  # datasets._UnflattenedMetadataDatasetAssociationSerializer,
     datasets.DatasetAssociationSerializer[HDAManager],
     taggable.TaggableSerializerMixin,
@@ -572,6 +584,7 @@ class HDASerializer(  # datasets._UnflattenedMetadataDatasetAssociationSerialize
             "inaccessible",
             ["accessible", "id", "name", "history_id", "hid", "history_content_type", "state", "deleted", "visible"],
         )
+        self.add_row_serializers()
 
     def serialize_copied_from_ldda_id(self, item, key, **context):
         """
@@ -634,6 +647,73 @@ class HDASerializer(  # datasets._UnflattenedMetadataDatasetAssociationSerialize
         }
         self.serializers.update(serializers)
 
+    def add_row_serializers(self):
+        """
+        Register serializers for the keys that can be serialized from the columns
+        returned by `HistoryContentsManager._contained_row_map`, without loading
+        the HDA model. These cover the summary view.
+        """
+        self.row_serializers: Dict[str, base.Serializer] = {
+            "id": self.serialize_row_id,
+            "type_id": lambda item, key, **context: f"dataset-{self.app.security.encode_id(item['id'])}",
+            "name": lambda item, key, **context: item["name"],
+            "history_id": self.serialize_row_id,
+            "hid": lambda item, key, **context: item["hid"] if item["hid"] is not None else -1,
+            "history_content_type": lambda item, key, **context: "dataset",
+            "dataset_id": self.serialize_row_id,
+            "genome_build": lambda item, key, **context: dbkey_from_metadata(item["_metadata"]),
+            "state": lambda item, key, **context: item["_state"] or item["dataset_state"],
+            "extension": lambda item, key, **context: item["extension"],
+            "deleted": lambda item, key, **context: item["deleted"],
+            "purged": lambda item, key, **context: item["purged"],
+            "visible": lambda item, key, **context: item["visible"],
+            "tags": lambda item, key, **context: taggable.tags_to_strings(item["tags"]),
+            "type": lambda item, key, **context: "file",
+            "url": lambda item, key, **context: self.url_for(
+                "history_content",
+                history_id=self.app.security.encode_id(item["history_id"]),
+                id=self.app.security.encode_id(item["id"]),
+                context=context,
+            ),
+            "create_time": self.serialize_row_date,
+            "update_time": self.serialize_row_date,
+            "object_store_id": lambda item, key, **context: item["object_store_id"],
+            "quota_source_label": lambda item, key, **context: self.app.object_store.get_quota_source_map()
+            .get_quota_source_info(item["object_store_id"])
+            .label,
+        }
+
+    def serialize_row_id(self, item: Any, key: str, encode_id=True, **context):
+        id = item[key]
+        return self.app.security.encode_id(id) if id is not None and encode_id else id
+
+    def serialize_row_date(self, item: Any, key: str, **context):
+        date = item[key]
+        return date.isoformat() if date is not None else None
+
+    def can_serialize_rows(self, keys: List[str]) -> bool:
+        """
+        Return True if all serializable `keys` can be serialized from rows.
+        """
+        return all(
+            key in self.row_serializers or (key not in self.serializers and key not in self.serializable_keyset)
+            for key in keys
+        )
+
+    def serialize_row(
+        self, row: Dict[str, Any], keys: List[str], user_role_ids: Optional[Set[int]], **context
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Serialize the columns of an HDA returned by `HistoryContentsManager._contained_row_map`.
+
+        `user_role_ids` are the ids of the roles of the user, or None for admins.
+        Return None if the user can't access the dataset, it must then be
+        serialized from the model with `serialize`.
+        """
+        if user_role_ids is not None and not row["access_role_ids"] <= user_role_ids:
+            return None
+        return {key: self.row_serializers[key](row, key, **context) for key in keys if key in self.row_serializers}
+
     def serialize(self, item, keys, user=None, **context):
         """
         Override to hide information to users not able to access.
@@ -226,10 +226,14 @@ class HistoryContentsManager(base.SortableManager):
     def _session(self):
         return self.app.model.context
 
-    def _union_of_contents(self, container, expand_models=True, **kwargs):
+    def _union_of_contents(self, container, expand_models=True, contained_as_rows=False, **kwargs):
         """
         Returns a limited and offset list of both types of contents, filtered
         and in some order.
+
+        If `contained_as_rows` is set, contained items are returned as
+        dictionaries of their columns (see `_contained_row_map`) instead of
+        models, filters of type "function" are then not applied to them.
         """
         contents_results = self._union_of_contents_query(container, **kwargs).all()
         if not expand_models:
@@ -247,7 +251,10 @@ class HistoryContentsManager(base.SortableManager):
 
         # query 2 & 3: use the ids to query each component_class, returning an id->full component model map
         contained_ids = id_map[self.contained_class_type_name]
-        id_map[self.contained_class_type_name] = self._contained_id_map(contained_ids)
+        if contained_as_rows:
+            id_map[self.contained_class_type_name] = self._contained_row_map(contained_ids)
+        else:
+            id_map[self.contained_class_type_name] = self._contained_id_map(contained_ids)
         subcontainer_ids = id_map[self.subcontainer_class_type_name]
         serialization_params = kwargs.get("serialization_params", None)
         id_map[self.subcontainer_class_type_name] = self._subcontainer_id_map(
@@ -262,7 +269,7 @@ class HistoryContentsManager(base.SortableManager):
             result_type = self._get_union_type(result)
             contents_id = self._get_union_id(result)
             content = id_map[result_type][contents_id]
-            if self.passes_filters(content, filters):
+            if isinstance(content, dict) or self.passes_filters(content, filters):
                 contents.append(content)
         return contents
 
@@ -422,6 +429,58 @@ class HistoryContentsManager(base.SortableManager):
         result = self._session().scalars(stmt).unique()
         return {row.id: row for row in result}
 
+    def _contained_row_map(self, id_list):
+        """Return an id to column dictionary map of all contained-type items in the id_list.
+
+        Besides the columns of the item and its dataset, the dictionaries
+        contain the item's `tags` as rows and the `access_role_ids` of its
+        dataset, so that items can be serialized without loading any model.
+        """
+        if not id_list:
+            return {}
+        component_class = self.contained_class
+        table = component_class.table
+        stmt = (
+            select(
+                table.c.id,
+                table.c.history_id,
+                table.c.hid,
+                table.c.name,
+                table.c.extension,
+                table.c._metadata.label("_metadata"),
+                table.c._state.label("_state"),
+                table.c.dataset_id,
+                table.c.deleted,
+                table.c.purged,
+                table.c.visible,
+                table.c.create_time,
+                table.c.update_time,
+                model.Dataset.state.label("dataset_state"),
+                model.Dataset.object_store_id,
+            )
+            .join(model.Dataset, model.Dataset.id == table.c.dataset_id)
+            .where(table.c.id.in_(id_list))
+        )
+        rows = {row.id: dict(row._mapping, tags=[], access_role_ids=set()) for row in self._session().execute(stmt)}
+        tag_association = model.HistoryDatasetAssociationTagAssociation
+        tags_stmt = select(
+            tag_association.history_dataset_association_id,
+            tag_association.user_tname,
+            tag_association.value,
+            tag_association.user_value,
+        ).where(tag_association.history_dataset_association_id.in_(id_list))
+        for tag in self._session().execute(tags_stmt):
+            rows[tag.history_dataset_association_id]["tags"].append(tag)
+        access_action = self.app.security_agent.permitted_actions.DATASET_ACCESS.action
+        access_stmt = (
+            select(table.c.id, model.DatasetPermissions.role_id)
+            .join(model.DatasetPermissions, model.DatasetPermissions.dataset_id == table.c.dataset_id)
+            .where(table.c.id.in_(id_list), model.DatasetPermissions.action == access_action)
+        )
+        for item_id, role_id in self._session().execute(access_stmt):
+            rows[item_id]["access_role_ids"].add(role_id)
+        return rows
+
     def _subcontainer_id_map(self, id_list, serialization_params=None):
         """Return an id to model map of all subcontainer-type models in the id_list."""
         if not id_list:
@@ -21,6 +21,7 @@ from pydantic import (
 )
 from sqlalchemy import (
     and_,
+    exists,
     false,
     func,
     null,
@@ -66,6 +67,10 @@ from galaxy.model.index_filter_util import (
     raw_text_column_filter,
     text_column_filter,
 )
+from galaxy.model.job_cache import (
+    job_cache_fingerprint,
+    job_cache_parameters_digest,
+)
 from galaxy.model.scoped_session import galaxy_scoped_session
 from galaxy.schema.schema import (
     JobIndexQueryPayload,
@@ -384,6 +389,44 @@ class JobSearch:
     ):
         search_timer = ExecutionTimer()
 
+        fingerprint = job_cache_fingerprint(tool_id, param_dump)
+        stmt_sq = self._build_job_subquery(
+            tool_id, user.id, tool_version, job_state, model.Job.job_cache_fingerprint == fingerprint
+        )
+        for job_id, parameters_digest, new_param_dump in self._candidate_jobs(stmt_sq, input_data, param_dump):
+            # The fingerprint only guarantees that the parameters match up to input ids,
+            # the digest of the parameters with the ids of the inputs used by the job is exact.
+            if parameters_digest == job_cache_parameters_digest(new_param_dump):
+                log.info("Found equivalent job %s", search_timer)
+                return self.sa_session.get(Job, job_id)
+
+        # Jobs created before fingerprints were recorded (and not backfilled by
+        # ``scripts/set_job_cache_fingerprints.py``) are matched on their job parameters.
+        stmt_sq = self._build_job_subquery(
+            tool_id,
+            user.id,
+            tool_version,
+            job_state,
+            and_(
+                model.Job.job_cache_fingerprint.is_(None),
+                *self._wildcard_parameter_conditions(wildcard_param_dump or {}),
+            ),
+        )
+        for job_id, _, new_param_dump in self._candidate_jobs(stmt_sq, input_data, param_dump):
+            job = self._match_job_parameters(job_id, param_dump, new_param_dump)
+            if job is not None:
+                log.info("Found equivalent job without fingerprint %s", search_timer)
+                return job
+        log.info("No equivalent jobs found %s", search_timer)
+        return None
+
+    def _candidate_jobs(self, stmt_sq, input_data, param_dump):
+        """Yield the jobs selected by ``stmt_sq`` that ran on the requested inputs or copies of them.
+
+        For each job yield its id, its parameters digest and ``param_dump`` with the ids
+        of the requested inputs replaced by the ids of the inputs used by the job.
+        """
+
         def replace_dataset_ids(path, key, value):
             """Exchanges dataset_ids (HDA, LDA, HDCA, not Dataset) in param_dump with dataset ids used in job."""
             if key == "id":
@@ -395,9 +438,9 @@ class JobSearch:
                 return key, value
             return key, value
 
-        stmt_sq = self._build_job_subquery(tool_id, user.id, tool_version, job_state, wildcard_param_dump)
-
-        stmt = select(Job.id).select_from(Job.table.join(stmt_sq, stmt_sq.c.id == Job.id))
+        stmt = select(Job.id, stmt_sq.c.job_cache_parameters_digest).select_from(
+            Job.table.join(stmt_sq, stmt_sq.c.id == Job.id)
+        )
 
         data_conditions: List = []
 
@@ -427,74 +470,96 @@ class JobSearch:
                 elif t == "dce":
                     stmt = self._build_stmt_for_dce(stmt, data_conditions, used_ids, k, v)
                 else:
-                    return []
+                    return
 
-        stmt = stmt.where(*data_conditions).group_by(model.Job.id, *used_ids).order_by(model.Job.id.desc())
+        stmt = (
+            stmt.where(*data_conditions)
+            .group_by(model.Job.id, stmt_sq.c.job_cache_parameters_digest, *used_ids)
+            .order_by(model.Job.id.desc())
+        )
 
-        for job in self.sa_session.execute(stmt):
+        for job_id, parameters_digest, *current_jobs_data_ids in self.sa_session.execute(stmt):
             # We found a job that is equal in terms of tool_id, user, state and input datasets,
             # but to be able to verify that the parameters match we need to modify all instances of
             # dataset_ids (HDA, LDDA, HDCA) in the incoming param_dump to point to those used by the
             # possibly equivalent job, which may have been run on copies of the original input data.
-            job_input_ids = {}
-            if len(job) > 1:
+            job_input_ids: Dict[str, Dict] = {}
+            if current_jobs_data_ids:
                 # We do have datasets to check
-                job_id, current_jobs_data_ids = job[0], job[1:]
-                job_parameter_conditions = [model.Job.id == job_id]
                 for src, requested_id, used_id in zip(data_types, requested_ids, current_jobs_data_ids):
-                    if src not in job_input_ids:
-                        job_input_ids[src] = {requested_id: used_id}
-                    else:
-                        job_input_ids[src][requested_id] = used_id
+                    job_input_ids.setdefault(src, {})[requested_id] = used_id
                 new_param_dump = remap(param_dump, visit=replace_dataset_ids)
-                # new_param_dump has its dataset ids remapped to those used by the job.
-                # We now ask if the remapped job parameters match the current job.
-                for k, v in new_param_dump.items():
-                    if v == {"__class__": "RuntimeValue"}:
-                        # TODO: verify this is always None. e.g. run with runtime input input
-                        v = None
-                    elif k.endswith("|__identifier__"):
-                        # We've taken care of this while constructing the conditions based on ``input_data`` above
-                        continue
-                    elif k == "chromInfo" and "?.len" in v:
-                        continue
-                    a = aliased(model.JobParameter)
-                    job_parameter_conditions.append(
-                        and_(model.Job.id == a.job_id, a.name == k, a.value == json.dumps(v, sort_keys=True))
-                    )
             else:
-                job_parameter_conditions = [model.Job.id == job[0]]
-            job = get_job(self.sa_session, *job_parameter_conditions)
-            if job is None:
+                new_param_dump = param_dump
+            yield job_id, parameters_digest, new_param_dump
+
+    def _match_job_parameters(self, job_id, param_dump, new_param_dump) -> Optional[Job]:
+        """Return the job if its parameters match ``new_param_dump``, the request remapped to its inputs."""
+        job_parameter_conditions = [model.Job.id == job_id]
+        for k, v in new_param_dump.items():
+            if v == {"__class__": "RuntimeValue"}:
+                # TODO: verify this is always None. e.g. run with runtime input input
+                v = None
+            elif k.endswith("|__identifier__"):
+                # We've taken care of this while constructing the conditions based on ``input_data`` above
                 continue
-            n_parameters = 0
-            # Verify that equivalent jobs had the same number of job parameters
-            # We skip chrominfo, dbkey, __workflow_invocation_uuid__ and identifer
-            # parameter as these are not passed along when expanding tool parameters
-            # and they can differ without affecting the resulting dataset.
-            for parameter in job.parameters:
-                if parameter.name.startswith("__"):
-                    continue
-                if parameter.name in {"chromInfo", "dbkey"} or parameter.name.endswith("|__identifier__"):
-                    continue
-                n_parameters += 1
-            if not n_parameters == sum(
-                1
-                for k in param_dump
-                if not k.startswith("__") and not k.endswith("|__identifier__") and k not in {"chromInfo", "dbkey"}
-            ):
+            elif k == "chromInfo" and "?.len" in v:
                 continue
-            log.info("Found equivalent job %s", search_timer)
-            return job
-        log.info("No equivalent jobs found %s", search_timer)
-        return None
+            a = aliased(model.JobParameter)
+            job_parameter_conditions.append(
+                and_(model.Job.id == a.job_id, a.name == k, a.value == json.dumps(v, sort_keys=True))
+            )
+        job = get_job(self.sa_session, *job_parameter_conditions)
+        if job is None:
+            return None
+        n_parameters = 0
+        # Verify that equivalent jobs had the same number of job parameters
+        # We skip chrominfo, dbkey, __workflow_invocation_uuid__ and identifer
+        # parameter as these are not passed along when expanding tool parameters
+        # and they can differ without affecting the resulting dataset.
+        for parameter in job.parameters:
+            if parameter.name.startswith("__"):
+                continue
+            if parameter.name in {"chromInfo", "dbkey"} or parameter.name.endswith("|__identifier__"):
+                continue
+            n_parameters += 1
+        if not n_parameters == sum(
+            1
+            for k in param_dump
+            if not k.startswith("__") and not k.endswith("|__identifier__") and k not in {"chromInfo", "dbkey"}
+        ):
+            return None
+        return job
+
+    def _wildcard_parameter_conditions(self, wildcard_param_dump) -> List:
+        """Build conditions that select jobs with the requested parameters, input ids excluded."""
+        conditions = []
+        for k, v in wildcard_param_dump.items():
+            if v == {"__class__": "RuntimeValue"}:
+                # TODO: verify this is always None. e.g. run with runtime input input
+                v = None
+            elif k.endswith("|__identifier__"):
+                # We've taken care of this while constructing the conditions based on ``input_data`` above
+                continue
+            elif k == "chromInfo" and "?.len" in v:
+                continue
+            value_dump = json.dumps(v, sort_keys=True)
+            wildcard_value = value_dump.replace('"id": "__id_wildcard__"', '"id": %')
+            a = aliased(JobParameter)
+            if value_dump == wildcard_value:
+                value_condition = a.value == value_dump
+            else:
+                value_condition = a.value.like(wildcard_value)
+            conditions.append(exists().where(and_(a.job_id == model.Job.id, a.name == k, value_condition)))
+        return conditions
 
     def _build_job_subquery(
-        self, tool_id: str, user_id: int, tool_version: Optional[str], job_state, wildcard_param_dump
+        self, tool_id: str, user_id: int, tool_version: Optional[str], job_state, parameter_condition
     ):
-        """Build subquery that selects a job with correct job parameters."""
-        stmt = select(model.Job.id).where(
+        """Build subquery that selects reusable jobs of a tool matching ``parameter_condition``."""
+        stmt = select(model.Job.id, model.Job.job_cache_parameters_digest).where(
             and_(
+                parameter_condition,
                 model.Job.tool_id == tool_id,
                 model.Job.user_id == user_id,
                 model.Job.copied_from_job_id.is_(None),  # Always pick original job
@@ -523,35 +588,6 @@ class JobSearch:
             )
         )
 
-        for k, v in wildcard_param_dump.items():
-            if v == {"__class__": "RuntimeValue"}:
-                # TODO: verify this is always None. e.g. run with runtime input input
-                v = None
-            elif k.endswith("|__identifier__"):
-                # We've taken care of this while constructing the conditions based on ``input_data`` above
-                continue
-            elif k == "chromInfo" and "?.len" in v:
-                continue
-            value_dump = json.dumps(v, sort_keys=True)
-            wildcard_value = value_dump.replace('"id": "__id_wildcard__"', '"id": %')
-            a = aliased(JobParameter)
-            if value_dump == wildcard_value:
-                stmt = stmt.join(a).where(
-                    and_(
-                        Job.id == a.job_id,
-                        a.name == k,
-                        a.value == value_dump,
-                    )
-                )
-            else:
-                stmt = stmt.join(a).where(
-                    and_(
-                        Job.id == a.job_id,
-                        a.name == k,
-                        a.value.like(wildcard_value),
-                    )
-                )
-
         return stmt.subquery()
 
     def _build_stmt_for_hda(self, stmt, data_conditions, used_ids, k, v, identifier):
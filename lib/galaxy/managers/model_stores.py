@@ -266,6 +266,7 @@ class ModelStoreManager:
     def import_model_store(self, request: ImportModelStoreTaskRequest):
         import_options = ImportOptions(
             allow_library_creation=request.for_library,
+            file_write_workers=self._app.config.import_file_write_workers,
         )
         if history_id := request.history_id:
             history = self._sa_session.get(model.History, history_id)
@@ -309,6 +310,7 @@ def create_objects_from_store(
     import_options = ImportOptions(
         discarded_data=ImportDiscardedDataType.FORCE,
         allow_library_creation=for_library,
+        file_write_workers=app.config.import_file_write_workers,
     )
     user_context = ModelStoreUserContext(app, galaxy_user) if galaxy_user is not None else None
     model_import_store = source_to_import_store(
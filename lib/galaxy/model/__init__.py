@@ -18,6 +18,7 @@ import random
 import string
 from collections import defaultdict
 from collections.abc import Callable
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import (
     datetime,
@@ -227,6 +228,7 @@ if TYPE_CHECKING:
         BaseObjectStore,
         ObjectStorePopulator,
     )
+    from galaxy.objectstore._util import RangeReader
     from galaxy.schema.invocation import InvocationMessageUnion
 
 log = logging.getLogger(__name__)
@@ -1483,6 +1485,8 @@ class Job(Base, JobLike, UsesCreateAndUpdateTime, Dictifiable, Serializable):
     preferred_object_store_id: Mapped[Optional[str]] = mapped_column(String(255))
     object_store_id_overrides: Mapped[Optional[STR_TO_STR_DICT]] = mapped_column(JSONType)
     tool_request_id: Mapped[Optional[int]] = mapped_column(ForeignKey("tool_request.id"), index=True)
+    job_cache_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+    job_cache_parameters_digest: Mapped[Optional[str]] = mapped_column(String(64))
 
     tool_request: Mapped[Optional["ToolRequest"]] = relationship()
     user: Mapped[Optional["User"]] = relationship()
@@ -3252,12 +3256,14 @@ class History(Base, HasTags, Dictifiable, UsesAnnotations, HasName, Serializable
         self.user = user
         # Objects to eventually add to history
         self._pending_additions = []
+        self._deferred_additions = None
         self._item_by_hid_cache = None
 
     @reconstructor
     def init_on_load(self):
         # Restores properties that are not tracked in the database
         self._pending_additions = []
+        self._deferred_additions = None
 
     def stage_addition(self, items):
         history_id = self.id
@@ -3285,6 +3291,10 @@ class History(Base, HasTags, Dictifiable, UsesAnnotations, HasName, Serializable
         self._update_time = now()
 
     def add_pending_items(self, set_output_hid=True):
+        if set_output_hid and self._deferred_additions is not None:
+            self._deferred_additions.extend(self._pending_additions)
+            self._pending_additions = []
+            return
         # These are assumed to be either copies of existing datasets or new, empty datasets,
         # so we don't need to set the quota.
         self.add_datasets(
@@ -3292,6 +3302,24 @@ class History(Base, HasTags, Dictifiable, UsesAnnotations, HasName, Serializable
         )
         self._pending_additions = []
 
+    @contextmanager
+    def defer_pending_items(self):
+        """Add items added with ``add_pending_items`` in this context to the history at once on exit.
+
+        Items get the same hids as if they had been added one call at a time,
+        but the hid counter is incremented once instead of once per item.
+        """
+        if self._deferred_additions is not None:
+            yield
+            return
+        self._deferred_additions = []
+        try:
+            yield
+        finally:
+            deferred_additions, self._deferred_additions = self._deferred_additions, None
+            if deferred_additions:
+                self.add_datasets(object_session(self), deferred_additions, quota=False, flush=False)
+
     def _next_hid(self, n=1):
         """
         Generate next_hid from the database in a concurrency safe way:
@@ -4234,6 +4262,15 @@ class Dataset(Base, StorableObject, Serializable):
         # Make filename absolute
         return os.path.abspath(filename)
 
+    def open_range(self, start: int = 0, length: Optional[int] = None) -> "RangeReader":
+        """Open `length` bytes of the dataset starting at byte `start` without pulling it into object store caches."""
+        if self.external_filename:
+            from galaxy.objectstore._util import open_file_range
+
+            return open_file_range(os.path.abspath(self.external_filename), start, length)
+        object_store = self._assert_object_store_set()
+        return object_store.open_range(self, start=start, length=length)
+
     @property
     def quota_source_label(self):
         return self.quota_source_info.label
@@ -4735,6 +4772,9 @@ class DatasetInstance(RepresentById, UsesCreateAndUpdateTime, _HasTable):
             return ""
         return self.dataset.get_file_name(sync_cache=sync_cache)
 
+    def open_range(self, start: int = 0, length: Optional[int] = None) -> "RangeReader":
+        return self.dataset.open_range(start=start, length=length)
+
     def set_file_name(self, filename: str):
         return self.dataset.set_file_name(filename)
 
@@ -8710,12 +8750,14 @@ class WorkflowInvocation(Base, UsesCreateAndUpdateTime, Dictifiable, Serializabl
         session = object_session(self)
         priority_states = (WorkflowInvocation.states.CANCELLING, WorkflowInvocation.states.CANCELLED)
         if session and self.id and state not in priority_states:
-            # generate statement that will not revert CANCELLING or CANCELLED back to anything non-terminal
+            # generate statement that will not revert CANCELLING or CANCELLED back to anything non-terminal,
+            # an unchanged state is not written so that update_time only records actual changes
             session.execute(
                 update(WorkflowInvocation)
                 .where(
                     WorkflowInvocation.id == self.id,
                     or_(~WorkflowInvocation.state.in_(priority_states), WorkflowInvocation.state.is_(None)),
+                    WorkflowInvocation.state.is_distinct_from(state),
                 )
                 .values(state=state)
             )
@@ -0,0 +1,170 @@
+"""Canonical fingerprints of job parameters used to find cached jobs.
+
+A job can be reused in place of a new one (``use_cached_job``) if it ran the
+same tool with the same parameters on the requested inputs or copies of them.
+The fingerprint covers the tool id and the tool parameters, with the ids of
+input datasets and collections replaced by a wildcard, so that candidate jobs
+can be found with a single indexed lookup whatever copies of the inputs they
+ran on. The parameters digest covers the exact parameters including input ids,
+once the inputs of a candidate job are known it verifies that the job's
+parameters match without loading them.
+"""
+
+import hashlib
+import json
+import logging
+from typing import (
+    Any,
+    Container,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import (
+    and_,
+    select,
+    update,
+)
+
+from galaxy.model import (
+    Job,
+    JobParameter,
+)
+from galaxy.model.base import transaction
+
+log = logging.getLogger(__name__)
+
+ID_WILDCARD = "__id_wildcard__"
+RUNTIME_VALUE = {"__class__": "RuntimeValue"}
+# Job parameters that are recorded next to the tool parameters.
+IGNORED_PARAMETERS = {"chromInfo", "dbkey"}
+
+
+def is_fingerprinted_parameter(name: str) -> bool:
+    """Guess whether a job parameter is a tool parameter for jobs whose tool inputs are unknown."""
+    return not (name.startswith("__") or name in IGNORED_PARAMETERS or name.endswith("|__identifier__"))
+
+
+def _wildcard_ids(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: ID_WILDCARD if key == "id" else _wildcard_ids(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_wildcard_ids(item) for item in value]
+    return value
+
+
+def _normalize(value: Any) -> Any:
+    return None if value == RUNTIME_VALUE else value
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def job_cache_fingerprint(tool_id: str, parameters: Dict[str, Any]) -> str:
+    """Return the fingerprint of a tool run with JSON-able (not yet dumped) tool ``parameters``."""
+    return _digest([tool_id, {name: _wildcard_ids(_normalize(value)) for name, value in parameters.items()}])
+
+
+def job_cache_parameters_digest(parameters: Dict[str, Any]) -> str:
+    """Return the digest of JSON-able (not yet dumped) tool ``parameters`` including input ids."""
+    return _digest({name: _normalize(value) for name, value in parameters.items()})
+
+
+def _load_parameter(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _tool_parameters(
+    parameters: Iterable[Tuple[str, Optional[str]]], tool_inputs: Optional[Container[str]] = None
+) -> Dict[str, Any]:
+    """Load the tool parameters from persisted (JSON dumped) ``(name, value)`` job parameters.
+
+    Job parameters also include values Galaxy records next to the tool parameters (e.g.
+    ``dbkey``, ``__input_ext`` or input identifiers). If the names of the tool's
+    ``tool_inputs`` are not known these are told apart by ``is_fingerprinted_parameter``.
+    """
+    return {
+        name: _load_parameter(value)
+        for name, value in parameters
+        if (name in tool_inputs if tool_inputs is not None else is_fingerprinted_parameter(name))
+    }
+
+
+def job_cache_fingerprint_for_parameters(
+    tool_id: str, parameters: Iterable[Tuple[str, Optional[str]]], tool_inputs: Optional[Container[str]] = None
+) -> str:
+    """Return the fingerprint of a tool run with persisted (JSON dumped) ``(name, value)`` job parameters."""
+    return job_cache_fingerprint(tool_id, _tool_parameters(parameters, tool_inputs))
+
+
+def _job_cache_columns(
+    tool_id: str, parameters: Iterable[Tuple[str, Optional[str]]], tool_inputs: Optional[Container[str]] = None
+) -> Dict[str, str]:
+    tool_parameters = _tool_parameters(parameters, tool_inputs)
+    return {
+        "job_cache_fingerprint": job_cache_fingerprint(tool_id, tool_parameters),
+        "job_cache_parameters_digest": job_cache_parameters_digest(tool_parameters),
+    }
+
+
+def set_job_cache_fingerprint(job: Job, tool_inputs: Optional[Container[str]] = None) -> None:
+    """Set the fingerprint and parameters digest of a new job from its tool id and parameters.
+
+    ``tool_inputs`` are the names of the tool's top-level inputs, only those parameters are covered.
+    """
+    if job.tool_id is not None:
+        columns = _job_cache_columns(
+            job.tool_id, ((parameter.name, parameter.value) for parameter in job.parameters), tool_inputs
+        )
+        job.job_cache_fingerprint = columns["job_cache_fingerprint"]
+        job.job_cache_parameters_digest = columns["job_cache_parameters_digest"]
+
+
+def backfill_job_cache_fingerprints(session, batch_size: int = 1000) -> int:
+    """Set the fingerprint of jobs that don't have one yet, return the number of jobs updated.
+
+    Only original (not copied) jobs are considered, as only those are reused. The tool
+    inputs of old jobs are not known, jobs of tools with inputs that look like parameters
+    recorded by Galaxy (e.g. a ``dbkey`` select) get a fingerprint that is never matched.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        job_rows = session.execute(
+            select(Job.id, Job.tool_id)
+            .where(
+                and_(
+                    Job.id > last_id,
+                    Job.job_cache_fingerprint.is_(None),
+                    Job.tool_id.is_not(None),
+                    Job.copied_from_job_id.is_(None),
+                )
+            )
+            .order_by(Job.id)
+            .limit(batch_size)
+        ).all()
+        if not job_rows:
+            return updated
+        job_ids = [job_id for job_id, _ in job_rows]
+        parameters: Dict[int, list] = {job_id: [] for job_id in job_ids}
+        for job_id, name, value in session.execute(
+            select(JobParameter.job_id, JobParameter.name, JobParameter.value).where(JobParameter.job_id.in_(job_ids))
+        ):
+            parameters[job_id].append((name, value))
+        with transaction(session):
+            session.execute(
+                update(Job),
+                [{"id": job_id, **_job_cache_columns(tool_id, parameters[job_id])} for job_id, tool_id in job_rows],
+            )
+            session.commit()
+        updated += len(job_rows)
+        last_id = job_ids[-1]
+        log.debug("Set job cache fingerprints of %d jobs", updated)
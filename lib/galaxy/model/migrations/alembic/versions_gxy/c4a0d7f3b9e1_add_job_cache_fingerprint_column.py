@@ -0,0 +1,45 @@
+"""Add job_cache_fingerprint and job_cache_parameters_digest columns to job table
+
+Revision ID: c4a0d7f3b9e1
+Revises: a99a5b52ccb8
+Create Date: 2024-10-21 09:12:44.508131
+
+"""
+
+from sqlalchemy import (
+    Column,
+    String,
+)
+
+from galaxy.model.database_object_names import build_index_name
+from galaxy.model.migrations.util import (
+    add_column,
+    drop_column,
+    drop_index,
+    transaction,
+)
+
+# revision identifiers, used by Alembic.
+revision = "c4a0d7f3b9e1"
+down_revision = "a99a5b52ccb8"
+branch_labels = None
+depends_on = None
+
+# database object names used in this revision
+table_name = "job"
+column_name = "job_cache_fingerprint"
+digest_column_name = "job_cache_parameters_digest"
+index_name = build_index_name(table_name, column_name)
+
+
+def upgrade():
+    with transaction():
+        add_column(table_name, Column(column_name, String(64), index=True))
+        add_column(table_name, Column(digest_column_name, String(64)))
+
+
+def downgrade():
+    with transaction():
+        drop_column(table_name, digest_column_name)
+        drop_index(index_name, table_name)
+        drop_column(table_name, column_name)
@@ -7,8 +7,10 @@ import shutil
 import tarfile
 import tempfile
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
 from json import (
     dump,
     dumps,
@@ -74,8 +76,9 @@ from galaxy.model.orm.util import (
 from galaxy.model.tags import GalaxyTagHandler
 from galaxy.objectstore import (
     BaseObjectStore,
+    ObjectRef,
     ObjectStore,
-    persist_extra_files,
+    persist_extra_files_for_dataset,
 )
 from galaxy.schema.bco import (
     BioComputeObjectCore,
@@ -106,6 +109,7 @@ from galaxy.schema.schema import (
 )
 from galaxy.security.idencoding import IdEncodingHelper
 from galaxy.util import (
+    ExecutionTimer,
     FILENAME_VALID_CHARS,
     in_directory,
     safe_makedirs,
@@ -197,6 +201,8 @@ class DatasetAttributeImportModel(BaseModel):
 
 
 DEFAULT_DISCARDED_DATA_TYPE = ImportDiscardedDataType.FORBID
+# Log the progress of importing dataset files every so many datasets.
+IMPORT_FILES_PROGRESS_INTERVAL = 1000
 
 
 class ImportOptions:
@@ -204,6 +210,7 @@ class ImportOptions:
     allow_library_creation: bool
     allow_dataset_object_edit: bool
     discarded_data: ImportDiscardedDataType
+    file_write_workers: int
 
     def __init__(
         self,
@@ -211,6 +218,7 @@ class ImportOptions:
         allow_library_creation: bool = False,
         allow_dataset_object_edit: Optional[bool] = None,
         discarded_data: ImportDiscardedDataType = DEFAULT_DISCARDED_DATA_TYPE,
+        file_write_workers: int = 1,
     ) -> None:
         self.allow_edit = allow_edit
         self.allow_library_creation = allow_library_creation
@@ -219,6 +227,8 @@ class ImportOptions:
         else:
             self.allow_dataset_object_edit = allow_dataset_object_edit
         self.discarded_data = discarded_data
+        # number of threads writing imported dataset files to the object store
+        self.file_write_workers = file_write_workers
 
 
 class SessionlessContext:
@@ -407,18 +417,24 @@ class ModelImportStore(metaclass=abc.ABCMeta):
         datasets_attrs = self.datasets_properties()
         collections_attrs = self.collections_properties()
 
+        timer = ExecutionTimer()
         self._import_datasets(object_import_tracker, datasets_attrs, history, new_history, job)
         self._import_dataset_copied_associations(object_import_tracker, datasets_attrs)
+        log.debug("Imported %d datasets %s", len(datasets_attrs), timer)
+        timer = ExecutionTimer()
         self._import_libraries(object_import_tracker)
         self._import_collection_instances(object_import_tracker, collections_attrs, history, new_history)
         self._import_collection_implicit_input_associations(object_import_tracker, collections_attrs)
         self._import_collection_copied_associations(object_import_tracker, collections_attrs)
         self._import_implicit_dataset_conversions(object_import_tracker)
         self._reassign_hids(object_import_tracker, history)
+        log.debug("Imported libraries and %d collections %s", len(collections_attrs), timer)
+        timer = ExecutionTimer()
         self._import_jobs(object_import_tracker, history)
         self._import_implicit_collection_jobs(object_import_tracker)
         self._import_workflow_invocations(object_import_tracker, history)
         self._flush()
+        log.debug("Imported jobs and workflow invocations %s", timer)
         return object_import_tracker
 
     def _attach_dataset_hashes(
@@ -489,6 +505,10 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                 if job:
                     dataset_instance.dataset.job_id = job.id
 
+        # Files are written to the object store once all datasets are created, metadata is set afterwards.
+        pending_files: List[Tuple[model.DatasetInstance, str, Optional[str]]] = []
+        imported_dataset_instances: List[model.DatasetInstance] = []
+
         for dataset_attrs in datasets_attrs:
             if "state" not in dataset_attrs:
                 self.dataset_state_serialized = False
@@ -659,19 +679,12 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                         if not self.object_store:
                             raise Exception(f"self.object_store is missing from {self}.")
                         if not dataset_instance.dataset.purged:
-                            self.object_store.update_from_file(
-                                dataset_instance.dataset, file_name=temp_dataset_file_name, create=True
-                            )
-
                             # Import additional files if present. Histories exported previously might not have this attribute set.
                             dataset_extra_files_path = dataset_attrs.get("extra_files_path", None)
                             if dataset_extra_files_path:
                                 assert file_source_root
                                 dataset_extra_files_path = os.path.join(file_source_root, dataset_extra_files_path)
-                                persist_extra_files(self.object_store, dataset_extra_files_path, dataset_instance)
-                            # Only trust file size if the dataset is purged. If we keep the data we should check the file size.
-                            dataset_instance.dataset.file_size = None
-                            dataset_instance.dataset.set_total_size()  # update the filesize record in the database
+                            pending_files.append((dataset_instance, temp_dataset_file_name, dataset_extra_files_path))
 
                     if dataset_instance.deleted:
                         dataset_instance.dataset.deleted = True
@@ -690,38 +703,7 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                             user=self.user, item=dataset_instance, new_tags_list=tag_list, flush=False
                         )
 
-                if self.app:
-                    # If dataset instance is discarded or deferred, don't attempt to regenerate
-                    # metadata for it.
-                    if dataset_instance.state == dataset_instance.states.OK:
-                        regenerate_kwds: Dict[str, Any] = {}
-                        if job:
-                            regenerate_kwds["user"] = job.user
-                            regenerate_kwds["session_id"] = job.session_id
-                        elif history:
-                            user = history.user
-                            regenerate_kwds["user"] = user
-                            if user is None:
-                                regenerate_kwds["session_id"] = history.galaxy_sessions[0].galaxy_session.id
-                            else:
-                                regenerate_kwds["session_id"] = None
-                        else:
-                            # Need a user to run library jobs to generate metadata...
-                            pass
-                        if not self.import_options.allow_edit:
-                            # external import, metadata files need to be regenerated (as opposed to extended metadata dataset import)
-                            if self.app.datatypes_registry.set_external_metadata_tool:
-                                self.app.datatypes_registry.set_external_metadata_tool.regenerate_imported_metadata_if_needed(
-                                    dataset_instance, history, **regenerate_kwds
-                                )
-                            else:
-                                # Try to set metadata directly. @mvdbeek thinks we should only record the datasets
-                                try:
-                                    if dataset_instance.has_metadata_files:
-                                        dataset_instance.datatype.set_meta(dataset_instance)  # type:ignore[arg-type]
-                                except Exception:
-                                    log.debug(f"Metadata setting failed on {dataset_instance}", exc_info=True)
-                                    dataset_instance.state = dataset_instance.dataset.states.FAILED_METADATA
+                imported_dataset_instances.append(dataset_instance)
 
                 if model_class == "HistoryDatasetAssociation":
                     if not isinstance(dataset_instance, model.HistoryDatasetAssociation):
@@ -746,6 +728,90 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                         assert "id" in dataset_attrs
                         object_import_tracker.lddas_by_key[dataset_attrs["id"]] = dataset_instance
 
+        if pending_files:
+            self._import_dataset_files(pending_files)
+
+        if self.app:
+            for dataset_instance in imported_dataset_instances:
+                # If dataset instance is discarded or deferred, don't attempt to regenerate
+                # metadata for it.
+                if dataset_instance.state == dataset_instance.states.OK:
+                    regenerate_kwds: Dict[str, Any] = {}
+                    if job:
+                        regenerate_kwds["user"] = job.user
+                        regenerate_kwds["session_id"] = job.session_id
+                    elif history:
+                        user = history.user
+                        regenerate_kwds["user"] = user
+                        if user is None:
+                            regenerate_kwds["session_id"] = history.galaxy_sessions[0].galaxy_session.id
+                        else:
+                            regenerate_kwds["session_id"] = None
+                    else:
+                        # Need a user to run library jobs to generate metadata...
+                        pass
+                    if not self.import_options.allow_edit:
+                        # external import, metadata files need to be regenerated (as opposed to extended metadata dataset import)
+                        if self.app.datatypes_registry.set_external_metadata_tool:
+                            self.app.datatypes_registry.set_external_metadata_tool.regenerate_imported_metadata_if_needed(
+                                dataset_instance, history, **regenerate_kwds
+                            )
+                        else:
+                            # Try to set metadata directly. @mvdbeek thinks we should only record the datasets
+                            try:
+                                if dataset_instance.has_metadata_files:
+                                    dataset_instance.datatype.set_meta(dataset_instance)  # type:ignore[arg-type]
+                            except Exception:
+                                log.debug(f"Metadata setting failed on {dataset_instance}", exc_info=True)
+                                dataset_instance.state = dataset_instance.dataset.states.FAILED_METADATA
+
+    def _import_dataset_files(self, pending_files: List[Tuple[model.DatasetInstance, str, Optional[str]]]) -> None:
+        """Write the files of imported datasets (and their extra files) to the object store.
+
+        With more than one ``file_write_workers`` the files are written in parallel.
+        """
+        object_store = self.object_store
+        if not object_store:
+            raise Exception(f"self.object_store is missing from {self}.")
+        # Assign ids to new datasets, object store paths may be based on them.
+        self._flush()
+        # Load everything needed to write the files in this thread, worker threads must not use the session.
+        to_write = []
+        for dataset_instance, file_name, extra_files_path in pending_files:
+            dataset = dataset_instance.dataset
+            # Creating the dataset picks its backend, extra files are named after that backend's store_by.
+            object_store.create(dataset)
+            extra_files_path_name = None
+            if extra_files_path and os.path.exists(extra_files_path):
+                extra_files_path_name = dataset.extra_files_path_name_from(object_store)
+                assert extra_files_path_name
+            to_write.append((ObjectRef(dataset), file_name, extra_files_path, extra_files_path_name))
+
+        def write_files(dataset_files: Tuple[ObjectRef, str, Optional[str], Optional[str]]) -> None:
+            ref, file_name, extra_files_path, extra_files_path_name = dataset_files
+            object_store.update_from_file(ref, file_name=file_name)
+            if extra_files_path and extra_files_path_name:
+                persist_extra_files_for_dataset(object_store, extra_files_path, ref, extra_files_path_name)
+
+        timer = ExecutionTimer()
+        workers = self.import_options.file_write_workers
+        with contextlib.ExitStack() as stack:
+            if workers > 1:
+                executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import_files")
+                )
+                written: Iterable[None] = executor.map(write_files, to_write)
+            else:
+                written = map(write_files, to_write)
+            for i, _ in enumerate(written, start=1):
+                if i % IMPORT_FILES_PROGRESS_INTERVAL == 0:
+                    log.debug("Imported files of %d of %d datasets %s", i, len(pending_files), timer)
+        for dataset_instance, _, _ in pending_files:
+            # Only trust file size if the dataset is purged. If we keep the data we should check the file size.
+            dataset_instance.dataset.file_size = None
+            dataset_instance.dataset.set_total_size()  # update the filesize record in the database
+        log.debug("Imported files of %d datasets %s", len(pending_files), timer)
+
     def _import_libraries(self, object_import_tracker: "ObjectImportTracker") -> None:
         object_key = self.object_key
 
@@ -1886,6 +1952,7 @@ class DirectoryModelExportStore(ModelExportStore):
         strip_metadata_files: bool = True,
         serialize_jobs: bool = True,
         user_context=None,
+        file_read_workers: int = 1,
     ) -> None:
         """
         :param export_directory: path to export directory. Will be created if it does not exist.
@@ -1895,6 +1962,7 @@ class DirectoryModelExportStore(ModelExportStore):
         :param export_files: How files should be exported, can be 'symlink', 'copy' or None, in which case files
                              will not be serialized.
         :param serialize_jobs: Include job data in model export. Not needed for set_metadata script.
+        :param file_read_workers: Number of threads fetching the files of exported datasets from their object stores.
         """
         if not os.path.exists(export_directory):
             os.makedirs(export_directory)
@@ -1924,6 +1992,7 @@ class DirectoryModelExportStore(ModelExportStore):
             serialize_files_handler=self,
         )
         self.export_files = export_files
+        self.file_read_workers = file_read_workers
         self.included_datasets: Dict[model.DatasetInstance, Tuple[model.DatasetInstance, bool]] = {}
         self.dataset_implicit_conversions: Dict[model.DatasetInstance, model.ImplicitlyConvertedDatasetAssociation] = {}
         self.included_collections: List[Union[model.DatasetCollection, model.HistoryDatasetCollectionAssociation]] = []
@@ -1944,22 +2013,9 @@ class DirectoryModelExportStore(ModelExportStore):
         if self.export_files is None:
             return None
 
-        add: Callable[[str, str], None]
-        if self.export_files == "symlink":
-            add = os.symlink
-        elif self.export_files == "copy":
-
-            def add(src, dest):
-                if os.path.isdir(src):
-                    shutil.copytree(src, dest)
-                else:
-                    shutil.copyfile(src, dest)
-
-        else:
+        if self.export_files not in ("symlink", "copy"):
             raise Exception(f"Unknown export_files parameter type encountered {self.export_files}")
 
-        export_directory = self.export_directory
-
         _, include_files = self.included_datasets[dataset]
         if not include_files:
             return
@@ -1978,7 +2034,6 @@ class DirectoryModelExportStore(ModelExportStore):
             pass
 
         dir_name = "datasets"
-        dir_path = os.path.join(export_directory, dir_name)
 
         if dataset.dataset.id in self.dataset_id_to_path:
             file_name, extra_files_path = self.dataset_id_to_path[dataset.dataset.id]
@@ -1989,9 +2044,6 @@ class DirectoryModelExportStore(ModelExportStore):
             return
 
         if file_name:
-            if not os.path.exists(dir_path):
-                os.makedirs(dir_path)
-
             conversion = self.dataset_implicit_conversions.get(dataset)
             conversion_key = (
                 self.serialization_options.get_identifier(self.security, conversion) if conversion else None
@@ -2000,9 +2052,7 @@ class DirectoryModelExportStore(ModelExportStore):
                 as_dict["name"], as_dict["extension"], as_dict["encoded_id"], conversion_key=conversion_key
             )
             arcname = os.path.join(dir_name, target_filename)
-            src = file_name
-            dest = os.path.join(export_directory, arcname)
-            add(src, dest)
+            self._export_file(file_name, arcname)
             as_dict["file_name"] = arcname
 
         if extra_files_path:
@@ -2016,13 +2066,46 @@ class DirectoryModelExportStore(ModelExportStore):
                     as_dict["encoded_id"], conversion_key=conversion_key
                 )
                 arcname = os.path.join(dir_name, extra_files_target_filename)
-                add(extra_files_path, os.path.join(export_directory, arcname))
+                self._export_file(extra_files_path, arcname)
                 as_dict["extra_files_path"] = arcname
             else:
                 as_dict["extra_files_path"] = ""
 
         self.dataset_id_to_path[dataset.dataset.id] = (as_dict.get("file_name"), as_dict.get("extra_files_path"))
 
+    def _export_file(self, src: str, arcname: str) -> None:
+        """Export the file or directory ``src`` as ``arcname`` relative to the export directory."""
+        dest = os.path.join(self.export_directory, arcname)
+        safe_makedirs(os.path.dirname(dest))
+        if self.export_files == "symlink":
+            os.symlink(src, dest)
+        elif os.path.isdir(src):
+            shutil.copytree(src, dest)
+        else:
+            shutil.copyfile(src, dest)
+
+    def _fetch_files(self) -> None:
+        """Fetch the files of the datasets exported with their files from their object stores in parallel.
+
+        Serializing the datasets afterwards finds the files in place (e.g. in
+        the object store cache) instead of fetching them one after the other.
+        """
+        object_store = model.Dataset.object_store
+        if object_store is None:
+            return
+        # Load datasets in this thread, worker threads only get plain object identifiers.
+        to_fetch: Dict[int, ObjectRef] = {}
+        for dataset_instance, include_files in self.included_datasets.values():
+            if not include_files:
+                continue
+            dataset = dataset_instance.dataset
+            if dataset.purged or dataset.external_filename or dataset.id in self.dataset_id_to_path:
+                continue
+            to_fetch[dataset.id] = ObjectRef(dataset)
+        with ThreadPoolExecutor(max_workers=self.file_read_workers, thread_name_prefix="export_files") as executor:
+            for _ in executor.map(partial(_fetch_file, object_store), to_fetch.values()):
+                pass
+
     def exported_key(
         self,
         obj: model.RepresentById,
@@ -2342,31 +2425,28 @@ class DirectoryModelExportStore(ModelExportStore):
             else:
                 provenance_attrs.append(dataset)
 
-        def to_json(attributes):
-            return json_encoder.encode([a.serialize(self.security, self.serialization_options) for a in attributes])
-
-        datasets_attrs_filename = os.path.join(export_directory, ATTRS_FILENAME_DATASETS)
-        with open(datasets_attrs_filename, "w") as datasets_attrs_out:
-            datasets_attrs_out.write(to_json(datasets_attrs))
-
-        with open(f"{datasets_attrs_filename}.provenance", "w") as provenance_attrs_out:
-            provenance_attrs_out.write(to_json(provenance_attrs))
-
-        libraries_attrs_filename = os.path.join(export_directory, ATTRS_FILENAME_LIBRARIES)
-        with open(libraries_attrs_filename, "w") as libraries_attrs_out:
-            libraries_attrs_out.write(to_json(self.included_libraries))
+        if self.export_files and self.file_read_workers > 1:
+            self._fetch_files()
 
-        library_folders_attrs_filename = os.path.join(export_directory, ATTRS_FILENAME_LIBRARY_FOLDERS)
-        with open(library_folders_attrs_filename, "w") as library_folder_attrs_out:
-            library_folder_attrs_out.write(to_json(self.included_library_folders))
+        def write_json(filename, attributes):
+            # Written one object at a time, serialized attributes of large exports aren't kept in memory.
+            with open(filename, "w") as attrs_out:
+                attrs_out.write("[")
+                for i, attribute in enumerate(attributes):
+                    if i:
+                        attrs_out.write(", ")
+                    attrs_out.write(json_encoder.encode(attribute.serialize(self.security, self.serialization_options)))
+                attrs_out.write("]")
 
-        collections_attrs_filename = os.path.join(export_directory, ATTRS_FILENAME_COLLECTIONS)
-        with open(collections_attrs_filename, "w") as collections_attrs_out:
-            collections_attrs_out.write(to_json(self.collections_attrs))
-
-        conversions_attrs_filename = os.path.join(export_directory, ATTRS_FILENAME_CONVERSIONS)
-        with open(conversions_attrs_filename, "w") as conversions_attrs_out:
-            conversions_attrs_out.write(to_json(self.dataset_implicit_conversions.values()))
+        datasets_attrs_filename = os.path.join(export_directory, ATTRS_FILENAME_DATASETS)
+        write_json(datasets_attrs_filename, datasets_attrs)
+        write_json(f"{datasets_attrs_filename}.provenance", provenance_attrs)
+        write_json(os.path.join(export_directory, ATTRS_FILENAME_LIBRARIES), self.included_libraries)
+        write_json(os.path.join(export_directory, ATTRS_FILENAME_LIBRARY_FOLDERS), self.included_library_folders)
+        write_json(os.path.join(export_directory, ATTRS_FILENAME_COLLECTIONS), self.collections_attrs)
+        write_json(
+            os.path.join(export_directory, ATTRS_FILENAME_CONVERSIONS), self.dataset_implicit_conversions.values()
+        )
 
         jobs_attrs = []
         for job_id, job_output_dataset_associations in self.job_output_dataset_associations.items():
@@ -2868,11 +2948,19 @@ class ROCrateArchiveModelExportStore(DirectoryModelExportStore, WriteCrates):
 
 
 class TarModelExportStore(DirectoryModelExportStore):
+    """Export to a tar archive.
+
+    Dataset files are not staged in the export directory, they are written to
+    the archive straight from their (object store) paths.
+    """
+
     file_source_uri: Optional[StrPath]
     out_file: StrPath
 
     def __init__(self, uri: StrPath, gzip: bool = True, **kwds) -> None:
         self.gzip = gzip
+        # archive name -> path of dataset files and extra files directories
+        self.dataset_files: Dict[str, str] = {}
         temp_output_dir = tempfile.mkdtemp()
         self.temp_output_dir = temp_output_dir
         if "://" in str(uri):
@@ -2885,9 +2973,12 @@ class TarModelExportStore(DirectoryModelExportStore):
             export_directory = temp_output_dir
         super().__init__(export_directory, **kwds)
 
+    def _export_file(self, src: str, arcname: str) -> None:
+        self.dataset_files[arcname] = src
+
     def _finalize(self) -> None:
         super()._finalize()
-        tar_export_directory(self.export_directory, self.out_file, self.gzip)
+        tar_export_directory(self.export_directory, self.out_file, self.gzip, files=self.dataset_files)
         if self.file_source_uri:
             if not self.file_sources:
                 raise Exception(f"Need self.file_sources but {type(self)} is missing it: {self.file_sources}.")
@@ -2959,6 +3050,7 @@ def get_export_store_factory(
         "export_files": export_files,
         "serialize_dataset_objects": False,
         "user_context": user_context,
+        "file_read_workers": app.config.export_file_read_workers,
     }
     if download_format in ["tar.gz", "tgz"]:
         export_store_class = TarModelExportStore
@@ -2982,7 +3074,10 @@ def get_export_store_factory(
     return lambda path: export_store_class(path, **export_store_class_kwds)
 
 
-def tar_export_directory(export_directory: StrPath, out_file: StrPath, gzip: bool) -> None:
+def tar_export_directory(
+    export_directory: StrPath, out_file: StrPath, gzip: bool, files: Optional[Dict[str, str]] = None
+) -> None:
+    """Archive the contents of ``export_directory`` and ``files`` (archive name -> path) into ``out_file``."""
     tarfile_mode = "w"
     if gzip:
         tarfile_mode += ":gz"
@@ -2990,6 +3085,15 @@ def tar_export_directory(export_directory: StrPath, out_file: StrPath, gzip: boo
     with tarfile.open(out_file, tarfile_mode, dereference=True) as store_archive:
         for export_path in os.listdir(export_directory):
             store_archive.add(os.path.join(export_directory, export_path), arcname=export_path)
+        for arcname, path in (files or {}).items():
+            store_archive.add(path, arcname=arcname)
+
+
+def _fetch_file(object_store: ObjectStore, dataset: ObjectRef) -> None:
+    try:
+        object_store.get_filename(dataset)
+    except ObjectNotFound:
+        pass
 
 
 def get_export_dataset_filename(name: str, ext: str, encoded_id: str, conversion_key: Optional[str]) -> str:
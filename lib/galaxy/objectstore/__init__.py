@@ -14,14 +14,17 @@ import threading
 import time
 from typing import (
     Any,
+    Callable,
     Dict,
     List,
     NamedTuple,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Type,
     TYPE_CHECKING,
+    Union,
 )
 from uuid import uuid4
 
@@ -53,6 +56,11 @@ from galaxy.util.path import (
     safe_walk,
 )
 from galaxy.util.sleeper import Sleeper
+from ._util import (
+    map_concurrently,
+    open_file_range,
+    RangeReader,
+)
 from .badges import (
     BadgeDict,
     read_badges,
@@ -60,6 +68,12 @@ from .badges import (
     StoredBadgeDict,
 )
 from .caching import CacheTarget
+from .placement import (
+    DEFAULT_PLACEMENT_LOCALITY,
+    DEFAULT_PLACEMENT_STRATEGY,
+    DEFAULT_USAGE_REFRESH_INTERVAL,
+    PlacementEngine,
+)
 from .templates import ObjectStoreConfiguration
 
 if TYPE_CHECKING:
@@ -260,6 +274,36 @@ class ObjectStore(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def open_range(
+        self,
+        obj,
+        start: int = 0,
+        length: Optional[int] = None,
+        base_dir=None,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+    ) -> RangeReader:
+        """
+        Open `length` bytes of the object identified by `obj` starting at byte `start` for binary reading.
+
+        Unlike `get_data` this does not decode the data and, where the store
+        supports it, streams the range from remote storage without first
+        pulling the whole object into the cache. The caller must close the
+        returned stream.
+
+        If the object does not exist raises `ObjectNotFound`.
+
+        :type start: int
+        :param start: Offset of the first byte to read
+
+        :type length: int
+        :param length: Read at most `length` bytes, read to the end of the object if `None`
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def get_filename(
         self,
@@ -279,6 +323,46 @@ class ObjectStore(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def exists_many(
+        self,
+        objs: Sequence[Any],
+        base_dir=None,
+        dir_only=False,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+    ) -> List[bool]:
+        """Return whether each object in `objs` exists, in the order of `objs`.
+
+        Stores batch and parallelize the lookups where they can, this should be
+        preferred over calling `exists` for many objects.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def size_many(
+        self, objs: Sequence[Any], extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False
+    ) -> List[int]:
+        """Return the size of each object in `objs` (0 if it does not exist), in the order of `objs`."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_filename_many(
+        self,
+        objs: Sequence[Any],
+        base_dir=None,
+        dir_only=False,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+        sync_cache: bool = True,
+    ) -> List[Optional[str]]:
+        """Return the filename of each object in `objs` (`None` if it does not exist), in the order of `objs`."""
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def update_from_file(
         self,
@@ -291,6 +375,7 @@ class ObjectStore(metaclass=abc.ABCMeta):
         file_name=None,
         create: bool = False,
         preserve_symlinks: bool = False,
+        defer_push: bool = False,
     ) -> None:
         """
         Inform the store that the file associated with `obj.id` has been updated.
@@ -306,6 +391,27 @@ class ObjectStore(metaclass=abc.ABCMeta):
         :type create: boolean
         :param create: If True and the default dataset does not exist, create
             it first.
+
+        :type defer_push: boolean
+        :param defer_push: If True and the store `defers_push` the object, only
+            update the store's cache. The caller must then `push` the object.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def defers_push(self, obj) -> bool:
+        """Return True if the store can push updates of `obj` to remote storage after `update_from_file`."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def push(
+        self, obj, base_dir=None, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False
+    ) -> bool:
+        """
+        Push an update of `obj` deferred by `update_from_file` to remote storage.
+
+        Return True if nothing remains to be pushed, False if the push failed
+        and should be retried.
         """
         raise NotImplementedError()
 
@@ -405,9 +511,30 @@ class ObjectStore(metaclass=abc.ABCMeta):
         """Return DeviceSourceMap describing mapping of object store IDs to device sources."""
 
 
+class ObjectRef:
+    """Plain copy of the identifiers object stores use to locate a model object.
+
+    Model objects must not be loaded or refreshed outside of the thread owning
+    their database session, work handed to other threads uses these instead.
+    """
+
+    def __init__(self, obj):
+        self.id = obj.id
+        uuid = getattr(obj, "uuid", None)
+        if uuid is not None:
+            self.uuid = uuid
+        self.object_store_id = getattr(obj, "object_store_id", None)
+        self._repr = f"{obj.__class__.__name__}(id={self.id})"
+
+    def __repr__(self) -> str:
+        return self._repr
+
+
 class BaseObjectStore(ObjectStore):
     store_by: str
     store_type: str
+    # number of objects the *_many methods look up concurrently
+    batch_concurrency: int = 1
 
     def __init__(self, config, config_dict=None, **kwargs):
         """
@@ -614,6 +741,33 @@ class BaseObjectStore(ObjectStore):
             obj_dir=obj_dir,
         )
 
+    def open_range(
+        self,
+        obj,
+        start: int = 0,
+        length: Optional[int] = None,
+        base_dir=None,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+    ) -> RangeReader:
+        return self._invoke(
+            "open_range",
+            obj,
+            start=start,
+            length=length,
+            base_dir=base_dir,
+            extra_dir=extra_dir,
+            extra_dir_at_root=extra_dir_at_root,
+            alt_name=alt_name,
+            obj_dir=obj_dir,
+        )
+
+    def _open_range(self, obj, start: int = 0, length: Optional[int] = None, **kwargs) -> RangeReader:
+        """Open the range from the file returned by `get_filename`, stores able to do better override this."""
+        return open_file_range(self.get_filename(obj, **kwargs), start, length)
+
     def get_filename(
         self,
         obj,
@@ -637,6 +791,81 @@ class BaseObjectStore(ObjectStore):
             sync_cache=sync_cache,
         )
 
+    def exists_many(
+        self,
+        objs: Sequence[Any],
+        base_dir=None,
+        dir_only=False,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+    ) -> List[bool]:
+        return self._exists_many(
+            objs,
+            base_dir=base_dir,
+            dir_only=dir_only,
+            extra_dir=extra_dir,
+            extra_dir_at_root=extra_dir_at_root,
+            alt_name=alt_name,
+            obj_dir=obj_dir,
+        )
+
+    def size_many(
+        self, objs: Sequence[Any], extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False
+    ) -> List[int]:
+        return self._size_many(
+            objs, extra_dir=extra_dir, extra_dir_at_root=extra_dir_at_root, alt_name=alt_name, obj_dir=obj_dir
+        )
+
+    def get_filename_many(
+        self,
+        objs: Sequence[Any],
+        base_dir=None,
+        dir_only=False,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+        sync_cache: bool = True,
+    ) -> List[Optional[str]]:
+        return self._get_filename_many(
+            objs,
+            base_dir=base_dir,
+            dir_only=dir_only,
+            extra_dir=extra_dir,
+            extra_dir_at_root=extra_dir_at_root,
+            alt_name=alt_name,
+            obj_dir=obj_dir,
+            sync_cache=sync_cache,
+        )
+
+    def _exists_many(self, objs: Sequence[Any], **kwargs) -> List[bool]:
+        return self._map_objects(lambda obj: self._invoke("exists", obj, **kwargs), objs)
+
+    def _size_many(self, objs: Sequence[Any], **kwargs) -> List[int]:
+        return self._map_objects(lambda obj: self._invoke("size", obj, **kwargs), objs)
+
+    def _get_filename_many(self, objs: Sequence[Any], **kwargs) -> List[Optional[str]]:
+        def get_filename(obj) -> Optional[str]:
+            try:
+                return self._invoke("get_filename", obj, **kwargs)
+            except ObjectNotFound:
+                return None
+
+        return self._map_objects(get_filename, objs)
+
+    def _map_objects(self, function: Callable[[Any], Any], objs: Sequence[Any]) -> List[Any]:
+        """Apply `function` to `objs`, concurrently for stores with slow per-object lookups.
+
+        Concurrent lookups get plain copies of the object identifiers, model
+        objects must not be loaded outside of the thread owning their session.
+        """
+        if self.batch_concurrency <= 1:
+            return [function(obj) for obj in objs]
+        refs = [ObjectRef(obj) for obj in objs]
+        return map_concurrently(function, refs, self.batch_concurrency)
+
     def update_from_file(
         self,
         obj,
@@ -648,6 +877,7 @@ class BaseObjectStore(ObjectStore):
         file_name=None,
         create: bool = False,
         preserve_symlinks: bool = False,
+        defer_push: bool = False,
     ) -> None:
         return self._invoke(
             "update_from_file",
@@ -660,8 +890,32 @@ class BaseObjectStore(ObjectStore):
             file_name=file_name,
             create=create,
             preserve_symlinks=preserve_symlinks,
+            defer_push=defer_push,
+        )
+
+    def defers_push(self, obj) -> bool:
+        return self._invoke("defers_push", obj)
+
+    def _defers_push(self, obj) -> bool:
+        """Stores without a cache write updates through, stores able to defer pushes override this."""
+        return False
+
+    def push(
+        self, obj, base_dir=None, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False
+    ) -> bool:
+        return self._invoke(
+            "push",
+            obj,
+            base_dir=base_dir,
+            extra_dir=extra_dir,
+            extra_dir_at_root=extra_dir_at_root,
+            alt_name=alt_name,
+            obj_dir=obj_dir,
         )
 
+    def _push(self, obj, **kwargs) -> bool:
+        return True
+
     def get_object_url(self, obj, extra_dir=None, extra_dir_at_root=False, alt_name=None, obj_dir: bool = False):
         return self._invoke(
             "get_object_url",
@@ -1118,9 +1372,15 @@ class DiskObjectStore(ConcreteObjectStore):
         return path
 
     def _update_from_file(
-        self, obj, file_name=None, create: bool = False, preserve_symlinks: bool = False, **kwargs
+        self,
+        obj,
+        file_name=None,
+        create: bool = False,
+        preserve_symlinks: bool = False,
+        defer_push: bool = False,
+        **kwargs,
     ) -> None:
-        """`create` parameter is not used in this implementation."""
+        """`create` and `defer_push` parameters are not used in this implementation."""
         # FIXME: symlinks and the object store model may not play well together
         # these should be handled better, e.g. registering the symlink'd file
         # as an object
@@ -1156,6 +1416,10 @@ class DiskObjectStore(ConcreteObjectStore):
         return (float(st.f_blocks - st.f_bavail) / st.f_blocks) * 100
 
 
+# keyword arguments of `exists`, used to probe backends for objects of other lookups
+EXISTS_KWARGS = ("base_dir", "dir_only", "extra_dir", "extra_dir_at_root", "alt_name", "obj_dir")
+
+
 class NestedObjectStore(BaseObjectStore):
     """
     Base for ObjectStores that use other ObjectStores.
@@ -1208,6 +1472,10 @@ class NestedObjectStore(BaseObjectStore):
         """For the first backend that has this `obj`, get data from it."""
         return self._call_method("_get_data", obj, ObjectNotFound, True, **kwargs)
 
+    def _open_range(self, obj, start: int = 0, length: Optional[int] = None, **kwargs) -> RangeReader:
+        """For the first backend that has this `obj`, open a range of its data."""
+        return self._call_method("_open_range", obj, ObjectNotFound, True, start=start, length=length, **kwargs)
+
     def _get_filename(self, obj, **kwargs) -> str:
         """For the first backend that has this `obj`, get its filename."""
         return self._call_method("_get_filename", obj, ObjectNotFound, True, **kwargs)
@@ -1223,6 +1491,7 @@ class NestedObjectStore(BaseObjectStore):
         file_name=None,
         create: bool = False,
         preserve_symlinks: bool = False,
+        defer_push: bool = False,
     ) -> None:
         """For the first backend that has this `obj`, update it from the given file."""
         if create:
@@ -1247,8 +1516,16 @@ class NestedObjectStore(BaseObjectStore):
             file_name=file_name,
             create=False,
             preserve_symlinks=preserve_symlinks,
+            defer_push=defer_push,
         )
 
+    def _defers_push(self, obj) -> bool:
+        return self._call_method("_defers_push", obj, False, False)
+
+    def _push(self, obj, **kwargs) -> bool:
+        """For the first backend that has this `obj`, push its deferred update."""
+        return self._call_method("_push", obj, ObjectNotFound, True, **kwargs)
+
     def _get_object_url(self, obj, **kwargs):
         """For the first backend that has this `obj`, get its URL."""
         return self._call_method("_get_object_url", obj, None, False, **kwargs)
@@ -1276,6 +1553,54 @@ class NestedObjectStore(BaseObjectStore):
         except AttributeError:
             return str(obj)
 
+    def _exists_many(self, objs: Sequence[Any], **kwargs) -> List[bool]:
+        return self._call_method_many("exists_many", objs, False, **kwargs)
+
+    def _size_many(self, objs: Sequence[Any], **kwargs) -> List[int]:
+        return self._call_method_many("size_many", objs, 0, **kwargs)
+
+    def _get_filename_many(self, objs: Sequence[Any], **kwargs) -> List[Optional[str]]:
+        return self._call_method_many("get_filename_many", objs, None, **kwargs)
+
+    def _call_method_many(self, method: str, objs: Sequence[Any], default, **kwargs) -> List[Any]:
+        """Group `objs` by the backend holding them and call the batch `method` of each backend once.
+
+        `default` is returned for objects not found in any backend.
+        """
+        groups: Dict[Any, List[int]] = {}
+        for index, backend_id in enumerate(self._backend_ids_for(objs, **kwargs)):
+            if backend_id is not None:
+                groups.setdefault(backend_id, []).append(index)
+
+        results = [default] * len(objs)
+        for backend_id, indices in groups.items():
+            values = getattr(self._resolve_backend(backend_id), method)([objs[index] for index in indices], **kwargs)
+            for index, value in zip(indices, values):
+                results[index] = value
+        return results
+
+    def _backend_ids_for(self, objs: Sequence[Any], **kwargs) -> List[Any]:
+        """Return the id of the first backend each of `objs` exists in, or `None`.
+
+        Backends are queried in order with a single batch lookup each, for the
+        objects not found in a previous backend.
+        """
+        exists_kwargs = {key: value for key, value in kwargs.items() if key in EXISTS_KWARGS}
+        backend_ids: List[Any] = [None] * len(objs)
+        missing = list(range(len(objs)))
+        for backend_id, backend in self.backends.items():
+            if not missing:
+                break
+            found = backend.exists_many([objs[index] for index in missing], **exists_kwargs)
+            for index, exists in zip(missing, found):
+                if exists:
+                    backend_ids[index] = backend_id
+            missing = [index for index in missing if backend_ids[index] is None]
+        return backend_ids
+
+    def _resolve_backend(self, backend_id):
+        return self.backends[backend_id]
+
     def _call_method(self, method, obj, default, default_is_exception, **kwargs):
         """Check all children object stores for the first one with the dataset."""
         base_dir = kwargs.get("base_dir", None)
@@ -1319,8 +1644,8 @@ class DistributedObjectStore(NestedObjectStore):
     ObjectStore that defers to a list of backends.
 
     When getting objects the first store where the object exists is used.
-    When creating objects they are created in a store selected randomly, but
-    with weighting.
+    When creating objects they are created in a store selected by the configured
+    placement strategy, by default randomly but with weighting.
     """
 
     backends: Dict[str, Any]  # BaseObjectStore or ConcreteObjectStore?
@@ -1375,6 +1700,21 @@ class DistributedObjectStore(NestedObjectStore):
                 self.weighted_backend_ids.append(backend_id)
 
         self.original_weighted_backend_ids = self.weighted_backend_ids
+        placement = config_dict.get("placement") or {}
+        self.placement = {
+            "strategy": placement.get("strategy", DEFAULT_PLACEMENT_STRATEGY),
+            "locality": placement.get("locality", DEFAULT_PLACEMENT_LOCALITY),
+            "usage_refresh_interval": float(placement.get("usage_refresh_interval", DEFAULT_USAGE_REFRESH_INTERVAL)),
+        }
+        self.placement_engine = PlacementEngine(
+            self._backend_usage_percent,
+            self.backends.keys(),
+            max_percent_full={
+                backend_id: maxpct or self.global_max_percent_full
+                for backend_id, maxpct in self.max_percent_full.items()
+            },
+            **self.placement,
+        )
         self.user_object_store_resolver = user_object_store_resolver
         self.user_selection_allowed = user_selection_allowed
         self.allow_user_selection = bool(user_selection_allowed) or (user_object_store_resolver is not None)
@@ -1399,6 +1739,17 @@ class DistributedObjectStore(NestedObjectStore):
             "global_max_percent_full": float(backends_root.get("maxpctfull", 0)),
             "backends": backends,
         }
+        placement = {}
+        for attribute, key, as_type in (
+            ("placement", "strategy", str),
+            ("placement_locality", "locality", str),
+            ("placement_usage_refresh_interval", "usage_refresh_interval", float),
+        ):
+            value = backends_root.get(attribute)
+            if value is not None:
+                placement[key] = as_type(value)
+        if placement:
+            config_dict["placement"] = placement
 
         for b in [e for e in backends_root if e.tag == "backend"]:
             store_id = b.get("id")
@@ -1452,6 +1803,7 @@ class DistributedObjectStore(NestedObjectStore):
         as_dict = super().to_dict()
         as_dict["global_max_percent_full"] = self.global_max_percent_full
         as_dict["search_for_missing"] = self.search_for_missing
+        as_dict["placement"] = self.placement
         backends: List[Dict[str, Any]] = []
         for backend_id, backend in self.backends.items():
             backend_as_dict = backend.to_dict()
@@ -1492,6 +1844,13 @@ class DistributedObjectStore(NestedObjectStore):
             self.weighted_backend_ids = new_weighted_backend_ids
             sleeper.sleep(120)  # Test free space every 2 minutes
 
+    def _backend_usage_percent(self, backend_id: str) -> float:
+        return self.backends[backend_id].get_store_usage_percent()
+
+    def placement_statistics(self) -> Dict[str, Any]:
+        """Return the placement strategy and per-backend placement and write statistics."""
+        return self.placement_engine.to_dict()
+
     def _construct_path(self, obj, **kwargs) -> str:
         return self._resolve_backend(obj.object_store_id).construct_path(obj, **kwargs)
 
@@ -1501,7 +1860,7 @@ class DistributedObjectStore(NestedObjectStore):
         if object_store_id is None or not self._exists(obj, **kwargs):
             if object_store_id is None or (object_store_id not in self.backends and "://" not in object_store_id):
                 try:
-                    object_store_id = random.choice(self.weighted_backend_ids)
+                    object_store_id = self.placement_engine.select(obj, self.weighted_backend_ids)
                     obj.object_store_id = object_store_id
                 except IndexError:
                     raise ObjectInvalid(
@@ -1521,6 +1880,36 @@ class DistributedObjectStore(NestedObjectStore):
         else:
             return self._resolve_backend(object_store_id)
 
+    def _update_from_file(
+        self,
+        obj,
+        base_dir=None,
+        extra_dir=None,
+        extra_dir_at_root=False,
+        alt_name=None,
+        obj_dir: bool = False,
+        file_name=None,
+        create: bool = False,
+        preserve_symlinks: bool = False,
+        defer_push: bool = False,
+    ) -> None:
+        """Update the backend holding `obj` and record the write performance of that backend."""
+        start = time.time()
+        super()._update_from_file(
+            obj,
+            base_dir=base_dir,
+            extra_dir=extra_dir,
+            extra_dir_at_root=extra_dir_at_root,
+            alt_name=alt_name,
+            obj_dir=obj_dir,
+            file_name=file_name,
+            create=create,
+            preserve_symlinks=preserve_symlinks,
+            defer_push=defer_push,
+        )
+        if file_name and obj.object_store_id in self.backends and os.path.exists(file_name):
+            self.placement_engine.record_write(obj.object_store_id, os.path.getsize(file_name), time.time() - start)
+
     def _call_method(self, method, obj, default, default_is_exception, **kwargs):
         object_store_id = self.__get_store_id_for(obj, **kwargs)
         if object_store_id is not None:
@@ -1532,6 +1921,36 @@ class DistributedObjectStore(NestedObjectStore):
         else:
             return default
 
+    def _backend_ids_for(self, objs: Sequence[Any], **kwargs) -> List[Any]:
+        """Use the object store ids of `objs`, searching all backends at once for objects missing one."""
+        backend_ids: List[Optional[str]] = []
+        missing = []
+        for index, obj in enumerate(objs):
+            object_store_id = obj.object_store_id
+            if object_store_id is None:
+                if self.search_for_missing:
+                    missing.append(index)
+            elif object_store_id not in self.backends and not object_store_id.startswith("user_objects://"):
+                log.warning(
+                    "The backend object store ID (%s) for %s object with ID %s is invalid",
+                    object_store_id,
+                    obj.__class__.__name__,
+                    obj.id,
+                )
+                object_store_id = None
+            backend_ids.append(object_store_id)
+        if missing:
+            found = super()._backend_ids_for([objs[index] for index in missing], **kwargs)
+            for index, backend_id in zip(missing, found):
+                if backend_id is not None:
+                    obj = objs[index]
+                    log.warning(
+                        f"{obj.__class__.__name__} object with ID {obj.id} found in backend object store with ID {backend_id}"
+                    )
+                    obj.object_store_id = backend_id
+                    backend_ids[index] = backend_id
+        return backend_ids
+
     def _resolve_backend(self, object_store_id: str):
         try:
             return self.backends[object_store_id]
@@ -1718,6 +2137,9 @@ class HierarchicalObjectStore(NestedObjectStore):
                 return True
         return False
 
+    def _exists_many(self, objs: Sequence[Any], **kwargs) -> List[bool]:
+        return [backend_id is not None for backend_id in self._backend_ids_for(objs, **kwargs)]
+
     def _construct_path(self, obj, **kwargs) -> str:
         return self.backends[0].construct_path(obj, **kwargs)
 
@@ -2135,7 +2557,7 @@ def persist_extra_files(
 def persist_extra_files_for_dataset(
     object_store: ObjectStore,
     src_extra_files_path: str,
-    dataset: "Dataset",
+    dataset: Union["Dataset", ObjectRef],
     extra_files_path_name: str,
 ):
     for root, _dirs, files in safe_walk(src_extra_files_path):
@@ -1,10 +1,15 @@
+import io
 import logging
 import os
 import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 from typing import (
     Any,
     Dict,
+    Iterator,
     Optional,
 )
 
@@ -18,14 +23,28 @@ from galaxy.util import (
     unlink,
 )
 from galaxy.util.path import safe_relpath
-from ._util import fix_permissions
+from ._util import (
+    fix_permissions,
+    KeyedLocks,
+    open_file_range,
+    RangeReader,
+)
 from .caching import (
+    build_remote_state_cache,
+    CacheIndex,
     CacheTarget,
+    configured_cache_options,
+    enable_cache_index,
     InProcessCacheMonitor,
+    PARTIAL_DOWNLOAD_SUFFIX,
+    PENDING_PUSH_SUFFIX,
+    RemoteStateCache,
 )
 
 log = logging.getLogger(__name__)
 
+REMOTE_BATCH_CONCURRENCY = 8
+
 
 class CachingConcreteObjectStore(ConcreteObjectStore):
     staging_path: str
@@ -36,6 +55,19 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
     cache_size: int
     cache_monitor: Optional[InProcessCacheMonitor] = None
     cache_monitor_interval: int
+    use_cache_index: bool
+    _cache_index: Optional[CacheIndex] = None
+    remote_state_cache: Optional[RemoteStateCache]
+    cache_options: Dict[str, Any]
+    # remote lookups are dominated by latency, overlap them in batch operations
+    batch_concurrency = REMOTE_BATCH_CONCURRENCY
+
+    def __init__(self, config, config_dict=None, **kwargs):
+        super().__init__(config, config_dict, **kwargs)
+        self.cache_options = configured_cache_options(config_dict or {})
+        self.use_cache_index = enable_cache_index(config, config_dict or {})
+        self.remote_state_cache = build_remote_state_cache(config, config_dict or {})
+        self._download_locks = KeyedLocks()
 
     def _ensure_staging_path_writable(self):
         staging_path = self.staging_path
@@ -103,32 +135,112 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
 
         return rel_path
 
+    def _cache_config_to_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.cache_size,
+            "path": self.staging_path,
+            "cache_updated_data": self.cache_updated_data,
+            **self.cache_options,
+        }
+
     def _get_cache_path(self, rel_path: str) -> str:
         return os.path.abspath(os.path.join(self.staging_path, rel_path))
 
+    def _pending_push_path(self, rel_path: str) -> str:
+        return f"{self._get_cache_path(rel_path)}{PENDING_PUSH_SUFFIX}"
+
+    def _defers_push(self, obj) -> bool:
+        # only data copied to the cache can be pushed later
+        return bool(self.cache_options.get("write_behind")) and self.cache_updated_data
+
     def _in_cache(self, rel_path: str) -> bool:
         """Check if the given dataset is in the local cache and return True if so."""
         cache_path = self._get_cache_path(rel_path)
         return os.path.exists(cache_path)
 
+    def _cached_exists_remotely(self, rel_path: str) -> bool:
+        if self.remote_state_cache is None:
+            return self._exists_remotely(rel_path)
+        return self.remote_state_cache.get("exists", rel_path, lambda: self._exists_remotely(rel_path))
+
+    def _cached_remote_size(self, rel_path: str) -> int:
+        if self.remote_state_cache is None:
+            return self._get_remote_size(rel_path)
+        return self.remote_state_cache.get("size", rel_path, lambda: self._get_remote_size(rel_path))
+
+    def _invalidate_remote_state(self, rel_path: str, entire_dir: bool = False) -> None:
+        if self.remote_state_cache is None:
+            return
+        if entire_dir:
+            self.remote_state_cache.invalidate_tree(rel_path)
+        else:
+            self.remote_state_cache.invalidate(rel_path)
+
+    @property
+    def cache_index(self) -> Optional[CacheIndex]:
+        if self.use_cache_index and self._cache_index is None:
+            self._cache_index = CacheIndex(self.staging_path)
+        return self._cache_index
+
+    def _update_cache_index(self, method: str, rel_path: str) -> None:
+        # the cache index is only an optimization for cache cleaning, never fail
+        # object store operations because it could not be updated.
+        cache_index = self.cache_index
+        if cache_index is None:
+            return
+        try:
+            getattr(cache_index, method)(rel_path)
+        except sqlite3.Error:
+            log.exception("Failed to update cache index for '%s'", rel_path)
+
     def _pull_into_cache(self, rel_path, **kwargs) -> bool:
         # Ensure the cache directory structure exists (e.g., dataset_#_files/)
         rel_path_dir = os.path.dirname(rel_path)
         if not os.path.exists(self._get_cache_path(rel_path_dir)):
             os.makedirs(self._get_cache_path(rel_path_dir), exist_ok=True)
-        # Now pull in the file
-        file_ok = self._download(rel_path)
-        if file_ok:
-            fix_permissions(self.config, self._get_cache_path(rel_path_dir))
-        else:
-            unlink(self._get_cache_path(rel_path), ignore_errors=True)
-        return file_ok
+        # Only download a file once if multiple threads request it at the same time
+        with self._download_locks.lock(rel_path):
+            cache_path = self._get_cache_path(rel_path)
+            if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
+                return True
+            # Now pull in the file
+            file_ok = self._download(rel_path)
+            if file_ok:
+                fix_permissions(self.config, self._get_cache_path(rel_path_dir))
+                self._update_cache_index("record", rel_path)
+            else:
+                unlink(cache_path, ignore_errors=True)
+            return file_ok
+
+    @contextmanager
+    def _atomic_cache_file(self, rel_path: str) -> Iterator[str]:
+        """Yield a temporary path to download ``rel_path`` to.
+
+        The path does not exist yet, it lives in a private temporary directory
+        next to the cache path so downloaders that refuse to overwrite files
+        (e.g. axel) can write to it. The file is moved to the cache path of
+        ``rel_path`` if the block completes, so partially downloaded files never
+        appear in the cache.
+        """
+        cache_path = self._get_cache_path(rel_path)
+        basename = os.path.basename(cache_path)
+        temp_dir = tempfile.mkdtemp(
+            prefix=f".{basename}.", suffix=PARTIAL_DOWNLOAD_SUFFIX, dir=os.path.dirname(cache_path)
+        )
+        temp_path = os.path.join(temp_dir, basename)
+        try:
+            yield temp_path
+            os.replace(temp_path, cache_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
     def _get_data(self, obj, start=0, count=-1, **kwargs):
         rel_path = self._construct_path(obj, **kwargs)
         # Check cache first and get file if not there
         if not self._in_cache(rel_path):
             self._pull_into_cache(rel_path, **kwargs)
+        else:
+            self._update_cache_index("touch", rel_path)
         # Read the file content from cache
         data_file = open(self._get_cache_path(rel_path))
         data_file.seek(start)
@@ -136,6 +248,21 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         data_file.close()
         return content
 
+    def _open_range(self, obj, start: int = 0, length: Optional[int] = None, **kwargs) -> RangeReader:
+        rel_path = self._construct_path(obj, **kwargs)
+        cache_path = self._get_cache_path(rel_path)
+        if self._in_cache(rel_path) and os.path.getsize(cache_path) > 0:
+            self._update_cache_index("touch", rel_path)
+            return open_file_range(cache_path, start, length)
+        if self._cached_exists_remotely(rel_path):
+            if length == 0 or start >= self._cached_remote_size(rel_path):
+                return RangeReader(io.BytesIO(), start, 0)
+            stream = self._open_remote_range(rel_path, start, length)
+            if stream is not None:
+                return stream
+        # the store cannot stream ranges, pull the whole object into the cache
+        return open_file_range(self._get_filename(obj, **kwargs), start, length)
+
     def _exists(self, obj, **kwargs) -> bool:
         in_cache = exists_remotely = False
         rel_path = self._construct_path(obj, **kwargs)
@@ -149,7 +276,7 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
             return True
 
         in_cache = self._in_cache(rel_path)
-        exists_remotely = self._exists_remotely(rel_path)
+        exists_remotely = self._cached_exists_remotely(rel_path)
         dir_only = kwargs.get("dir_only", False)
         base_dir = kwargs.get("base_dir", None)
         if dir_only:
@@ -160,7 +287,11 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
 
         # TODO: Sync should probably not be done here. Add this to an async upload stack?
         if in_cache and not exists_remotely:
+            if os.path.exists(self._pending_push_path(rel_path)):
+                # written behind, pushed by ``push()``
+                return True
             self._push_to_storage(rel_path, source_file=self._get_cache_path(rel_path))
+            self._invalidate_remote_state(rel_path)
             return True
         elif exists_remotely:
             return True
@@ -195,11 +326,12 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
                 rel_path = os.path.join(rel_path, alt_name if alt_name else f"dataset_{self._get_object_id(obj)}.dat")
                 open(os.path.join(self.staging_path, rel_path), "w").close()
                 self._push_to_storage(rel_path, from_string="")
+                self._invalidate_remote_state(rel_path)
         return self
 
     def _caching_allowed(self, rel_path: str, remote_size: Optional[int] = None) -> bool:
         if remote_size is None:
-            remote_size = self._get_remote_size(rel_path)
+            remote_size = self._cached_remote_size(rel_path)
         if not self.cache_target.fits_in_cache(remote_size):
             log.critical(
                 "File %s is larger (%s bytes) than the configured cache allows (%s). Cannot download.",
@@ -211,6 +343,8 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         return True
 
     def _push_to_storage(self, rel_path, source_file=None, from_string=None):
+        if self._in_cache(rel_path):
+            self._update_cache_index("record", rel_path)
         source_file = source_file or self._get_cache_path(rel_path)
         if from_string is None and not os.path.exists(source_file):
             log.error(
@@ -263,8 +397,8 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
                 return self._get_size_in_cache(rel_path)
             except OSError as ex:
                 log.info("Could not get size of file '%s' in local cache, will try Azure. Error: %s", rel_path, ex)
-        elif self._exists_remotely(rel_path):
-            return self._get_remote_size(rel_path)
+        elif self._cached_exists_remotely(rel_path):
+            return self._cached_remote_size(rel_path)
         log.warning("Did not find dataset '%s', returning 0 for size", rel_path)
         return 0
 
@@ -288,6 +422,7 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         # always resync the cache. Gotta make sure we're being judicious in out data.extra_files_path
         # calls I think.
         if not dir_only and self._in_cache(rel_path) and os.path.getsize(self._get_cache_path(rel_path)) > 0:
+            self._update_cache_index("touch", rel_path)
             return cache_path
 
         # Check if the file exists in persistent storage and, if it does, pull it into cache
@@ -317,6 +452,7 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         base_dir = kwargs.get("base_dir", None)
         dir_only = kwargs.get("dir_only", False)
         obj_dir = kwargs.get("obj_dir", False)
+        self._invalidate_remote_state(rel_path, entire_dir=bool(entire_dir and extra_dir))
         try:
             # Remove temporary data in JOB_WORK directory
             if base_dir and dir_only and obj_dir:
@@ -329,10 +465,13 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
             # but requires iterating through each individual key in S3 and deleing it.
             if entire_dir and extra_dir:
                 shutil.rmtree(self._get_cache_path(rel_path), ignore_errors=True)
+                self._update_cache_index("discard_tree", rel_path)
                 return self._delete_remote_all(rel_path)
             else:
                 # Delete from cache first
+                unlink(self._pending_push_path(rel_path), ignore_errors=True)
                 unlink(self._get_cache_path(rel_path), ignore_errors=True)
+                self._update_cache_index("discard", rel_path)
                 # Delete from S3 as well
                 if self._exists_remotely(rel_path):
                     return self._delete_existing_remote(rel_path)
@@ -341,18 +480,24 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
         return False
 
     def _update_from_file(
-        self, obj, file_name=None, create: bool = False, preserve_symlinks: bool = False, **kwargs
+        self,
+        obj,
+        file_name=None,
+        create: bool = False,
+        preserve_symlinks: bool = False,
+        defer_push: bool = False,
+        **kwargs,
     ) -> None:
         if create:
             self._create(obj, **kwargs)
 
         if self._exists(obj, **kwargs):
             rel_path = self._construct_path(obj, **kwargs)
+            cache_file = self._get_cache_path(rel_path)
             # Chose whether to use the dataset file itself or an alternate file
             if file_name:
                 source_file = os.path.abspath(file_name)
                 # Copy into cache
-                cache_file = self._get_cache_path(rel_path)
                 try:
                     if source_file != cache_file and self.cache_updated_data:
                         # FIXME? Should this be a `move`?
@@ -360,26 +505,50 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
                     fix_permissions(self.config, cache_file)
                 except OSError:
                     log.exception("Trouble copying source file '%s' to cache '%s'", source_file, cache_file)
+                    defer_push = False
             else:
-                source_file = self._get_cache_path(rel_path)
+                source_file = cache_file
+
+            if defer_push and self._defers_push(obj) and os.path.exists(cache_file):
+                # keep the cached file until ``push()`` pushed it
+                open(self._pending_push_path(rel_path), "w").close()
+                return
 
             self._push_to_storage(rel_path, source_file)
+            # an earlier update written behind is superseded
+            unlink(self._pending_push_path(rel_path), ignore_errors=True)
+            self._invalidate_remote_state(rel_path)
 
         else:
             raise ObjectNotFound(
                 f"objectstore.update_from_file, object does not exist: {str(obj)}, kwargs: {str(kwargs)}"
             )
 
+    def _push(self, obj, **kwargs) -> bool:
+        rel_path = self._construct_path(obj, **kwargs)
+        pending_push_path = self._pending_push_path(rel_path)
+        if not os.path.exists(pending_push_path):
+            # pushed by an earlier call or never written behind
+            return True
+        if not self._push_to_storage(rel_path, self._get_cache_path(rel_path)):
+            return False
+        unlink(pending_push_path, ignore_errors=True)
+        self._invalidate_remote_state(rel_path)
+        return True
+
     @property
     def cache_target(self) -> CacheTarget:
         return CacheTarget(
             self.staging_path,
             self.cache_size,
             0.9,
+            self.use_cache_index,
         )
 
     def _shutdown_cache_monitor(self) -> None:
         self.cache_monitor and self.cache_monitor.shutdown()
+        if self._cache_index is not None:
+            self._cache_index.close()
 
     def _start_cache_monitor_if_needed(self):
         if self.enable_cache_monitor:
@@ -394,6 +563,11 @@ class CachingConcreteObjectStore(ConcreteObjectStore):
     def _download(self, rel_path: str) -> bool:
         raise NotImplementedError()
 
+    # Override to stream byte ranges of remote objects without caching them,
+    # returning None makes _open_range pull the object into the cache instead.
+    def _open_remote_range(self, rel_path: str, start: int, length: Optional[int]) -> Optional[RangeReader]:
+        return None
+
     # Do not need to override these if instead replacing _delete
     def _delete_existing_remote(self, rel_path) -> bool:
         raise NotImplementedError()
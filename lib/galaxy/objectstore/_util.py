@@ -1,8 +1,27 @@
+import io
 import multiprocessing
 import os
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import requests
 
 from galaxy.util import (
+    CHUNK_SIZE,
+    DEFAULT_SOCKET_TIMEOUT,
     umask_fix_perms,
     which,
 )
@@ -33,3 +52,176 @@ class UsesAxel:
         ncores = multiprocessing.cpu_count()
         ret_code = subprocess.call(["axel", "-a", "-o", path, "-n", str(ncores), url])
         return ret_code == 0
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# all batch lookups share one pool, concurrent requests don't multiply the number of threads
+BATCH_POOL_SIZE = 16
+BATCH_THREAD_NAME_PREFIX = "objectstore_batch"
+
+_batch_pool: Optional[ThreadPoolExecutor] = None
+_batch_pool_lock = threading.Lock()
+
+
+def _get_batch_pool() -> ThreadPoolExecutor:
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ThreadPoolExecutor(max_workers=BATCH_POOL_SIZE, thread_name_prefix=BATCH_THREAD_NAME_PREFIX)
+        return _batch_pool
+
+
+def map_concurrently(function: Callable[[T], R], items: Sequence[T], max_workers: int) -> List[R]:
+    """Return ``function`` applied to each of ``items`` in order, on the shared batch thread pool.
+
+    At most ``max_workers`` of ``items`` are processed at once. Calls made from
+    a batch thread run sequentially, waiting for the pool from one of its own
+    threads could deadlock.
+    """
+    max_workers = min(max_workers, len(items))
+    if max_workers <= 1 or threading.current_thread().name.startswith(BATCH_THREAD_NAME_PREFIX):
+        return [function(item) for item in items]
+    pool = _get_batch_pool()
+    slots = threading.BoundedSemaphore(max_workers)
+    futures = []
+    for item in items:
+        slots.acquire()
+        future = pool.submit(function, item)
+        future.add_done_callback(lambda _: slots.release())
+        futures.append(future)
+    return [future.result() for future in futures]
+
+
+class KeyedLocks:
+    """Hand out one lock per key, e.g. to let only one thread download a given path at a time."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with self._guard:
+            key_lock, users = self._locks.get(key, (threading.Lock(), 0))
+            self._locks[key] = (key_lock, users + 1)
+        try:
+            with key_lock:
+                yield
+        finally:
+            with self._guard:
+                key_lock, users = self._locks[key]
+                if users == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (key_lock, users - 1)
+
+
+def byte_ranges(size: int, part_size: int) -> List[Tuple[int, int]]:
+    """Split ``size`` bytes into inclusive ``(start, end)`` ranges of at most ``part_size`` bytes."""
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+
+def parallel_ranged_download(url: str, path: str, size: int, part_size: int, max_concurrency: int) -> None:
+    """Download ``url`` to ``path`` with up to ``max_concurrency`` concurrent HTTP range requests."""
+    with open(path, "wb") as f:
+        f.truncate(size)
+    fd = os.open(path, os.O_WRONLY)
+    try:
+
+        def download_part(byte_range: Tuple[int, int]) -> None:
+            start, end = byte_range
+            headers = {"Range": f"bytes={start}-{end}"}
+            with requests.get(url, headers=headers, stream=True, timeout=DEFAULT_SOCKET_TIMEOUT) as response:
+                response.raise_for_status()
+                if response.status_code != 206 and (start, end) != (0, size - 1):
+                    raise Exception(f"Server did not honor range request for '{url}'")
+                offset = start
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+            if offset != end + 1:
+                raise Exception(f"Incomplete range {start}-{end} downloaded from '{url}'")
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            # consume the results to re-raise the first failure
+            list(executor.map(download_part, byte_ranges(size, part_size)))
+    finally:
+        os.close(fd)
+
+
+class RangeReader(io.RawIOBase):
+    """Binary stream of at most ``length`` bytes read from ``raw``, which is positioned at byte ``start``.
+
+    ``raw`` only needs a ``read(size)`` method, it is closed with the reader if
+    it has a ``close()`` method (the Azure stream downloader has none). For
+    local files ``fileno()``, ``start`` and ``length`` can be used to serve the
+    range with ``os.sendfile`` or to memory map it instead of copying it
+    through Python.
+    """
+
+    def __init__(self, raw: BinaryIO, start: int = 0, length: Optional[int] = None):
+        self._raw = raw
+        self.start = start
+        self.length = length
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        wanted = len(view) if self._remaining is None else min(len(view), self._remaining)
+        filled = 0
+        # remote streams may return short reads, fill the buffer until the range or stream ends
+        while filled < wanted:
+            data = self._raw.read(wanted - filled)
+            if not data:
+                break
+            view[filled : filled + len(data)] = data
+            filled += len(data)
+        if self._remaining is not None:
+            self._remaining -= filled
+        return filled
+
+    def fileno(self) -> int:
+        fileno = getattr(self._raw, "fileno", None)
+        if fileno is None:
+            raise io.UnsupportedOperation("fileno")
+        return fileno()
+
+    def close(self) -> None:
+        if not self.closed:
+            close = getattr(self._raw, "close", None)
+            if close is not None:
+                close()
+        super().close()
+
+
+def open_file_range(path: str, start: int = 0, length: Optional[int] = None) -> RangeReader:
+    """Open ``length`` bytes (all remaining bytes if ``None``) of a local file starting at byte ``start``."""
+    f = open(path, "rb")
+    try:
+        f.seek(start)
+    except Exception:
+        f.close()
+        raise
+    return RangeReader(f, start, length)
+
+
+def open_url_range(url: str, start: int = 0, length: Optional[int] = None) -> RangeReader:
+    """Stream ``length`` bytes (all remaining bytes if ``None``) of ``url`` starting at byte ``start``."""
+    if length == 0:
+        return RangeReader(io.BytesIO(), start, 0)
+    end = "" if length is None else start + length - 1
+    response = requests.get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=DEFAULT_SOCKET_TIMEOUT)
+    try:
+        response.raise_for_status()
+        if response.status_code != 206 and start:
+            raise Exception(f"Server did not honor range request for '{url}'")
+    except Exception:
+        response.close()
+        raise
+    response.raw.decode_content = True
+    return RangeReader(response.raw, start, length)
@@ -8,6 +8,7 @@ from datetime import (
     datetime,
     timedelta,
 )
+from typing import Optional
 
 try:
     from azure.common import AzureHttpError
@@ -20,6 +21,7 @@ except ImportError:
     BlobServiceClient = None  # type: ignore[assignment,unused-ignore,misc]
 
 from ._caching_base import CachingConcreteObjectStore
+from ._util import RangeReader
 from .caching import (
     enable_cache_monitor,
     parse_caching_config_dict_from_xml,
@@ -167,11 +169,7 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
                     "name": self.container_name,
                 },
                 "transfer": self.transfer_dict,
-                "cache": {
-                    "size": self.cache_size,
-                    "path": self.staging_path,
-                    "cache_updated_data": self.cache_updated_data,
-                },
+                "cache": self._cache_config_to_dict(),
             }
         )
         return as_dict
@@ -245,7 +243,8 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
             if not self._caching_allowed(rel_path):
                 return False
             else:
-                self._download_to_file(rel_path, local_destination)
+                with self._atomic_cache_file(rel_path) as download_path:
+                    self._download_to_file(rel_path, download_path)
                 return True
         except AzureHttpError:
             log.exception("Problem downloading '%s' from Azure", rel_path)
@@ -261,6 +260,14 @@ class AzureBlobObjectStore(CachingConcreteObjectStore):
         with open(local_destination, "wb") as f:
             self._blob_client(rel_path).download_blob().download_to_stream(f, **kwd)
 
+    def _open_remote_range(self, rel_path: str, start: int, length: Optional[int]) -> Optional[RangeReader]:
+        try:
+            downloader = self._blob_client(rel_path).download_blob(offset=start, length=length)
+        except AzureHttpError:
+            log.exception("Problem opening range of '%s' in Azure", rel_path)
+            return None
+        return RangeReader(downloader, start, length)
+
     def _download_directory_into_cache(self, rel_path, cache_path):
         blobs = self._blobs_from(rel_path)
         for blob in blobs:
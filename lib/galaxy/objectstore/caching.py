@@ -3,13 +3,21 @@
 
 import logging
 import os
+import sqlite3
 import threading
 import time
+import weakref
 from math import inf
 from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
     List,
     Optional,
+    OrderedDict,
     Tuple,
+    TypeVar,
 )
 
 from typing_extensions import NamedTuple
@@ -25,14 +33,35 @@ log = logging.getLogger(__name__)
 
 ONE_GIGA_BYTE = 1024 * 1024 * 1024
 
+# Name of the SQLite cache index kept at the root of a cache directory, the
+# index and its journal files are never considered part of the cache.
+CACHE_INDEX_FILENAME = ".galaxy_cache_index.sqlite"
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
+# Marks a cached file written behind that is not pushed to remote storage yet,
+# the file and its marker are never evicted.
+PENDING_PUSH_SUFFIX = ".pending_push"
+# Optional cache settings of an object store, serialized only if configured for the store.
+CACHE_OPTION_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "index": string_as_bool,
+    "remote_state_ttl": float,
+    "remote_state_size": int,
+    "write_behind": string_as_bool,
+}
+
 
 FileListT = List[Tuple[time.struct_time, str, int]]
 
+T = TypeVar("T")
+
+DEFAULT_REMOTE_STATE_CACHE_SIZE = 10000
+DEFAULT_REMOTE_STATE_CACHE_REPORT_INTERVAL = 600
+
 
 class CacheTarget(NamedTuple):
     path: str
     size: int  # cache size in gigabytes
     limit: float  # cache limit as a percent
+    use_index: bool = False  # track cache contents in a CacheIndex instead of walking the cache
 
     def fits_in_cache(self, bytes: int) -> bool:
         # if we don't have a positive cache size - interpret it as an unbounded
@@ -48,6 +77,272 @@ class CacheTarget(NamedTuple):
     def log_description(self) -> str:
         return f"{self.limit} percent of {self.size} gigabytes"
 
+    @property
+    def limit_in_bytes(self) -> float:
+        return self.size * ONE_GIGA_BYTE * self.limit
+
+
+CACHE_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entry_atime ON cache_entry (atime);
+CREATE TABLE IF NOT EXISTS cache_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total_size INTEGER NOT NULL,
+    built INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_state (id, total_size, built) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_entry_insert AFTER INSERT ON cache_entry BEGIN
+    UPDATE cache_state SET total_size = total_size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entry_delete AFTER DELETE ON cache_entry BEGIN
+    UPDATE cache_state SET total_size = total_size - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entry_update AFTER UPDATE OF size ON cache_entry BEGIN
+    UPDATE cache_state SET total_size = total_size - OLD.size + NEW.size;
+END;
+"""
+
+
+class _ThreadConnection:
+    # holds the connection of a thread, the connection is closed when the holder is garbage collected
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+
+class CacheIndex:
+    """Persistent index of the files in an object store cache directory.
+
+    The index is a SQLite database at the root of the cache that records the
+    size and last access time of every cached file, along with the total size
+    of the cache. Object stores update it as files are pulled into, written to,
+    read from and deleted from the cache, so the cache monitor can evict the
+    least recently used files without walking the cache directory.
+
+    Paths are stored relative to the cache directory. Files added to the cache
+    behind the object store's back are only picked up by :meth:`rebuild`.
+
+    Caches may be shared by Galaxy processes on several hosts through a network
+    file system, so the database uses SQLite's rollback journal rather than WAL
+    mode, which relies on shared memory that is not shared between hosts. The
+    file system must support POSIX file locks.
+    """
+
+    eviction_batch_size = 1000
+
+    def __init__(self, cache_path: str):
+        self.cache_path = os.path.abspath(cache_path)
+        self.index_path = os.path.join(self.cache_path, CACHE_INDEX_FILENAME)
+        # one connection per thread, dropped with the thread local data when the thread exits
+        self._local = threading.local()
+        self._connections: weakref.WeakSet[_ThreadConnection] = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        thread_connection = getattr(self._local, "connection", None)
+        if thread_connection is None:
+            os.makedirs(self.cache_path, exist_ok=True)
+            # autocommit mode, multi-statement updates open transactions explicitly
+            connection = sqlite3.connect(self.index_path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=DELETE")
+            connection.executescript(CACHE_INDEX_SCHEMA)
+            thread_connection = _ThreadConnection(connection)
+            with self._connections_lock:
+                self._local.connection = thread_connection
+                self._connections.add(thread_connection)
+        return thread_connection.connection
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.join(self.cache_path, path), self.cache_path)
+
+    @property
+    def built(self) -> bool:
+        """Whether the index has been populated from the cache directory at least once."""
+        return bool(self._connection.execute("SELECT built FROM cache_state").fetchone()[0])
+
+    @property
+    def total_size(self) -> int:
+        return self._connection.execute("SELECT total_size FROM cache_state").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+
+    def __contains__(self, path: str) -> bool:
+        stmt = "SELECT 1 FROM cache_entry WHERE path = ?"
+        return self._connection.execute(stmt, (self._relpath(path),)).fetchone() is not None
+
+    def record(self, path: str, size: Optional[int] = None) -> None:
+        """Record that a file was written to the cache, ``path`` may be absolute or relative to the cache."""
+        if size is None:
+            try:
+                size = os.path.getsize(os.path.join(self.cache_path, path))
+            except OSError:
+                self.discard(path)
+                return
+        stmt = (
+            "INSERT INTO cache_entry (path, size, atime) VALUES (?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET size = excluded.size, atime = excluded.atime"
+        )
+        self._connection.execute(stmt, (self._relpath(path), size, time.time()))
+
+    def touch(self, path: str) -> None:
+        """Record that a cached file was accessed."""
+        stmt = "UPDATE cache_entry SET atime = ? WHERE path = ?"
+        if not self._connection.execute(stmt, (time.time(), self._relpath(path))).rowcount:
+            self.record(path)
+
+    def discard(self, path: str) -> None:
+        self._connection.execute("DELETE FROM cache_entry WHERE path = ?", (self._relpath(path),))
+
+    def discard_tree(self, path: str) -> None:
+        """Forget about a cached directory and all files below it."""
+        relpath = self._relpath(path)
+        # every path below relpath sorts between "relpath/" and "relpath0" ("0" follows "/")
+        stmt = "DELETE FROM cache_entry WHERE path = ? OR (path >= ? AND path < ?)"
+        self._connection.execute(stmt, (relpath, f"{relpath}{os.sep}", f"{relpath}{chr(ord(os.sep) + 1)}"))
+
+    def least_recently_used(self, limit: int) -> List[Tuple[str, int]]:
+        """Return absolute paths and sizes of the ``limit`` least recently used files."""
+        stmt = "SELECT path, size FROM cache_entry ORDER BY atime LIMIT ?"
+        return [(os.path.join(self.cache_path, path), size) for path, size in self._connection.execute(stmt, (limit,))]
+
+    def evict(self, delete_this_much: float) -> int:
+        """Delete least recently used files until ``delete_this_much`` bytes are freed.
+
+        Returns the number of bytes that were freed.
+        """
+        deleted_amount = 0
+        while deleted_amount < delete_this_much:
+            entries = self.least_recently_used(self.eviction_batch_size)
+            if not entries:
+                break
+            evicted = []
+            for path, size in entries:
+                if deleted_amount >= delete_this_much:
+                    break
+                if os.path.exists(f"{path}{PENDING_PUSH_SUFFIX}"):
+                    # not pushed yet, forget the file until pushing it records it again
+                    evicted.append((self._relpath(path),))
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # removed behind our back, just drop the stale entry
+                    pass
+                else:
+                    deleted_amount += size
+                evicted.append((self._relpath(path),))
+            self._connection.executemany("DELETE FROM cache_entry WHERE path = ?", evicted)
+        return deleted_amount
+
+    def rebuild(self) -> int:
+        """Repopulate the index from the cache directory, returns the number of indexed files."""
+        entries = [
+            (os.path.relpath(file_path, self.cache_path), stat.st_size, stat.st_atime)
+            for file_path, stat in _walk_cache_files(self.cache_path)
+        ]
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM cache_entry")
+            connection.executemany("INSERT INTO cache_entry (path, size, atime) VALUES (?, ?, ?)", entries)
+            connection.execute("UPDATE cache_state SET built = 1")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return len(entries)
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._connections_lock:
+            thread_connections = list(self._connections)
+            self._connections.clear()
+            self._local = threading.local()
+        for thread_connection in thread_connections:
+            thread_connection.connection.close()
+
+
+class RemoteStateCache:
+    """Bounded cache of remote existence and size lookups that expire after ``ttl`` seconds.
+
+    Caching object stores consult this before issuing a request to the remote
+    storage service, entries for a path must be invalidated whenever the
+    object store itself modifies or deletes the remote object. Hits and misses
+    are logged every ``report_interval`` seconds.
+    """
+
+    kinds = ("exists", "size")
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int = DEFAULT_REMOTE_STATE_CACHE_SIZE,
+        report_interval: float = DEFAULT_REMOTE_STATE_CACHE_REPORT_INTERVAL,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.report_interval = report_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_report = time.monotonic() + report_interval
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, rel_path: str, lookup: Callable[[], T]) -> T:
+        """Return the cached ``kind`` (e.g. ``exists`` or ``size``) of ``rel_path`` or call ``lookup``."""
+        key = (kind, rel_path)
+        with self._lock:
+            if time.monotonic() >= self._next_report:
+                self._report()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]  # type: ignore[return-value]
+            self.misses += 1
+        value = lookup()
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, rel_path: str) -> None:
+        with self._lock:
+            for kind in self.kinds:
+                self._entries.pop((kind, rel_path), None)
+
+    def invalidate_tree(self, rel_path: str) -> None:
+        """Invalidate ``rel_path`` and everything below it."""
+        prefix = rel_path.rstrip("/") + "/"
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == rel_path or key[1].startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _report(self) -> None:
+        lookups = self.hits + self.misses
+        log.debug(
+            "Remote state cache: %d hits, %d misses (%.1f%% hit rate), %d entries",
+            self.hits,
+            self.misses,
+            100 * self.hits / lookups if lookups else 0,
+            len(self._entries),
+        )
+        self._next_report = time.monotonic() + self.report_interval
+
 
 def check_caches(targets: List[CacheTarget]):
     for target in targets:
@@ -56,13 +351,14 @@ def check_caches(targets: List[CacheTarget]):
 
 def check_cache(cache_target: CacheTarget):
     """Run a step of the cache monitor."""
+    if cache_target.use_index:
+        _check_indexed_cache(cache_target)
+        return
     total_size, file_list = _get_cache_size_files(cache_target.path)
     # Sort the file list (based on access time)
     file_list.sort()
     # Initiate cleaning once we reach cache_monitor_cache_limit percentage of the defined cache size?
-    # Convert GBs to bytes for comparison
-    cache_size_in_gb = cache_target.size * ONE_GIGA_BYTE
-    cache_limit = cache_size_in_gb * cache_target.limit
+    cache_limit = cache_target.limit_in_bytes
     if total_size > cache_limit:
         log.debug(
             "Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
@@ -77,7 +373,36 @@ def check_cache(cache_target: CacheTarget):
         _clean_cache(file_list, delete_this_much)
 
 
+def _check_indexed_cache(cache_target: CacheTarget):
+    cache_index = CacheIndex(cache_target.path)
+    try:
+        if not cache_index.built:
+            log.info("Building cache index for %s", cache_target.path)
+            cache_index.rebuild()
+        total_size = cache_index.total_size
+        cache_limit = cache_target.limit_in_bytes
+        if total_size > cache_limit:
+            log.debug(
+                "Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
+                nice_size(total_size),
+                nice_size(cache_limit),
+            )
+            deleted_amount = cache_index.evict(total_size - cache_limit)
+            log.debug("Cache cleaning done. Total space freed: %s", nice_size(deleted_amount))
+    finally:
+        cache_index.close()
+
+
 def reset_cache(cache_target: CacheTarget):
+    if cache_target.use_index:
+        cache_index = CacheIndex(cache_target.path)
+        try:
+            # make sure files not known to the index are removed as well
+            cache_index.rebuild()
+            cache_index.evict(inf)
+        finally:
+            cache_index.close()
+        return
     _, file_list = _get_cache_size_files(cache_target.path)
     _clean_cache(file_list, inf)
 
@@ -114,17 +439,37 @@ def _get_cache_size_files(cache_path) -> Tuple[int, FileListT]:
     cache_size = 0
     file_list = []
 
-    for dirpath, _, filenames in os.walk(cache_path):
+    for file_path, stat in _walk_cache_files(cache_path):
+        file_size = stat.st_size
+        cache_size += file_size
+        # Get the time given file was last accessed
+        last_access_time = time.localtime(stat.st_atime)
+        # Compose a tuple of the access time and the file path
+        file_tuple = last_access_time, file_path, file_size
+        file_list.append(file_tuple)
+    return cache_size, file_list
+
+
+def _walk_cache_files(cache_path) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield path and stat result of every cached file that may be evicted.
+
+    The cache index, partial downloads left behind by interrupted downloads and
+    files that are not pushed to remote storage yet are skipped.
+    """
+    for dirpath, dirnames, filenames in os.walk(cache_path):
+        dirnames[:] = [dirname for dirname in dirnames if not dirname.endswith(PARTIAL_DOWNLOAD_SUFFIX)]
+        pending_push = {
+            filename[: -len(PENDING_PUSH_SUFFIX)] for filename in filenames if filename.endswith(PENDING_PUSH_SUFFIX)
+        }
         for filename in filenames:
+            if (
+                filename.startswith(CACHE_INDEX_FILENAME)
+                or filename.endswith((PARTIAL_DOWNLOAD_SUFFIX, PENDING_PUSH_SUFFIX))
+                or filename in pending_push
+            ):
+                continue
             file_path = os.path.join(dirpath, filename)
-            file_size = os.path.getsize(file_path)
-            cache_size += file_size
-            # Get the time given file was last accessed
-            last_access_time = time.localtime(os.stat(file_path)[7])
-            # Compose a tuple of the access time and the file path
-            file_tuple = last_access_time, file_path, file_size
-            file_list.append(file_tuple)
-    return cache_size, file_list
+            yield file_path, os.stat(file_path)
 
 
 def parse_caching_config_dict_from_xml(config_xml):
@@ -142,11 +487,31 @@ def parse_caching_config_dict_from_xml(config_xml):
             "monitor": monitor,
             "cache_updated_data": cache_updated_data,
         }
+        cache_dict.update(parse_cache_options_from_xml(c_xml))
     else:
         cache_dict = {}
     return cache_dict
 
 
+def parse_cache_options_from_xml(cache_xml) -> Dict[str, Any]:
+    """Parse the optional settings of a ``cache`` element that are set."""
+    return {
+        option: parse(cache_xml.get(option))
+        for option, parse in CACHE_OPTION_PARSERS.items()
+        if cache_xml.get(option) is not None
+    }
+
+
+def configured_cache_options(config_dict) -> Dict[str, Any]:
+    """Return the optional cache settings configured for an object store."""
+    cache_config_dict = config_dict.get("cache") or {}
+    return {
+        option: cache_config_dict[option]
+        for option in CACHE_OPTION_PARSERS
+        if cache_config_dict.get(option) is not None
+    }
+
+
 def configured_cache_size(config, config_dict) -> int:
     cache_config_dict = config_dict.get("cache") or {}
     cache_size = cache_config_dict.get("size") or config.object_store_cache_size
@@ -176,6 +541,27 @@ def enable_cache_monitor(config, config_dict) -> Tuple[bool, int]:
     return monitor == "inprocess", interval
 
 
+def enable_cache_index(config, config_dict) -> bool:
+    cache_config_dict = config_dict.get("cache") or {}
+    index = cache_config_dict.get("index")
+    if index is None:
+        index = getattr(config, "object_store_cache_index", False)
+    return string_as_bool(index)
+
+
+def build_remote_state_cache(config, config_dict) -> Optional[RemoteStateCache]:
+    cache_config_dict = config_dict.get("cache") or {}
+    ttl = cache_config_dict.get("remote_state_ttl")
+    if ttl is None:
+        ttl = getattr(config, "object_store_remote_state_cache_ttl", 0)
+    if not ttl or float(ttl) <= 0:
+        return None
+    max_size = cache_config_dict.get("remote_state_size") or getattr(
+        config, "object_store_remote_state_cache_size", None
+    )
+    return RemoteStateCache(float(ttl), int(max_size or DEFAULT_REMOTE_STATE_CACHE_SIZE))
+
+
 class InProcessCacheMonitor:
     def __init__(self, cache_target: CacheTarget, interval: int = 30, initial_sleep: Optional[int] = 2):
         # This Event object is initialized to False
@@ -5,9 +5,15 @@ Object Store plugin for Cloud storage.
 import logging
 import os
 import os.path
+from typing import Optional
 
 from ._caching_base import CachingConcreteObjectStore
-from ._util import UsesAxel
+from ._util import (
+    open_url_range,
+    parallel_ranged_download,
+    RangeReader,
+    UsesAxel,
+)
 from .caching import enable_cache_monitor
 from .s3 import parse_config_xml
 
@@ -50,6 +56,11 @@ class Cloud(CachingConcreteObjectStore, UsesAxel):
         self.bucket_name = bucket_dict.get("name")
         self.use_rr = bucket_dict.get("use_reduced_redundancy", False)
         self.max_chunk_size = bucket_dict.get("max_chunk_size", 250)
+        transfer_dict = config_dict.get("transfer") or {}
+        # number of concurrent range requests used to download a single object,
+        # ranges are max_chunk_size megabytes large like the parts of multipart uploads
+        self.download_max_concurrency = int(transfer_dict.get("download_max_concurrency") or 1)
+        self.download_part_size = self.max_chunk_size * 1024 * 1024
 
         self.cache_size = cache_dict.get("size") or self.config.object_store_cache_size
         self.staging_path = cache_dict.get("path") or self.config.object_store_cache_path
@@ -172,6 +183,10 @@ class Cloud(CachingConcreteObjectStore, UsesAxel):
                 log.error(msg)
                 raise Exception(msg)
 
+            transfer_xml = config_xml.findall("transfer")
+            if transfer_xml and transfer_xml[0].get("download_max_concurrency") is not None:
+                config["transfer"] = {"download_max_concurrency": int(transfer_xml[0].get("download_max_concurrency"))}
+
             if len(missing_config) > 0:
                 msg = (
                     f"The following configuration required for {provider} cloud backend "
@@ -198,10 +213,9 @@ class Cloud(CachingConcreteObjectStore, UsesAxel):
                 "name": self.bucket_name,
                 "use_reduced_redundancy": self.use_rr,
             },
-            "cache": {
-                "size": self.cache_size,
-                "path": self.staging_path,
-                "cache_updated_data": self.cache_updated_data,
+            "cache": self._cache_config_to_dict(),
+            "transfer": {
+                "download_max_concurrency": self.download_max_concurrency,
             },
         }
 
@@ -257,12 +271,21 @@ class Cloud(CachingConcreteObjectStore, UsesAxel):
             if not self._caching_allowed(rel_path, remote_size):
                 return False
             log.debug("Pulled key '%s' into cache to %s", rel_path, local_destination)
-            self._download_to(key, local_destination)
+            with self._atomic_cache_file(rel_path) as download_path:
+                self._download_to(key, download_path)
             return True
         except Exception:
             log.exception("Problem downloading key '%s' from S3 bucket '%s'", rel_path, self.bucket.name)
         return False
 
+    def _open_remote_range(self, rel_path: str, start: int, length: Optional[int]) -> Optional[RangeReader]:
+        try:
+            url = self.bucket.objects.get(rel_path).generate_url(7200)
+            return open_url_range(url, start, length)
+        except Exception:
+            log.exception("Problem opening range of key '%s' in bucket '%s'", rel_path, self.bucket.name)
+        return None
+
     def _download_directory_into_cache(self, rel_path, cache_path):
         # List objects in the specified cloud folder
         objects = self.bucket.objects.list(prefix=rel_path)
@@ -281,6 +304,11 @@ class Cloud(CachingConcreteObjectStore, UsesAxel):
         if self.use_axel:
             url = key.generate_url(7200)
             return self._axel_download(url, local_destination)
+        elif self.download_max_concurrency > 1 and key.size > self.download_part_size:
+            url = key.generate_url(7200)
+            parallel_ranged_download(
+                url, local_destination, key.size, self.download_part_size, self.download_max_concurrency
+            )
         else:
             with open(local_destination, "wb+") as downloaded_file_handle:
                 key.save_content(downloaded_file_handle)
@@ -26,6 +26,7 @@ from galaxy.util import (
     unlink,
 )
 from ._caching_base import CachingConcreteObjectStore
+from .caching import parse_cache_options_from_xml
 
 IRODS_IMPORT_MESSAGE = "The Python irods package is required to use this feature, please install it"
 # 1 MB
@@ -77,6 +78,7 @@ def parse_config_xml(config_xml):
         cache_size = float(c_xml[0].get("size", -1))
         staging_path = c_xml[0].get("path", None)
         cache_updated_data = string_as_bool(c_xml[0].get("cache_updated_data", "True"))
+        cache_options = parse_cache_options_from_xml(c_xml[0])
 
         attrs = ("type", "path")
         e_xml = config_xml.findall("extra_dir")
@@ -106,6 +108,7 @@ def parse_config_xml(config_xml):
                 "size": cache_size,
                 "path": staging_path,
                 "cache_updated_data": cache_updated_data,
+                **cache_options,
             },
             "extra_dirs": extra_dirs,
             "private": CachingConcreteObjectStore.parse_private_from_config_xml(config_xml),
@@ -298,11 +301,7 @@ class IRODSObjectStore(CachingConcreteObjectStore):
                 "refresh_time": self.refresh_time,
                 "connection_pool_monitor_interval": self.connection_pool_monitor_interval,
             },
-            "cache": {
-                "size": self.cache_size,
-                "path": self.staging_path,
-                "cache_updated_data": self.cache_updated_data,
-            },
+            "cache": self._cache_config_to_dict(),
         }
 
     # rel_path is file or folder?
@@ -459,6 +458,7 @@ class IRODSObjectStore(CachingConcreteObjectStore):
         obj_dir = kwargs.get("obj_dir", False)
 
         options = {kw.DEST_RESC_NAME_KW: self.resource}
+        self._invalidate_remote_state(rel_path, entire_dir=bool(entire_dir and extra_dir))
 
         try:
             # Remove temparory data in JOB_WORK directory
@@ -156,11 +156,7 @@ class OnedataObjectStore(CachingConcreteObjectStore):
                     "disable_tls_certificate_validation": self.disable_tls_certificate_validation,
                 },
                 "space": {"name": self.space_name, "galaxy_root_dir": self.galaxy_root_dir},
-                "cache": {
-                    "size": self.cache_size,
-                    "path": self.staging_path,
-                    "cache_updated_data": self.cache_updated_data,
-                },
+                "cache": self._cache_config_to_dict(),
             }
         )
         return as_dict
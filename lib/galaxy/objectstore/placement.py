@@ -0,0 +1,237 @@
+"""Placement of new objects on the backends of a distributed object store.
+
+A :class:`PlacementEngine` chooses the backend a new object is created in.
+The backends that may be chosen and their configured weights are given by the
+distributed object store, strategies then adjust the weights with what is known
+about the backends (free space, recent write throughput) or pin objects to a
+backend chosen by consistent hashing for locality.
+"""
+
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Type,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PLACEMENT_STRATEGY = "weighted"
+DEFAULT_PLACEMENT_LOCALITY = "history"
+DEFAULT_USAGE_REFRESH_INTERVAL = 30.0
+# Weight of the latest sample in the exponentially weighted moving averages of write performance.
+THROUGHPUT_SMOOTHING = 0.2
+
+
+class BackendStatistics:
+    """Placement and write statistics of a single backend."""
+
+    def __init__(self):
+        self.placements = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.write_throughput: Optional[float] = None  # bytes per second
+        self.usage_percent: Optional[float] = None
+        self.usage_checked: Optional[float] = None
+
+    def record_write(self, size: int, seconds: float) -> None:
+        self.writes += 1
+        self.bytes_written += size
+        if size and seconds > 0:
+            self.write_throughput = _smooth(self.write_throughput, size / seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "placements": self.placements,
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "write_throughput": self.write_throughput,
+            "usage_percent": self.usage_percent,
+        }
+
+
+def _smooth(average: Optional[float], sample: float) -> float:
+    if average is None:
+        return sample
+    return THROUGHPUT_SMOOTHING * sample + (1 - THROUGHPUT_SMOOTHING) * average
+
+
+class PlacementStrategy:
+    """Choose a backend id among weighted candidates, all weights are positive."""
+
+    def __init__(self, engine: "PlacementEngine"):
+        self.engine = engine
+
+    def choose(self, obj, weights: Dict[str, float]) -> str:
+        backend_ids = list(weights)
+        return random.choices(backend_ids, weights=[weights[backend_id] for backend_id in backend_ids])[0]
+
+
+class WeightedRandomPlacement(PlacementStrategy):
+    """Choose backends at random, proportionally to their configured weight."""
+
+
+class FreeSpacePlacement(PlacementStrategy):
+    """Scale weights by the fraction of free space left on each backend."""
+
+    def choose(self, obj, weights: Dict[str, float]) -> str:
+        free_weights = {}
+        for backend_id, weight in weights.items():
+            usage_percent = self.engine.usage_percent(backend_id)
+            if usage_percent is None:
+                free_weights[backend_id] = weight
+            elif usage_percent < 100:
+                free_weights[backend_id] = weight * (100 - usage_percent) / 100
+        return super().choose(obj, free_weights or weights)
+
+
+class ThroughputPlacement(PlacementStrategy):
+    """Scale weights by the recent write throughput of each backend.
+
+    Backends without recorded writes are assumed to perform like the average
+    backend, so they get a chance to be measured.
+    """
+
+    def choose(self, obj, weights: Dict[str, float]) -> str:
+        statistics = self.engine.statistics
+        known = [
+            throughput for backend_id in weights if (throughput := statistics[backend_id].write_throughput) is not None
+        ]
+        if not known:
+            return super().choose(obj, weights)
+        average = sum(known) / len(known)
+        throughput_weights = {}
+        for backend_id, weight in weights.items():
+            throughput = statistics[backend_id].write_throughput
+            throughput_weights[backend_id] = weight * (throughput if throughput is not None else average) / average
+        return super().choose(obj, throughput_weights)
+
+
+class ConsistentHashPlacement(PlacementStrategy):
+    """Place all objects of a history (or user) on the same backend.
+
+    Uses weighted rendezvous hashing, so adding or removing a backend only
+    moves the histories that were (or will be) placed on that backend.
+    """
+
+    def choose(self, obj, weights: Dict[str, float]) -> str:
+        key = placement_key(obj, self.engine.locality)
+        if key is None:
+            return super().choose(obj, weights)
+        return max(weights, key=lambda backend_id: _rendezvous_score(key, backend_id, weights[backend_id]))
+
+
+def _rendezvous_score(key: str, backend_id: str, weight: float) -> float:
+    digest = hashlib.sha256(f"{key}:{backend_id}".encode()).digest()
+    # map the hash to (0, 1)
+    uniform = (int.from_bytes(digest[:8], "big") + 1) / (2**64 + 1)
+    return -weight / math.log(uniform)
+
+
+def placement_key(obj, locality: str) -> Optional[str]:
+    """Return the id of the history or user ``obj`` belongs to, if known.
+
+    Jobs carry the ids themselves, datasets are attributed to the job that
+    created them.
+    """
+    attribute = f"{locality}_id"
+    owner = obj if hasattr(obj, attribute) else getattr(obj, "job", None)
+    value = getattr(owner, attribute, None) if owner is not None else None
+    if value is None:
+        return None
+    return f"{locality}:{value}"
+
+
+PLACEMENT_STRATEGIES: Dict[str, Type[PlacementStrategy]] = {
+    "weighted": WeightedRandomPlacement,
+    "free_space": FreeSpacePlacement,
+    "throughput": ThroughputPlacement,
+    "consistent_hash": ConsistentHashPlacement,
+}
+
+
+class PlacementEngine:
+    """Choose backends for new objects and keep statistics about the choices."""
+
+    def __init__(
+        self,
+        usage_percent: Callable[[str], float],
+        backend_ids: Iterable[str],
+        strategy: str = DEFAULT_PLACEMENT_STRATEGY,
+        locality: str = DEFAULT_PLACEMENT_LOCALITY,
+        usage_refresh_interval: float = DEFAULT_USAGE_REFRESH_INTERVAL,
+        max_percent_full: Optional[Dict[str, float]] = None,
+    ):
+        if strategy not in PLACEMENT_STRATEGIES:
+            raise Exception(f"Unknown object store placement strategy '{strategy}'")
+        if locality not in ("history", "user"):
+            raise Exception(f"Unknown object store placement locality '{locality}'")
+        self.strategy_name = strategy
+        self.strategy = PLACEMENT_STRATEGIES[strategy](self)
+        self.locality = locality
+        self.usage_refresh_interval = usage_refresh_interval
+        self.max_percent_full = max_percent_full or {}
+        self.statistics: Dict[str, BackendStatistics] = {backend_id: BackendStatistics() for backend_id in backend_ids}
+        self._usage_percent = usage_percent
+        self._lock = threading.Lock()
+
+    def select(self, obj, weighted_backend_ids: Iterable[str]) -> str:
+        """Choose a backend for ``obj`` among backends repeated according to their weight.
+
+        Raises ``IndexError`` if there is no backend to choose from, i.e. if all
+        backends are full.
+        """
+        weights: Dict[str, float] = dict(Counter(weighted_backend_ids))
+        if self.max_percent_full:
+            # react to backends filling up between runs of the filesystem monitor
+            weights = {backend_id: weight for backend_id, weight in weights.items() if not self._is_full(backend_id)}
+        if not weights:
+            raise IndexError("No backend available for placement")
+        backend_id = self.strategy.choose(obj, weights)
+        with self._lock:
+            self.statistics[backend_id].placements += 1
+        return backend_id
+
+    def record_write(self, backend_id: str, size: int, seconds: float) -> None:
+        statistics = self.statistics.get(backend_id)
+        if statistics is not None:
+            with self._lock:
+                statistics.record_write(size, seconds)
+
+    def usage_percent(self, backend_id: str) -> Optional[float]:
+        """Return how full a backend is, checking at most every ``usage_refresh_interval`` seconds."""
+        statistics = self.statistics[backend_id]
+        now = time.time()
+        if statistics.usage_checked is None or now - statistics.usage_checked >= self.usage_refresh_interval:
+            try:
+                statistics.usage_percent = self._usage_percent(backend_id)
+            except NotImplementedError:
+                statistics.usage_percent = None
+            except Exception:
+                log.exception("Failed to check usage of object store backend '%s'", backend_id)
+            statistics.usage_checked = now
+        return statistics.usage_percent
+
+    def _is_full(self, backend_id: str) -> bool:
+        max_percent_full = self.max_percent_full.get(backend_id)
+        if not max_percent_full:
+            return False
+        usage_percent = self.usage_percent(backend_id)
+        return usage_percent is not None and usage_percent > max_percent_full
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the placement statistics of all backends."""
+        with self._lock:
+            return {
+                "strategy": self.strategy_name,
+                "backends": {backend_id: statistics.to_dict() for backend_id, statistics in self.statistics.items()},
+            }
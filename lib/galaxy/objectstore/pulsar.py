@@ -49,7 +49,7 @@ class PulsarObjectStore(BaseObjectStore):
     def _get_filename(self, obj, **kwds) -> str:
         return self.pulsar_client.get_filename(**self.__build_kwds(obj, **kwds))
 
-    def _update_from_file(self, obj, **kwds) -> None:
+    def _update_from_file(self, obj, defer_push: bool = False, **kwds) -> None:
         return self.pulsar_client.update_from_file(**self.__build_kwds(obj, **kwds))
 
     def _get_store_usage_percent(self):
@@ -511,7 +511,13 @@ class RucioObjectStore(CachingConcreteObjectStore):
         return
 
     def _update_from_file(
-        self, obj, file_name=None, create: bool = False, preserve_symlinks: bool = False, **kwargs
+        self,
+        obj,
+        file_name=None,
+        create: bool = False,
+        preserve_symlinks: bool = False,
+        defer_push: bool = False,
+        **kwargs,
     ) -> None:
         rel_path = self._construct_path(obj, **kwargs)
         log.debug("rucio _update_from_file: %s", rel_path)
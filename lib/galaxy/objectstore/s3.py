@@ -6,6 +6,7 @@ import logging
 import os
 import time
 from datetime import datetime
+from typing import Optional
 
 try:
     # Imports are done this way to allow objectstore code to be used outside of Galaxy.
@@ -18,7 +19,11 @@ except ImportError:
 
 from galaxy.util import string_as_bool
 from ._caching_base import CachingConcreteObjectStore
-from ._util import UsesAxel
+from ._util import (
+    open_url_range,
+    RangeReader,
+    UsesAxel,
+)
 from .caching import (
     enable_cache_monitor,
     parse_caching_config_dict_from_xml,
@@ -136,11 +141,7 @@ class CloudConfigMixin:
                 "conn_path": self.conn_path,
                 "region": self.region,
             },
-            "cache": {
-                "size": self.cache_size,
-                "path": self.staging_path,
-                "cache_updated_data": self.cache_updated_data,
-            },
+            "cache": self._cache_config_to_dict(),
         }
 
 
@@ -326,6 +327,15 @@ class S3ObjectStore(CachingConcreteObjectStore, CloudConfigMixin, UsesAxel):
             log.exception("Problem downloading key '%s' from S3 bucket '%s'", rel_path, self._bucket.name)
         return False
 
+    def _open_remote_range(self, rel_path: str, start: int, length: Optional[int]) -> Optional[RangeReader]:
+        try:
+            key = self._bucket.get_key(rel_path)
+            if key is not None:
+                return open_url_range(key.generate_url(7200), start, length)
+        except Exception:
+            log.exception("Problem opening range of key '%s' in S3 bucket '%s'", rel_path, self._bucket.name)
+        return None
+
     def _push_to_storage(self, rel_path, source_file=None, from_string=None):
         """
         Push the file pointed to by ``rel_path`` to the object store naming the key
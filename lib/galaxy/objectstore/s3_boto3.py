@@ -7,6 +7,7 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Optional,
     TYPE_CHECKING,
 )
 
@@ -30,6 +31,7 @@ except ImportError:
 
 from galaxy.util import asbool
 from ._caching_base import CachingConcreteObjectStore
+from ._util import RangeReader
 from .caching import (
     enable_cache_monitor,
     parse_caching_config_dict_from_xml,
@@ -282,11 +284,7 @@ class S3ObjectStore(CachingConcreteObjectStore):
                 "region": self.region,
             },
             "transfer": self.transfer_dict,
-            "cache": {
-                "size": self.cache_size,
-                "path": self.staging_path,
-                "cache_updated_data": self.cache_updated_data,
-            },
+            "cache": self._cache_config_to_dict(),
         }
 
     def to_dict(self):
@@ -321,12 +319,22 @@ class S3ObjectStore(CachingConcreteObjectStore):
             if not self._caching_allowed(rel_path):
                 return False
             config = self._transfer_config("download")
-            self._client.download_file(self.bucket, rel_path, local_destination, Config=config)
+            with self._atomic_cache_file(rel_path) as download_path:
+                self._client.download_file(self.bucket, rel_path, download_path, Config=config)
             return True
         except ClientError:
             log.exception("Failed to download file from S3")
         return False
 
+    def _open_remote_range(self, rel_path: str, start: int, length: Optional[int]) -> Optional[RangeReader]:
+        end = "" if length is None else start + length - 1
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=rel_path, Range=f"bytes={start}-{end}")
+        except ClientError:
+            log.exception("Failed to open range of '%s' in S3", rel_path)
+            return None
+        return RangeReader(response["Body"], start, length)
+
     def _push_string_to_path(self, rel_path: str, from_string: str) -> bool:
         try:
             self._client.put_object(Body=from_string.encode("utf-8"), Bucket=self.bucket, Key=rel_path)
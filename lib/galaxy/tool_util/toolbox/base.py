@@ -42,6 +42,10 @@ from .panel import (
     ToolSection,
     ToolSectionLabel,
 )
+from .parallel import (
+    expand_tool_documents,
+    ExpandedToolDocument,
+)
 from .parser import (
     ensure_tool_conf_item,
     get_toolbox_parser,
@@ -174,6 +178,8 @@ class AbstractToolBox(ManagesIntegratedToolPanelMixin):
         # In-memory dictionary that defines the layout of the tool panel.
         self._tool_panel = ToolPanelElements()
         self._index = 0
+        # Tool XML files expanded in worker processes, consumed when the tools are created.
+        self._expanded_tool_documents: Dict[str, ExpandedToolDocument] = {}
         self.data_manager_tools = {}
         self._lineage_map = LineageMap(app)
         # Sets self._integrated_tool_panel and self._integrated_tool_panel_config_has_contents
@@ -276,23 +282,78 @@ class AbstractToolBox(ManagesIntegratedToolPanelMixin):
             directory_contents = sorted(os.listdir(config_directory))
             directory_config_files = [config_file for config_file in directory_contents if config_file.endswith(".xml")]
             config_filenames.extend(directory_config_files)
+        tool_loading_processes = getattr(self.app.config, "tool_loading_processes", 1) or 1
+        if tool_loading_processes > 1:
+            self._expand_tool_documents(config_filenames, tool_loading_processes)
+        try:
+            for config_filename in config_filenames:
+                if not self.can_load_config_file(config_filename):
+                    continue
+                try:
+                    self._init_tools_from_config(config_filename)
+                except etree.ParseError:
+                    # Occasionally we experience "Missing required parameter 'shed_tool_conf'."
+                    # This happens if parsing the shed_tool_conf fails, so we just sleep a second and try again.
+                    # TODO: figure out why this fails occasionally (try installing hundreds of tools in batch ...).
+                    time.sleep(1)
+                    try:
+                        self._init_tools_from_config(config_filename)
+                    except Exception:
+                        raise
+                except Exception:
+                    log.exception("Error loading tools defined in config %s", config_filename)
+        finally:
+            # Drop documents of tools that were not created, e.g. duplicates.
+            self._expanded_tool_documents.clear()
+        log.debug("Reading tools from config files finished %s", execution_timer)
+
+    def _expand_tool_documents(self, config_filenames, processes):
+        """Parse and macro-expand the XML tools of the tool config files in worker processes.
+
+        Tools found in the tool cache or the tool document cache are skipped.
+        """
+        execution_timer = ExecutionTimer()
+        tool_files = []
+        seen_paths = set()
         for config_filename in config_filenames:
             if not self.can_load_config_file(config_filename):
                 continue
             try:
-                self._init_tools_from_config(config_filename)
-            except etree.ParseError:
-                # Occasionally we experience "Missing required parameter 'shed_tool_conf'."
-                # This happens if parsing the shed_tool_conf fails, so we just sleep a second and try again.
-                # TODO: figure out why this fails occasionally (try installing hundreds of tools in batch ...).
-                time.sleep(1)
-                try:
-                    self._init_tools_from_config(config_filename)
-                except Exception:
-                    raise
+                tool_conf_source = get_toolbox_parser(config_filename)
             except Exception:
-                log.exception("Error loading tools defined in config %s", config_filename)
-        log.debug("Reading tools from config files finished %s", execution_timer)
+                # Reported when the tools of the config file are loaded.
+                continue
+            tool_path = self.__resolve_tool_path(tool_conf_source.parse_tool_path(), config_filename)
+            tool_cache_data_dir = tool_conf_source.parse_tool_cache_data_dir()
+            for concrete_path in self._tool_item_paths(tool_conf_source.parse_items(), tool_path):
+                if concrete_path in seen_paths:
+                    continue
+                seen_paths.add(concrete_path)
+                if (
+                    concrete_path.endswith(".xml")
+                    and os.path.exists(concrete_path)
+                    and not self.load_tool_from_cache(concrete_path)
+                    and not self._tool_document_cached(concrete_path, tool_cache_data_dir)
+                ):
+                    tool_files.append(concrete_path)
+        log.debug("Collected %d tool files to expand %s", len(tool_files), execution_timer)
+        execution_timer = ExecutionTimer()
+        self._expanded_tool_documents = expand_tool_documents(tool_files, processes)
+        log.debug(
+            "Expanded %d tool files in %d processes %s", len(self._expanded_tool_documents), processes, execution_timer
+        )
+
+    def _tool_item_paths(self, items, tool_path):
+        for item in items:
+            item = ensure_tool_conf_item(item)
+            if item.type == "tool":
+                path = string.Template(item.get("file")).safe_substitute(**self._path_template_kwds())
+                yield os.path.join(tool_path, path)
+            elif item.type == "section":
+                yield from self._tool_item_paths(item.items, tool_path)
+
+    def _tool_document_cached(self, config_file, tool_cache_data_dir):
+        return False
 
     def _init_tools_from_config(self, config_filename):
         """
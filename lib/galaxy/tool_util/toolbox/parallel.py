@@ -0,0 +1,52 @@
+"""Parsing and macro expansion of tool XML files in worker processes.
+
+Parsing tool XML files and expanding their macros takes most of the time spent
+loading a large toolbox, and it is independent for each tool. The expanded
+documents are sent back to the main process as strings (lxml trees can't be
+pickled), in the format of the tool document cache. Tools are then created from
+them in the main process, in the order of the tool config files.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+from galaxy.tool_util.parser import get_tool_source
+
+log = logging.getLogger(__name__)
+
+ExpandedToolDocument = Dict[str, Any]
+
+
+def expand_tool_document(config_file: str) -> Optional[ExpandedToolDocument]:
+    """Parse the XML tool ``config_file`` and expand its macros."""
+    try:
+        tool_source = get_tool_source(config_file, enable_beta_formats=False)
+    except Exception:
+        # The tool is loaded again in the main process, which records the error.
+        return None
+    return {"document": tool_source.to_string(), "macro_paths": tool_source.macro_paths}
+
+
+def expand_tool_documents(config_files: List[str], processes: int) -> Dict[str, ExpandedToolDocument]:
+    """Expand the XML tools ``config_files`` in ``processes`` worker processes.
+
+    Tools that can't be expanded are left out of the result.
+    """
+    if not config_files:
+        return {}
+    chunksize = max(1, len(config_files) // (processes * 4))
+    try:
+        # Worker processes are spawned rather than forked, the main process may already run threads.
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+            documents = list(executor.map(expand_tool_document, config_files, chunksize=chunksize))
+    except Exception:
+        log.exception("Failed to expand tool documents in worker processes, tools are loaded sequentially")
+        return {}
+    return {config_file: document for config_file, document in zip(config_files, documents) if document}
@@ -564,21 +564,32 @@ class ToolBox(AbstractToolBox):
 
     def create_tool(self, config_file: str, tool_cache_data_dir=None, **kwds):
         cache = self.get_cache_region(tool_cache_data_dir)
+        # Set if the tool was expanded in a worker process while loading the toolbox.
+        expanded_document = self._expanded_tool_documents.pop(config_file, None)
         if config_file.endswith(".xml") and cache and not cache.disabled:
             tool_document = cache.get(config_file)
             if tool_document:
-                tool_source = self.get_expanded_tool_source(
-                    config_file=config_file,
-                    xml_tree=parse_xml_string_to_etree(tool_document["document"]),
-                    macro_paths=tool_document["macro_paths"],
-                )
+                tool_source = self._tool_source_from_document(config_file, tool_document)
             else:
-                tool_source = self.get_expanded_tool_source(config_file)
+                tool_source = self._tool_source_from_document(config_file, expanded_document)
                 cache.set(config_file, tool_source)
         else:
-            tool_source = self.get_expanded_tool_source(config_file)
+            tool_source = self._tool_source_from_document(config_file, expanded_document)
         return self._create_tool_from_source(tool_source, config_file=config_file, **kwds)
 
+    def _tool_source_from_document(self, config_file, tool_document):
+        if not tool_document:
+            return self.get_expanded_tool_source(config_file)
+        return self.get_expanded_tool_source(
+            config_file=config_file,
+            xml_tree=parse_xml_string_to_etree(tool_document["document"]),
+            macro_paths=tool_document["macro_paths"],
+        )
+
+    def _tool_document_cached(self, config_file, tool_cache_data_dir):
+        cache = self.get_cache_region(tool_cache_data_dir)
+        return bool(cache and not cache.disabled and cache.get(config_file))
+
     def get_expanded_tool_source(self, config_file, **kwargs):
         try:
             return get_tool_source(
@@ -845,6 +856,8 @@ class Tool(UsesDictVisibleKeys):
         self._is_workflow_compatible = None
         self.__help = None
         self.__tests: Optional[str] = None
+        # Set if the tests of the tool are parsed on first access of `tests`
+        self._parse_tests_lazily = False
         try:
             self.parse(tool_source, guid=guid, dynamic=dynamic)
         except Exception as e:
@@ -1173,7 +1186,12 @@ class Tool(UsesDictVisibleKeys):
 
         if self.app.is_webapp:
             self.raw_help = self.__get_help_with_images(tool_source.parse_help())
-            self.parse_tests()
+            if self.config_file is not None:
+                # Tests are rarely needed (tool test API, tool shed metadata), defer parsing them
+                # to speed up loading the toolbox. The tool source can be loaded again from config_file.
+                self._parse_tests_lazily = True
+            else:
+                self.parse_tests()
         self.__parse_legacy_features(tool_source)
 
         # Load any tool specific options (optional)
@@ -1332,17 +1350,33 @@ class Tool(UsesDictVisibleKeys):
         if (trackster_conf := tool_source.root.find("trackster_conf")) is not None:
             self.trackster_conf = TracksterConfig.parse(trackster_conf)
 
-    def parse_tests(self):
-        if self.tool_source:
-            test_descriptions = parse_tool_test_descriptions(self.tool_source, self.id)
+    def parse_tests(self, tool_source: Optional[ToolSource] = None):
+        tool_source = tool_source or self.tool_source
+        if tool_source:
+            test_descriptions = parse_tool_test_descriptions(tool_source, self.id)
             try:
                 self.__tests = json.dumps([t.to_dict() for t in test_descriptions], indent=None)
             except Exception:
                 self.__tests = None
                 log.exception("Failed to parse tool tests for tool '%s'", self.id)
 
+    def _tool_source_for_tests(self) -> ToolSource:
+        if getattr(self.tool_source, "mem_optimize", None) is None:
+            return self.tool_source
+        # The XML tree of the tool has been discarded after loading the tool, rebuild it from the
+        # serialized source the tool was loaded from (the file on disk may have changed since).
+        return get_tool_source(
+            tool_source_class=type(self.tool_source).__name__, raw_tool_source=self.tool_source.to_string()
+        )
+
     @property
     def tests(self):
+        if self._parse_tests_lazily:
+            self._parse_tests_lazily = False
+            try:
+                self.parse_tests(self._tool_source_for_tests())
+            except Exception:
+                log.exception("Failed to load tool tests for tool '%s'", self.id)
         if self.__tests:
             return [ToolTestDescription(d) for d in json.loads(self.__tests)]
         return None
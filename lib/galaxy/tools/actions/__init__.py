@@ -36,6 +36,7 @@ from galaxy.model import (
 from galaxy.model.base import transaction
 from galaxy.model.dataset_collections.builder import CollectionBuilder
 from galaxy.model.dataset_collections.matching import MatchingCollections
+from galaxy.model.job_cache import set_job_cache_fingerprint
 from galaxy.model.none_like import NoneDataset
 from galaxy.objectstore import ObjectStorePopulator
 from galaxy.tools._types import ToolStateJobInstancePopulatedT
@@ -954,6 +955,7 @@ class DefaultToolAction(ToolAction):
 
         for name, value in tool.params_to_strings(incoming, trans.app).items():
             job.add_parameter(name, value)
+        set_job_cache_fingerprint(job, tool.inputs)
         self._record_input_datasets(trans, job, inp_data)
 
     def _record_outputs(self, job, out_data, output_collections):
@@ -5,6 +5,7 @@ collections from matched collections.
 """
 
 import collections
+import contextlib
 import logging
 import typing
 from abc import abstractmethod
@@ -183,15 +184,18 @@ def execute(
     execution_slice = None
     job_datasets: Dict[str, List[model.DatasetInstance]] = {}  # job: list of dataset instances created by job
 
-    for i, execution_slice in enumerate(execution_tracker.new_execution_slices()):
-        if max_num_jobs is not None and jobs_executed >= max_num_jobs:
-            has_remaining_jobs = True
-            break
-        else:
-            skip = execution_slice.param_combination.pop("__when_value__", None) is False
-            execute_single_job(execution_slice, completed_jobs[i], skip=skip)
-            history = execution_slice.history or history
-            jobs_executed += 1
+    # Allocate the hids of the outputs of all jobs at once instead of once per job. Without
+    # a history the tool action creates the default history and outputs are added per job.
+    with history.defer_pending_items() if history else contextlib.nullcontext():
+        for i, execution_slice in enumerate(execution_tracker.new_execution_slices()):
+            if max_num_jobs is not None and jobs_executed >= max_num_jobs:
+                has_remaining_jobs = True
+                break
+            else:
+                skip = execution_slice.param_combination.pop("__when_value__", None) is False
+                execute_single_job(execution_slice, completed_jobs[i], skip=skip)
+                history = execution_slice.history or history
+                jobs_executed += 1
 
     if execution_slice:
         history.add_pending_items()
@@ -29,9 +29,11 @@ import logging
 import os
 import re
 import shutil
+import threading
 from typing import (
     Dict,
     List,
+    Optional,
     Union,
 )
 
@@ -55,6 +57,7 @@ from whoosh.scoring import (
     Frequency,
     MultiWeighting,
 )
+from whoosh.searching import Searcher
 from whoosh.writing import AsyncWriter
 
 from galaxy.config import GalaxyAppConfiguration
@@ -110,8 +113,10 @@ class ToolBoxSearch:
 
     def build_index(self, tool_cache, toolbox, index_help: bool = True) -> None:
         self.index_count += 1
+        # Documents don't depend on the panel view, create them (and read the help of tools) only once.
+        tool_docs: Dict[str, Dict[str, str]] = {}
         for panel_search in self.panel_searches.values():
-            panel_search.build_index(tool_cache, toolbox, index_help=index_help)
+            panel_search.build_index(tool_cache, toolbox, index_help=index_help, tool_docs=tool_docs)
 
     def search(self, *args, **kwd) -> List[str]:
         panel_view = kwd.pop("panel_view")
@@ -197,17 +202,47 @@ class ToolPanelViewSearch:
         self.index_dir = index_dir
         self.panel_view_id = panel_view_id
         self.index = self._index_setup()
+        self.parser = MultifieldParser(
+            [
+                "id",
+                "id_exact",
+                "name",
+                "name_exact",
+                "description",
+                "section",
+                "edam_operations",
+                "edam_topics",
+                "repository",
+                "owner",
+                "help",
+                "labels",
+                "stub",
+            ],
+            schema=self.schema,
+            group=OrGroup,
+        )
+        # Searchers are not thread safe, each thread keeps its own.
+        self._local = threading.local()
 
     def _index_setup(self) -> index.Index:
         """Get or create a reference to the index."""
         return get_or_create_index(self.index_dir, self.schema)
 
-    def build_index(self, tool_cache, toolbox, index_help: bool = True) -> None:
+    def build_index(
+        self,
+        tool_cache,
+        toolbox,
+        index_help: bool = True,
+        tool_docs: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> None:
         """Prepare search index for tools loaded in toolbox.
 
         Use `tool_cache` to determine which tools need indexing and which
-        should be removed.
+        should be removed. Documents are looked up in (and added to)
+        `tool_docs` by tool id, so that they can be shared between panel views.
         """
+        if tool_docs is None:
+            tool_docs = {}
         log.debug(f"Starting to build toolbox index of panel {self.panel_view_id}.")
         execution_timer = ExecutionTimer()
 
@@ -221,18 +256,30 @@ class ToolPanelViewSearch:
             tool_cache,
         )
 
+        if not tool_ids_to_remove and not tools_to_index:
+            # Don't commit an empty generation, searchers would be reopened for nothing.
+            log.debug("Toolbox index of panel %s is up to date %s", self.panel_view_id, execution_timer)
+            return
+
         with AsyncWriter(self.index) as writer:
             for tool_id in tool_ids_to_remove:
                 writer.delete_by_term("id", tool_id)
             for tool in tools_to_index:
-                add_doc_kwds = self._create_doc(
-                    tool=tool,
-                    index_help=index_help,
-                )
+                if tool.id not in tool_docs:
+                    tool_docs[tool.id] = self._create_doc(
+                        tool=tool,
+                        index_help=index_help,
+                    )
                 # Add tool document to index (or overwrite if existing)
-                writer.update_document(**add_doc_kwds)
-
-        log.debug("Toolbox index of panel %s finished %s", self.panel_view_id, execution_timer)
+                writer.update_document(**tool_docs[tool.id])
+
+        log.debug(
+            "Toolbox index of panel %s finished, indexed %d and removed %d tools %s",
+            self.panel_view_id,
+            len(tools_to_index),
+            len(tool_ids_to_remove),
+            execution_timer,
+        )
 
     def _get_tools_to_remove(self, tool_cache) -> list:
         """Return list of tool IDs to be removed from index."""
@@ -255,8 +302,10 @@ class ToolPanelViewSearch:
     def _get_tool_list(self, toolbox, tool_cache) -> list:
         """Return list of tools to add and remove from index."""
         tools_to_index = []
+        # Tools changed on disk were removed from the cache and loaded again, they are indexed again.
+        up_to_date_tool_ids = self.indexed_tool_ids - tool_cache._removed_tool_ids
 
-        for tool_id in tool_cache._new_tool_ids - self.indexed_tool_ids:
+        for tool_id in tool_cache._new_tool_ids - up_to_date_tool_ids:
             tool = toolbox.get_tool(tool_id)
             if tool and tool.is_latest_version and toolbox.panel_has_tool(tool, self.panel_view_id):
                 if tool.hidden:
@@ -328,35 +377,8 @@ class ToolPanelViewSearch:
         config: GalaxyAppConfiguration,
     ) -> List[str]:
         """Perform search on the in-memory index."""
-        # Change field boosts for searcher
-        self.searcher = self.index.searcher(
-            weighting=MultiWeighting(
-                Frequency(),
-                help=BM25F(K1=config.tool_help_bm25f_k1),
-            )
-        )
-        fields = [
-            "id",
-            "id_exact",
-            "name",
-            "name_exact",
-            "description",
-            "section",
-            "edam_operations",
-            "edam_topics",
-            "repository",
-            "owner",
-            "help",
-            "labels",
-            "stub",
-        ]
-        self.parser = MultifieldParser(
-            fields,
-            schema=self.schema,
-            group=OrGroup,
-        )
         parsed_query = self.parser.parse(q)
-        hits = self.searcher.search(
+        hits = self._searcher(config).search(
             parsed_query,
             limit=None,
             sortedby="",
@@ -364,3 +386,24 @@ class ToolPanelViewSearch:
         )
 
         return [hit["id"] for hit in hits]
+
+    def _searcher(self, config: GalaxyAppConfiguration) -> Searcher:
+        """Return the searcher of the current thread.
+
+        The searcher is only reopened if the index has changed, e.g. because
+        it was updated by another process, and then reuses the readers of
+        unchanged segments.
+        """
+        searcher = getattr(self._local, "searcher", None)
+        if searcher is None:
+            # Change field boosts for searcher
+            searcher = self.index.searcher(
+                weighting=MultiWeighting(
+                    Frequency(),
+                    help=BM25F(K1=config.tool_help_bm25f_k1),
+                )
+            )
+        else:
+            searcher = searcher.refresh()
+        self._local.searcher = searcher
+        return searcher
@@ -1,7 +1,19 @@
 """Entry point for the usage of Cheetah templating within Galaxy."""
 
+import hashlib
+import logging
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from lib2to3.refactor import RefactoringTool
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from Cheetah.Compiler import Compiler
 from Cheetah.NameMapper import NotFound
@@ -13,10 +25,16 @@ from past.translation import myfixes
 from galaxy.util.tree_dict import TreeDict
 from . import unicodify
 
+log = logging.getLogger(__name__)
+
 # Skip libpasteurize fixers, which make sure code is py2 and py3 compatible.
 # This is not needed, we only translate code on py3.
 myfixes = [f for f in myfixes if not f.startswith("libpasteurize")]
 refactoring_tool = RefactoringTool(myfixes, {"print_function": True})
+# Number of compiled templates kept by fill_template, a few per tool used by jobs.
+COMPILED_TEMPLATE_CACHE_SIZE = 1000
+# Seconds between debug log lines reporting the hit rate of the compiled template cache.
+COMPILED_TEMPLATE_CACHE_REPORT_INTERVAL = 600
 
 
 class InputNotFoundSyntaxError(SyntaxError):
@@ -24,7 +42,7 @@ class InputNotFoundSyntaxError(SyntaxError):
 
 
 class FixedModuleCodeCompiler(Compiler):
-    module_code = None
+    module_code: Optional[str] = None
 
     def getModuleCode(self):
         self._moduleDef = self.module_code
@@ -39,6 +57,99 @@ def create_compiler_class(module_code):
     return CustomCompilerClass
 
 
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CompiledTemplateCache:
+    """Process wide LRU cache of compiled Cheetah template classes.
+
+    Templates are keyed by a digest of their text and the compiler class.
+    Retries of ``fill_template`` create a new compiler class with fixed
+    module code each time, these are keyed by a digest of that code.
+    Cheetah's own compilation cache is bypassed, it is unbounded and keyed
+    by ``hash()`` of the template text. Hits and misses are logged every
+    ``report_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = COMPILED_TEMPLATE_CACHE_SIZE,
+        report_interval: float = COMPILED_TEMPLATE_CACHE_REPORT_INTERVAL,
+    ):
+        self.maxsize = maxsize
+        self.report_interval = report_interval
+        self.hits = 0
+        self.misses = 0
+        self._classes: OrderedDict[Tuple[str, Any], Type[Template]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_report = time.monotonic() + report_interval
+
+    def compile(self, template_text: str, compiler_class: Type[Compiler]) -> Type[Template]:
+        """Return the compiled template class for ``template_text``, compiling it on a miss."""
+        compiler_key: Any = compiler_class
+        if issubclass(compiler_class, FixedModuleCodeCompiler) and compiler_class.module_code is not None:
+            compiler_key = _digest(compiler_class.module_code)
+        key = (_digest(template_text), compiler_key)
+        with self._lock:
+            if time.monotonic() >= self._next_report:
+                self._report()
+            klass = self._classes.get(key)
+            if klass is not None:
+                self._classes.move_to_end(key)
+                self.hits += 1
+                return klass
+            self.misses += 1
+        # Compile outside of the lock, compiling the same template twice concurrently is harmless.
+        klass = Template.compile(
+            source=template_text,
+            compilerClass=compiler_class,
+            cacheCompilationResults=False,
+            useCache=False,
+            keepRefToGeneratedCode=True,
+        )
+        with self._lock:
+            self._classes[key] = klass
+            while len(self._classes) > self.maxsize:
+                self._classes.popitem(last=False)
+        return klass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._classes.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the size and hit rate of the cache."""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._classes),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _report(self) -> None:
+        stats = self._stats()
+        log.debug(
+            "Compiled template cache: %d hits, %d misses (%.1f%% hit rate), %d of %d templates",
+            stats["hits"],
+            stats["misses"],
+            100 * stats["hit_rate"],
+            stats["size"],
+            stats["maxsize"],
+        )
+        self._next_report = time.monotonic() + self.report_interval
+
+
+compiled_template_cache = CompiledTemplateCache()
+
+
 def fill_template(
     template_text,
     context=None,
@@ -62,7 +173,7 @@ def fill_template(
     if isinstance(python_template_version, str):
         python_template_version = Version(python_template_version)
     try:
-        klass = Template.compile(source=template_text, compilerClass=compiler_class)
+        klass = compiled_template_cache.compile(template_text, compiler_class)
     except ParseError as e:
         # Might happen on invalid syntax within a cheetah statement, like `#if $smxsize <> 128.0`
         if first_exception is None:
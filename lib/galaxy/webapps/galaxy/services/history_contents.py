@@ -989,6 +989,7 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
         serialization_params = self._handle_extra_serialization_for_media_type(serialization_params, accept)
         filter_query_params.order = filter_query_params.order or "hid-asc"
         order_by = self.build_order_by(self.history_contents_manager, filter_query_params.order)
+        contained_as_rows = self._can_serialize_dataset_rows(params, serialization_params, filters)
         contents = self.history_contents_manager.contents(
             history,
             filters=filters,
@@ -996,13 +997,19 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
             offset=filter_query_params.offset,
             order_by=order_by,
             serialization_params=serialization_params,
+            contained_as_rows=contained_as_rows,
         )
+        user_role_ids = self._user_role_ids(trans) if contained_as_rows else None
         items = [
-            self._serialize_content_item(
-                trans,
-                content,
-                dataset_details=params.dataset_details,
-                serialization_params=serialization_params,
+            (
+                self._serialize_dataset_row(trans, content, serialization_params, user_role_ids)
+                if isinstance(content, dict)
+                else self._serialize_content_item(
+                    trans,
+                    content,
+                    dataset_details=params.dataset_details,
+                    serialization_params=serialization_params,
+                )
             )
             for content in contents
         ]
@@ -1043,6 +1050,65 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
             view = "element" if detailed else "collection"
             return self.__collection_dict(trans, content, view=view)
 
+    def _can_serialize_dataset_rows(
+        self,
+        params: HistoryContentsIndexParams,
+        serialization_params: SerializationParams,
+        filters,
+    ) -> bool:
+        """
+        Whether the datasets of an index request can be serialized from rows
+        instead of models, see `HDASerializer.serialize_row`.
+        """
+        if not self.hda_serializer.app.config.history_contents_row_serialization:
+            return False
+        if params.dataset_details or self.history_contents_filters.contains_non_orm_filter(filters):
+            return False
+        view = serialization_params.view or "summary"
+        if view not in self.hda_serializer.views:
+            return False
+        keys = self.hda_serializer._view_to_keys(view) + (serialization_params.keys or [])
+        return self.hda_serializer.can_serialize_rows(keys)
+
+    def _user_role_ids(self, trans) -> Optional[Set[int]]:
+        """Return the ids of the roles of the current user, None for admins."""
+        if trans.user_is_admin:
+            return None
+        if trans.user is None:
+            return set()
+        return {role.id for role in trans.user.all_roles_exploiting_cache()}
+
+    def _serialize_dataset_row(
+        self,
+        trans,
+        row: Dict[str, Any],
+        serialization_params: SerializationParams,
+        user_role_ids: Optional[Set[int]],
+    ):
+        view = serialization_params.view or "summary"
+        keys = self.hda_serializer._view_to_keys(view) + (serialization_params.keys or [])
+        rval = self.hda_serializer.serialize_row(
+            row, keys, user_role_ids, user=trans.user, trans=trans, encode_id=False
+        )
+        if rval is None:
+            # Datasets the user can't access are serialized with the keys of the inaccessible view
+            hda = trans.sa_session.get(HistoryDatasetAssociation, row["id"])
+            return self._serialize_content_item(
+                trans, hda, dataset_details=None, serialization_params=serialization_params
+            )
+        # Override URL generation to use UrlBuilder
+        if trans.url_builder and rval.get("url"):
+            rval["url"] = self._content_url(trans, rval)
+        return rval
+
+    def _content_url(self, trans, rval):
+        return trans.url_builder(
+            "history_content_typed",
+            history_id=self.encode_id(rval["history_id"]),
+            id=self.encode_id(rval["id"]),
+            type=rval["history_content_type"],
+        )
+
     def _serialize_content_item(
         self,
         trans,
@@ -1075,12 +1141,7 @@ class HistoriesContentsService(ServiceBase, ServesExportStores, ConsumesModelSto
         # Override URL generation to use UrlBuilder
         if trans.url_builder:
             if rval.get("url"):
-                rval["url"] = trans.url_builder(
-                    "history_content_typed",
-                    history_id=self.encode_id(rval["history_id"]),
-                    id=self.encode_id(rval["id"]),
-                    type=rval["history_content_type"],
-                )
+                rval["url"] = self._content_url(trans, rval)
             if rval.get("contents_url"):
                 rval["contents_url"] = trans.url_builder(
                     "contents_dataset_collection",
@@ -0,0 +1,182 @@
+"""
+Tracking of active workflow invocations that may be able to make progress.
+
+The workflow request monitor normally loads and re-evaluates every active
+invocation on each iteration, although most of them are waiting on jobs that
+have not changed. :class:`DirtyInvocationTracker` only reports invocations as
+dirty, i.e. worth re-evaluating, if something that could unblock them changed
+since they were last evaluated:
+
+- the invocation itself changed (it is new, was cancelled, materialized, ...),
+- a job in the invocation's history changed, which includes the jobs of the
+  invocation and its subworkflows and the jobs producing its inputs,
+- another invocation in the same history changed, which may release an
+  invocation held back by ``history_local_serial_workflow_scheduling``.
+
+Changes are found through the indexed ``update_time`` columns of the ``job``
+and ``workflow_invocation`` tables. Re-evaluating an invocation that scheduled
+new jobs makes it dirty again, so invocations limited by
+``maximum_workflow_jobs_per_scheduling_iteration`` keep making progress, while
+``WorkflowInvocation.set_state`` doesn't update invocations that are still
+delayed and keep their state. All
+active invocations are reported as dirty every ``resync_interval`` seconds as a
+safety net for changes that are not covered above, e.g. inputs produced in
+another history.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from collections import defaultdict
+from itertools import zip_longest
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import (
+    and_,
+    func,
+    select,
+)
+from sqlalchemy.sql.expression import ColumnElement
+
+from galaxy import model
+from galaxy.jobs.readiness import DEFAULT_LOOKBACK
+from galaxy.model.orm.now import now
+
+log = logging.getLogger(__name__)
+
+ACTIVE_STATES = (
+    model.WorkflowInvocation.states.NEW,
+    model.WorkflowInvocation.states.REQUIRES_MATERIALIZATION,
+    model.WorkflowInvocation.states.READY,
+    model.WorkflowInvocation.states.CANCELLING,
+)
+# Sorts before any change time, for invocations without a recorded change.
+NEVER = datetime.datetime.min
+
+DirtyInvocation = Tuple[Optional[int], datetime.datetime]
+
+
+def round_robin(invocation_ids_by_user: Dict[Optional[int], List[int]]) -> List[int]:
+    """Interleave the invocations of users, starting with the user with the oldest invocation.
+
+    The invocations of each user are given (and returned) oldest first.
+    """
+    users = sorted(invocation_ids_by_user, key=lambda user_id: invocation_ids_by_user[user_id][0])
+    interleaved = zip_longest(*(invocation_ids_by_user[user_id] for user_id in users))
+    return [invocation_id for row in interleaved for invocation_id in row if invocation_id is not None]
+
+
+class DirtyInvocationTracker:
+    """Find the active invocations of a scheduler and handler that need to be re-evaluated."""
+
+    def __init__(
+        self,
+        engine,
+        scheduler: Optional[str],
+        handler: Optional[str],
+        resync_interval: float,
+        lookback: datetime.timedelta = DEFAULT_LOOKBACK,
+    ):
+        self.engine = engine
+        self.scheduler = scheduler
+        self.handler = handler
+        self.resync_interval = resync_interval
+        self.lookback = lookback
+        # invocation id -> (user id, latest change) of invocations waiting to be re-evaluated
+        self._dirty: Dict[int, DirtyInvocation] = {}
+        # invocation id -> latest change seen before the invocation's current evaluation started
+        self._evaluating: Dict[int, datetime.datetime] = {}
+        # invocation id -> latest change seen before the invocation was last evaluated
+        self._evaluated: Dict[int, datetime.datetime] = {}
+        # evaluations may be finished by scheduling worker threads
+        self._lock = threading.Lock()
+        self._last_refresh: Optional[datetime.datetime] = None
+        self._last_resync: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def refresh(self) -> None:
+        """Mark active invocations with changes since they were last evaluated as dirty."""
+        refresh_time = now()
+        resync = self._last_resync is None or time.time() - self._last_resync >= self.resync_interval
+        with self.engine.connect() as conn:
+            active = conn.execute(self._active_invocations()).all()
+            # also needed when resynchronizing, to record the latest changes as evaluated
+            since = (self._last_refresh or refresh_time) - self.lookback
+            history_changes: Dict[int, datetime.datetime] = {}
+            for table in (model.Job, model.WorkflowInvocation):
+                for history_id, change in conn.execute(self._history_changes(table, since)):
+                    if history_id is not None and change is not None:
+                        history_changes[history_id] = max(change, history_changes.get(history_id, NEVER))
+        active_ids = set()
+        with self._lock:
+            for invocation_id, user_id, history_id, update_time in active:
+                active_ids.add(invocation_id)
+                change = max(update_time or NEVER, history_changes.get(history_id, NEVER))
+                evaluated = self._evaluating.get(invocation_id, self._evaluated.get(invocation_id))
+                if resync or evaluated is None or change > evaluated:
+                    self._dirty[invocation_id] = (user_id, change)
+            for tracked in (self._dirty, self._evaluating, self._evaluated):
+                for invocation_id in set(tracked) - active_ids:
+                    del tracked[invocation_id]
+        if resync:
+            self._last_resync = time.time()
+            log.debug("Resynchronized dirty workflow invocations, %d active invocations", len(active_ids))
+        self._last_refresh = refresh_time
+
+    def dirty_invocation_ids(self) -> List[int]:
+        """Return the ids of dirty invocations, alternating between users."""
+        with self._lock:
+            dirty = sorted((invocation_id, user_id) for invocation_id, (user_id, _) in self._dirty.items())
+        invocation_ids_by_user: Dict[Optional[int], List[int]] = defaultdict(list)
+        for invocation_id, user_id in dirty:
+            invocation_ids_by_user[user_id].append(invocation_id)
+        return round_robin(invocation_ids_by_user)
+
+    def evaluating(self, invocation_id: int) -> None:
+        """Record that the re-evaluation of a dirty invocation is starting.
+
+        Changes made from now on are more recent than the changes it was
+        marked dirty for, so they make it dirty again.
+        """
+        with self._lock:
+            if (dirty := self._dirty.pop(invocation_id, None)) is not None:
+                self._evaluating[invocation_id] = dirty[1]
+
+    def evaluated(self, invocation_id: int) -> None:
+        """Record that the re-evaluation of an invocation is finished."""
+        with self._lock:
+            if (change := self._evaluating.pop(invocation_id, None)) is not None:
+                self._evaluated[invocation_id] = change
+
+    def _active_invocations(self):
+        conditions: List[ColumnElement[bool]] = [model.WorkflowInvocation.state.in_(ACTIVE_STATES)]
+        if self.scheduler is not None:
+            conditions.append(model.WorkflowInvocation.scheduler == self.scheduler)
+        if self.handler is not None:
+            conditions.append(model.WorkflowInvocation.handler == self.handler)
+        return (
+            select(
+                model.WorkflowInvocation.id,
+                model.History.user_id,
+                model.WorkflowInvocation.history_id,
+                model.WorkflowInvocation.update_time,
+            )
+            .outerjoin(model.History, model.WorkflowInvocation.history_id == model.History.id)
+            .where(and_(*conditions))
+        )
+
+    @staticmethod
+    def _history_changes(table, since: datetime.datetime):
+        return (
+            select(table.history_id, func.max(table.update_time))
+            .where(table.update_time >= since)
+            .group_by(table.history_id)
+        )
@@ -2558,6 +2558,22 @@ class WorkflowModuleInjector:
             assert subworkflow
             populate_module_and_state(self.trans, subworkflow, param_map=unjsonified_subworkflow_param_map)
 
+    def inject_for_recovery(self, step: WorkflowStep, **kwargs):
+        """Inject only what is needed to recover the persisted outputs of an
+        already scheduled step with ``step.module.recover_mapping``.
+
+        Unlike `inject`, this doesn't add dummy datasets, populate subworkflows
+        or compute the runtime state of the step.
+        """
+        step.upgrade_messages = {}
+        step.setup_input_connections_by_name()
+        module = step.module = module_factory.from_workflow_step(self.trans, step, **kwargs)
+        if isinstance(module, ToolModule) and not module.tool:
+            # consistent with computing the runtime state of the step
+            raise ToolMissingException(
+                f"Tool {step.tool_id} missing. Cannot recover runtime state.", tool_id=step.tool_id
+            )
+
     def inject_all(self, workflow: Workflow, param_map=None, ignore_tool_missing_exception=False, **kwargs):
         param_map = param_map or {}
         for step in workflow.steps:
@@ -352,6 +352,9 @@ class ModuleInjector(Protocol):
     def inject(self, step, step_args=None, steps=None, **kwargs):
         pass
 
+    def inject_for_recovery(self, step, **kwargs):
+        pass
+
     def inject_all(self, workflow: "Workflow", param_map=None, ignore_tool_missing_exception=True, **kwargs):
         pass
 
@@ -409,10 +412,17 @@ class WorkflowProgress:
         # steps we are no where near ready to schedule?
         remaining_steps = []
         step_invocations_by_id = self.workflow_invocation.step_invocations_by_step_id()
-        self.module_injector.inject_all(self.workflow_invocation.workflow, param_map=self.param_map)
         for step in steps:
             step_id = step.id
+            invocation_step = step_invocations_by_id.get(step_id, None)
+            if invocation_step and invocation_step.state == "scheduled":
+                # Outputs of scheduled steps are persisted with their invocation step, recovering
+                # them neither requires the runtime state of the step nor its subworkflow modules.
+                self.module_injector.inject_for_recovery(step)
+                self._recover_mapping(invocation_step)
+                continue
             step_args = self.param_map.get(step_id, {})
+            self.module_injector.inject(step, steps=steps, step_args=step_args)
             self.module_injector.compute_runtime_state(step, step_args=step_args)
             if step_id not in step_states:
                 # Can this ever happen?
@@ -422,12 +432,7 @@ class WorkflowProgress:
             runtime_state = step_states[step_id].value
             assert step.module
             step.state = step.module.decode_runtime_state(step, runtime_state)
-
-            invocation_step = step_invocations_by_id.get(step_id, None)
-            if invocation_step and invocation_step.state == "scheduled":
-                self._recover_mapping(invocation_step)
-            else:
-                remaining_steps.append((step, invocation_step))
+            remaining_steps.append((step, invocation_step))
         return remaining_steps
 
     def replacement_for_input(self, trans, step: "WorkflowStep", input_dict: Dict[str, Any]):
@@ -1,6 +1,16 @@
 import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from typing import Optional
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Set,
+)
+
+from sqlalchemy import select
 
 import galaxy.workflow.schedulers
 from galaxy import model
@@ -17,12 +27,16 @@ from galaxy.schema.tasks import (
     MaterializeDatasetInstanceTaskRequest,
     RequestUser,
 )
-from galaxy.util import plugin_config
+from galaxy.util import (
+    chunk_iterable,
+    plugin_config,
+)
 from galaxy.util.custom_logging import get_logger
 from galaxy.util.monitors import Monitors
 from galaxy.util.xml_macros import load
 from galaxy.web_stack.handlers import ConfiguresHandlers
 from galaxy.web_stack.message import WorkflowSchedulingMessage
+from galaxy.workflow.dirty_invocations import DirtyInvocationTracker
 
 log = get_logger(__name__)
 
@@ -308,6 +322,28 @@ class WorkflowRequestMonitor(Monitors):
                 self_handler_tags=self_handler_tags,
                 handler_tags=self_handler_tags,
             )
+        # Only re-evaluate invocations that changed
+        self.dirty_invocation_trackers = None
+        if self.app.config.workflow_monitor_incremental_scheduling:
+            self.dirty_invocation_trackers = {
+                workflow_scheduler_id: DirtyInvocationTracker(
+                    self.app.model.engine,
+                    scheduler=workflow_scheduler_id,
+                    handler=self.app.config.server_name,
+                    resync_interval=self.app.config.workflow_monitor_resync_interval,
+                )
+                for workflow_scheduler_id in self.workflow_scheduling_manager.active_workflow_schedulers
+            }
+        # Schedule invocations of different histories on a pool of worker threads
+        self.scheduling_workers = None
+        if self.app.config.workflow_scheduling_workers > 1:
+            self.scheduling_workers = ThreadPoolExecutor(
+                max_workers=self.app.config.workflow_scheduling_workers,
+                thread_name_prefix="WorkflowRequestMonitor.scheduling_worker",
+            )
+        # Partitions (histories) being scheduled by worker threads
+        self._scheduling_partitions: Set[Optional[int]] = set()
+        self._scheduling_partitions_lock = threading.Lock()
 
     def __monitor(self):
         to_monitor = self.workflow_scheduling_manager.active_workflow_schedulers
@@ -331,12 +367,82 @@ class WorkflowRequestMonitor(Monitors):
             self._monitor_sleep(self.app.config.workflow_monitor_sleep)
 
     def __schedule(self, workflow_scheduler_id, workflow_scheduler):
-        invocation_ids = self.__active_invocation_ids(workflow_scheduler_id)
+        dirty_invocation_tracker = None
+        if self.dirty_invocation_trackers is not None:
+            dirty_invocation_tracker = self.dirty_invocation_trackers[workflow_scheduler_id]
+            dirty_invocation_tracker.refresh()
+            invocation_ids = dirty_invocation_tracker.dirty_invocation_ids()
+        else:
+            invocation_ids = self.__active_invocation_ids(workflow_scheduler_id)
+        if self.scheduling_workers is not None:
+            self.__dispatch(invocation_ids, workflow_scheduler, dirty_invocation_tracker)
+        else:
+            self.__schedule_invocations(invocation_ids, workflow_scheduler, dirty_invocation_tracker)
+
+    def __schedule_invocations(self, invocation_ids, workflow_scheduler, dirty_invocation_tracker):
         for invocation_id in invocation_ids:
-            log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
-            self.__attempt_schedule(invocation_id, workflow_scheduler)
             if not self.monitor_running:
                 return
+            log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
+            if dirty_invocation_tracker is not None:
+                dirty_invocation_tracker.evaluating(invocation_id)
+            try:
+                self.__attempt_schedule(invocation_id, workflow_scheduler)
+            finally:
+                if dirty_invocation_tracker is not None:
+                    dirty_invocation_tracker.evaluated(invocation_id)
+
+    def __dispatch(self, invocation_ids, workflow_scheduler, dirty_invocation_tracker):
+        """Hand invocations over to the worker threads, one task per partition.
+
+        Invocations of a history are scheduled one after the other by the same
+        worker (unless ``parallelize_workflow_scheduling_within_histories`` is
+        set), so the order of datasets in histories and
+        ``history_local_serial_workflow_scheduling`` are preserved. Partitions
+        still being scheduled since a previous iteration are skipped, so a
+        large invocation only holds back the invocations of its own history.
+        """
+        partitions: Dict[Optional[int], List[int]] = defaultdict(list)
+        for invocation_id, partition_key in self.__partition_keys(invocation_ids).items():
+            partitions[partition_key].append(invocation_id)
+        for partition_key, partition_invocation_ids in partitions.items():
+            with self._scheduling_partitions_lock:
+                if partition_key in self._scheduling_partitions:
+                    continue
+                self._scheduling_partitions.add(partition_key)
+            self.scheduling_workers.submit(
+                self.__schedule_partition,
+                partition_key,
+                partition_invocation_ids,
+                workflow_scheduler,
+                dirty_invocation_tracker,
+            )
+
+    def __schedule_partition(self, partition_key, invocation_ids, workflow_scheduler, dirty_invocation_tracker):
+        try:
+            self.__schedule_invocations(invocation_ids, workflow_scheduler, dirty_invocation_tracker)
+        except Exception:
+            log.exception("An exception occured scheduling while scheduling workflows")
+        finally:
+            with self._scheduling_partitions_lock:
+                self._scheduling_partitions.discard(partition_key)
+
+    def __partition_keys(self, invocation_ids) -> Dict[int, Optional[int]]:
+        """Return the partition key of each invocation, in the order of ``invocation_ids``.
+
+        Invocations are partitioned by history, or not at all if scheduling
+        within histories is parallelized.
+        """
+        if self.app.config.parallelize_workflow_scheduling_within_histories:
+            return {invocation_id: invocation_id for invocation_id in invocation_ids}
+        history_ids: Dict[int, Optional[int]] = {}
+        with self.app.model.engine.connect() as conn:
+            for chunk in chunk_iterable(invocation_ids):
+                stmt = select(model.WorkflowInvocation.id, model.WorkflowInvocation.history_id).where(
+                    model.WorkflowInvocation.id.in_(chunk)
+                )
+                history_ids.update(conn.execute(stmt).all())
+        return {invocation_id: history_ids.get(invocation_id) for invocation_id in invocation_ids}
 
     def __attempt_materialize(self, workflow_invocation, session) -> bool:
         try:
@@ -427,3 +533,5 @@ class WorkflowRequestMonitor(Monitors):
 
     def shutdown(self):
         self.shutdown_monitor()
+        if self.scheduling_workers is not None:
+            self.scheduling_workers.shutdown(cancel_futures=True)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+"""Rebuild the cache index of a caching object store from the files in its cache directory.
+
+Run this for caches with ``index`` enabled after files were added to or removed
+from the cache directory without going through Galaxy, e.g. by tmpwatch.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "lib")))
+
+from galaxy.objectstore.caching import CacheIndex
+from galaxy.util import nice_size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("cache_paths", metavar="CACHE_PATH", nargs="+", help="object store cache directory")
+    args = parser.parse_args(argv)
+    for cache_path in args.cache_paths:
+        cache_index = CacheIndex(cache_path)
+        try:
+            count = cache_index.rebuild()
+            print(f"Indexed {count} files ({nice_size(cache_index.total_size)}) in {cache_index.cache_path}")
+        finally:
+            cache_index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+Set the job cache fingerprint of jobs created before fingerprints were recorded.
+
+Jobs without a fingerprint can still be reused by tool runs and workflows with
+``use_cached_job``, but are only found by the slower matching of all their
+parameters.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "lib")))
+
+import galaxy.config
+from galaxy.model.job_cache import backfill_job_cache_fingerprints
+from galaxy.model.mapping import init_models_from_config
+from galaxy.util.script import (
+    app_properties_from_args,
+    populate_config_args,
+)
+
+parser = argparse.ArgumentParser(description=__doc__)
+populate_config_args(parser)
+parser.add_argument("--batch-size", type=int, default=1000, help="number of jobs updated per transaction")
+args = parser.parse_args()
+
+
+if __name__ == "__main__":
+    print("Loading Galaxy model...")
+    config = galaxy.config.Configuration(**app_properties_from_args(args))
+    model = init_models_from_config(config)
+    updated = backfill_job_cache_fingerprints(model.session, batch_size=args.batch_size)
+    print(f"Set the job cache fingerprint of {updated} jobs")
@@ -0,0 +1,83 @@
+from galaxy import model
+from galaxy.jobs.job_counts import (
+    ActiveJobCounts,
+    ActiveJobCountTracker,
+)
+from galaxy.model import mapping
+from galaxy.model.base import transaction
+
+QUEUED = model.Job.states.QUEUED
+RUNNING = model.Job.states.RUNNING
+RESUBMITTED = model.Job.states.RESUBMITTED
+OK = model.Job.states.OK
+
+
+def test_counts_follow_state_transitions():
+    counts = ActiveJobCounts()
+    counts.update(1, 10, "cluster", QUEUED)
+    counts.update(2, 10, "local", RUNNING)
+    counts.update(3, 11, "cluster", RUNNING)
+    assert counts.snapshot() == (
+        {10: 2, 11: 1},
+        {10: {"cluster": 1, "local": 1}, 11: {"cluster": 1}},
+        {"cluster": 2, "local": 1},
+    )
+
+    counts.update(1, 10, "cluster", RUNNING)
+    counts.update(3, 11, "cluster", OK)
+    assert counts.snapshot() == ({10: 2}, {10: {"cluster": 1, "local": 1}}, {"cluster": 1, "local": 1})
+    assert len(counts) == 2
+
+
+def test_resubmitted_jobs_only_count_against_user_limit():
+    counts = ActiveJobCounts()
+    counts.update(1, 10, "cluster", RESUBMITTED)
+    assert counts.snapshot() == ({10: 1}, {}, {})
+
+
+def test_anonymous_jobs_only_count_against_destination_limits():
+    counts = ActiveJobCounts()
+    counts.update(1, None, "cluster", RUNNING)
+    assert counts.snapshot() == ({}, {None: {"cluster": 1}}, {"cluster": 1})
+
+
+def test_snapshot_is_a_copy():
+    counts = ActiveJobCounts()
+    counts.update(1, 10, "cluster", QUEUED)
+    user_job_count, user_job_count_per_destination, _ = counts.snapshot()
+    user_job_count[10] += 1
+    user_job_count_per_destination[10]["cluster"] += 1
+    assert counts.snapshot()[:2] == ({10: 1}, {10: {"cluster": 1}})
+
+
+def test_tracker_refresh():
+    session = mapping.init("/tmp", "sqlite:///:memory:", create_tables=True).session
+    user = model.User(email="u1@example.com", password="pass1")
+    queued_job = _new_job(user, "cluster", QUEUED)
+    running_job = _new_job(user, "local", RUNNING)
+    session.add_all([user, queued_job, running_job, _new_job(user, "cluster", OK)])
+    _commit(session)
+
+    tracker = ActiveJobCountTracker(session, resync_interval=300)
+    tracker.refresh()
+    assert tracker.counts.snapshot()[0] == {user.id: 2}
+
+    queued_job.state = RUNNING
+    running_job.state = OK
+    session.add(_new_job(user, "cluster", QUEUED))
+    _commit(session)
+    tracker.refresh()
+    assert tracker.counts.snapshot() == ({user.id: 2}, {user.id: {"cluster": 2}}, {"cluster": 2})
+
+
+def _new_job(user, destination_id, state):
+    job = model.Job()
+    job.user = user
+    job.destination_id = destination_id
+    job.state = state
+    return job
+
+
+def _commit(session):
+    with transaction(session):
+        session.commit()
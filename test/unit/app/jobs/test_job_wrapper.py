@@ -1,11 +1,13 @@
 import abc
 import os
+import threading
 from contextlib import contextmanager
 from typing import (
     cast,
     Dict,
     Type,
 )
+from unittest import mock
 
 from galaxy.app_unittest_utils.tools_support import (
     MockContext,
@@ -21,7 +23,10 @@ from galaxy.model import (
     Task,
     User,
 )
-from galaxy.objectstore import BaseObjectStore
+from galaxy.objectstore import (
+    BaseObjectStore,
+    ObjectRef,
+)
 from galaxy.tools import ToolBox
 from galaxy.util.bunch import Bunch
 from galaxy.util.unittest import TestCase
@@ -93,6 +98,62 @@ class TestJobWrapper(AbstractTestCases.BaseWrapperTestCase):
     def _wrapper(self):
         return JobWrapper(self.job, self.queue)  # type: ignore[arg-type]
 
+    def test_store_finished_datasets_concurrently(self):
+        wrapper = self._wrapper()
+        self.app.config.job_finish_output_workers = 4  # type: ignore[attr-defined]
+        self.app.config.retry_job_output_collection = 1  # type: ignore[attr-defined]
+        self.app.object_store = object_store = mock.Mock()
+        file_name_threads = []
+        hdas = []
+        for i in range(3):
+            path = os.path.join(self.test_directory, f"dataset_{i}.dat")
+            with open(path, "w") as f:
+                f.write("output")
+
+            def get_file_name(path=path):
+                file_name_threads.append(threading.current_thread())
+                return path
+
+            dataset = mock.Mock(id=i, purged=False, external_filename=None, object_store_id="files1")
+            dataset.get_file_name.side_effect = get_file_name
+            hdas.append(mock.Mock(dataset=dataset))
+        job = mock.Mock(output_library_datasets=[])
+        with mock.patch("galaxy.jobs.collect_extra_files") as collect_extra_files:
+            wrapper._store_finished_datasets(job, hdas)
+        # datasets are only used on the calling thread, the workers get paths and identifiers
+        assert file_name_threads == [threading.current_thread()] * 3
+        assert object_store.create.call_count == 3
+        outputs = [call.args[0] for call in object_store.update_from_file.call_args_list]
+        assert all(isinstance(output, ObjectRef) for output in outputs)
+        assert sorted(output.id for output in outputs) == [0, 1, 2]
+        assert collect_extra_files.call_count == 3
+
+    def test_store_finished_datasets_defers_pushes(self):
+        wrapper = self._wrapper()
+        self.app.config.retry_job_output_collection = 1  # type: ignore[attr-defined]
+        self.app.object_store = object_store = mock.Mock()
+        # the store of the second dataset writes through
+        object_store.defers_push.side_effect = lambda obj: obj.id != 1
+        hdas = []
+        for i in range(3):
+            path = os.path.join(self.test_directory, f"dataset_{i}.dat")
+            with open(path, "w") as f:
+                f.write("output")
+            dataset = mock.Mock(id=i, purged=False, external_filename=None, object_store_id="files1")
+            dataset.get_file_name.return_value = path
+            hdas.append(mock.Mock(dataset=dataset))
+        job = mock.Mock(output_library_datasets=[])
+        for workers in (1, 4):
+            self.app.config.job_finish_output_workers = workers  # type: ignore[attr-defined]
+            object_store.update_from_file.reset_mock()
+            with mock.patch("galaxy.jobs.collect_extra_files"):
+                assert wrapper._store_finished_datasets(job, hdas) == set()
+                assert wrapper._store_finished_datasets(job, hdas, defer_push=True) == {0, 2}
+            deferred = {
+                call.args[0].id for call in object_store.update_from_file.call_args_list if call.kwargs["defer_push"]
+            }
+            assert deferred == {0, 2}
+
 
 class TestTaskWrapper(AbstractTestCases.BaseWrapperTestCase):
     def setUp(self):
@@ -0,0 +1,136 @@
+import threading
+from types import SimpleNamespace
+
+from galaxy.jobs.runners.util.pykube_informer import Informer
+
+
+class FakeApiServer:
+    """Minimal stand-in for the list and watch endpoints of a Kubernetes API server."""
+
+    def __init__(self):
+        self.resource_version = 0
+        self.objects = {}
+        self.events = []
+        self.lists = 0
+        self.watches = []
+
+    def change(self, event_type, name, labels=None, **status):
+        self.resource_version += 1
+        obj = {
+            "metadata": {"name": name, "labels": labels or {}, "resourceVersion": str(self.resource_version)},
+            "status": status,
+        }
+        if event_type == "DELETED":
+            self.objects.pop(name)
+        else:
+            self.objects[name] = obj
+        self.events.append((event_type, obj))
+
+    def object_class(self):
+        server = self
+
+        class FakeObject:
+            def __init__(self, api, obj):
+                self.obj = obj
+
+            @staticmethod
+            def objects(api):
+                return FakeQuery(server)
+
+        return FakeObject
+
+
+class FakeQuery:
+    def __init__(self, server):
+        self.server = server
+
+    def filter(self, namespace=None, selector=None):
+        return self
+
+    @property
+    def response(self):
+        self.server.lists += 1
+        return {
+            "metadata": {"resourceVersion": str(self.server.resource_version)},
+            "items": list(self.server.objects.values()),
+        }
+
+    def watch(self, since=None, params=None):
+        self.server.watches.append(since)
+        events = [
+            SimpleNamespace(type=event_type, object=SimpleNamespace(obj=obj))
+            for event_type, obj in self.server.events
+            if event_type == "ERROR" or int(obj["metadata"]["resourceVersion"]) > int(since)
+        ]
+        return SimpleNamespace(object_stream=lambda: iter(events))
+
+
+def _informer(server, **kwargs):
+    return Informer(None, server.object_class(), namespace="galaxy", **kwargs)
+
+
+def test_list_then_watch():
+    server = FakeApiServer()
+    server.change("ADDED", "job-1", status="active")
+    informer = _informer(server)
+    informer.list()
+    assert informer.synced
+    assert informer.get("job-1")["status"] == {"status": "active"}
+
+    server.change("MODIFIED", "job-1", status="succeeded")
+    server.change("ADDED", "job-2")
+    server.change("DELETED", "job-2")
+    informer.watch()
+    assert server.watches == ["1"]
+    assert informer.get("job-1")["status"] == {"status": "succeeded"}
+    assert informer.get("job-2") is None
+    assert informer.resource_version == "4"
+    assert server.lists == 1
+
+
+def test_index_by_label():
+    server = FakeApiServer()
+    server.change("ADDED", "pod-a", labels={"job-name": "job-1"})
+    informer = _informer(server, index_label="job-name")
+    informer.list()
+    server.change("ADDED", "pod-b", labels={"job-name": "job-1"})
+    server.change("ADDED", "pod-c", labels={"job-name": "job-2"})
+    server.change("DELETED", "pod-a")
+    informer.watch()
+    assert [pod["metadata"]["name"] for pod in informer.get_by_label("job-1")] == ["pod-b"]
+    assert [pod["metadata"]["name"] for pod in informer.get_by_label("job-2")] == ["pod-c"]
+    assert informer.get_by_label("job-3") == []
+
+
+def test_expired_resource_version_triggers_list():
+    server = FakeApiServer()
+    informer = _informer(server)
+    informer.list()
+    server.events.append(("ERROR", {"code": 410, "metadata": {}}))
+    informer.watch()
+    assert informer.resource_version is None
+    assert informer._needs_list()
+    server.change("ADDED", "job-1")
+    informer.list()
+    assert server.lists == 2
+    assert informer.get("job-1") is not None
+
+
+def test_resync_interval():
+    server = FakeApiServer()
+    informer = _informer(server, resync_interval=0)
+    informer.list()
+    assert informer._needs_list()
+
+
+def test_run_in_thread():
+    server = FakeApiServer()
+    server.change("ADDED", "job-1")
+    informer = _informer(server)
+    thread = threading.Thread(target=informer.run, daemon=True)
+    thread.start()
+    assert informer.wait_for_sync(timeout=5)
+    informer.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert informer.snapshot().keys() == {"job-1"}
@@ -0,0 +1,129 @@
+from galaxy import model
+from galaxy.jobs.readiness import (
+    JobReadinessIndex,
+    JobReadinessTracker,
+)
+from galaxy.model import mapping
+from galaxy.model.base import transaction
+
+HANDLER = "handler0"
+
+
+def test_index_job_without_pending_inputs_is_ready():
+    index = JobReadinessIndex()
+    assert index.add_job(1, 10, [])
+    assert index.ready_job_ids == [1]
+    assert 1 in index
+
+
+def test_index_job_ready_once_all_inputs_ready():
+    index = JobReadinessIndex()
+    assert not index.add_job(1, 10, [100, 101])
+    assert not index.add_job(2, 10, [101])
+    assert index.dataset_ids == {100, 101}
+
+    assert index.datasets_ready([101]) == [2]
+    assert index.ready_job_ids == [2]
+    assert index.datasets_ready([101]) == []
+    assert index.datasets_ready([100]) == [1]
+    assert index.ready_job_ids == [1, 2]
+    assert index.dataset_ids == set()
+
+
+def test_index_remove_job():
+    index = JobReadinessIndex()
+    index.add_job(1, 10, [100])
+    index.add_job(2, 10, [100])
+    index.remove_job(1)
+    assert 1 not in index
+    assert len(index) == 1
+    assert index.datasets_ready([100]) == [2]
+    index.remove_job(2)
+    assert index.ready_job_ids == []
+    assert index.dataset_ids == set()
+
+
+def test_index_ready_window():
+    index = JobReadinessIndex()
+    for job_id, user_key in [(1, 10), (2, 10), (3, 11), (4, 10), (5, 11)]:
+        index.add_job(job_id, user_key, [])
+    assert index.ready_window(2) == [1, 2, 3, 5]
+    assert index.ready_window(None) == [1, 2, 3, 4, 5]
+
+
+def test_index_ready_window_excluded_users():
+    index = JobReadinessIndex()
+    for job_id, user_id in [(1, 10), (2, 10), (3, 11), (4, 11), (5, 11)]:
+        index.add_job(job_id, user_id, [], user_id=user_id)
+    assert index.ready_user_ids == {10, 11}
+    # jobs of excluded users don't take up the window of other users
+    assert index.ready_window(2, {10}) == [3, 4]
+    assert index.ready_window(None, {11}) == [1, 2]
+
+
+def test_tracker_initial_sync():
+    session = _session()
+    ready_job, _ = _new_job(session, model.Dataset.states.OK)
+    waiting_job, _ = _new_job(session, model.Dataset.states.QUEUED)
+    _new_job(session, model.Dataset.states.OK, handler="other_handler")
+    _commit(session)
+
+    tracker = JobReadinessTracker(session, HANDLER, resync_interval=300)
+    assert tracker.ready_job_ids() == [ready_job.id]
+    assert waiting_job.id in tracker.index
+
+
+def test_tracker_incremental_refresh():
+    session = _session()
+    job, dataset = _new_job(session, model.Dataset.states.RUNNING)
+    _commit(session)
+
+    tracker = JobReadinessTracker(session, HANDLER, resync_interval=300)
+    assert tracker.ready_job_ids() == []
+
+    new_job, _ = _new_job(session, model.Dataset.states.OK)
+    dataset.state = model.Dataset.states.OK
+    _commit(session)
+    assert tracker.ready_job_ids() == [job.id, new_job.id]
+
+    job.state = model.Job.states.QUEUED
+    _commit(session)
+    tracker.discard([job.id])
+    assert tracker.ready_job_ids() == [new_job.id]
+
+
+def test_tracker_excludes_inactive_users():
+    session = _session()
+    active_user = model.User(email="u1@example.com", password="pass1")
+    active_user.active = True
+    inactive_user = model.User(email="u2@example.com", password="pass2")
+    active_job, _ = _new_job(session, model.Dataset.states.OK, user=active_user)
+    inactive_job, _ = _new_job(session, model.Dataset.states.OK, user=inactive_user)
+    _commit(session)
+
+    tracker = JobReadinessTracker(session, HANDLER, resync_interval=300)
+    assert tracker.ready_job_ids(exclude_inactive_users=True) == [active_job.id]
+    inactive_user.active = True
+    _commit(session)
+    assert tracker.ready_job_ids(exclude_inactive_users=True) == [active_job.id, inactive_job.id]
+
+
+def _session():
+    return mapping.init("/tmp", "sqlite:///:memory:", create_tables=True).session
+
+
+def _new_job(session, input_state, handler=HANDLER, user=None):
+    dataset = model.Dataset(state=input_state)
+    hda = model.HistoryDatasetAssociation(dataset=dataset, sa_session=session)
+    job = model.Job()
+    job.user = user
+    job.state = model.Job.states.NEW
+    job.handler = handler
+    job.add_input_dataset("input1", hda)
+    session.add_all([dataset, hda, job])
+    return job, dataset
+
+
+def _commit(session):
+    with transaction(session):
+        session.commit()
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from galaxy import model
+from galaxy.jobs.runners import AsynchronousJobRunner
+from galaxy.jobs.runners.cli import ShellJobRunner
+from galaxy.jobs.runners.slurm import SlurmJobRunner
+from galaxy.util import commands
+
+JOB_STATE = SimpleNamespace(QUEUED_ACTIVE="queued_active", RUNNING="running")
+
+
+class BatchRunner(AsynchronousJobRunner):
+    runner_name = "BatchRunner"
+
+    def __init__(self, batch_states=None, error=None):
+        self.watched = [SimpleNamespace(job_id="1"), SimpleNamespace(job_id="2")]
+        self.batch_states = {}
+        self._batch_states = batch_states
+        self._error = error
+
+    def check_watched_items_batch(self, job_states):
+        if self._error:
+            raise self._error
+        return self._batch_states
+
+
+def test_poll_batch_states():
+    runner = BatchRunner({"1": "running"})
+    assert runner.poll_batch_states() == {"1": "running"}
+    assert runner.batch_states == {"1": "running"}
+
+
+def test_poll_batch_states_falls_back_on_error():
+    runner = BatchRunner(error=Exception("cluster unreachable"))
+    runner.batch_states = {"1": "running"}
+    assert runner.poll_batch_states() is None
+    assert runner.batch_states == {}
+
+
+def test_poll_batch_states_without_batch_support():
+    assert BatchRunner(None).poll_batch_states() == {}
+
+
+def _shell_runner(batch_states=None, error=None):
+    runner = ShellJobRunner.__new__(ShellJobRunner)
+    runner.runner_name = "ShellRunner"
+    runner.watched = [
+        SimpleNamespace(
+            job_id=job_id,
+            old_state=model.Job.states.QUEUED,
+            running=False,
+            job_destination=SimpleNamespace(params={}),
+            job_wrapper=mock.Mock(**{"get_state.return_value": model.Job.states.QUEUED}),
+        )
+        for job_id in ("1", "2")
+    ]
+    runner.check_watched_items_batch = mock.Mock(return_value=batch_states, side_effect=error)
+    runner.parse_destination_params = mock.Mock(return_value=({}, {}))
+    job_interface = mock.Mock(**{"parse_single_status.return_value": model.Job.states.RUNNING})
+    runner.get_cli_plugins = mock.Mock(return_value=(mock.Mock(), job_interface))
+    return runner
+
+
+def test_shell_runner_skips_cycle_when_batch_check_fails():
+    runner = _shell_runner(error=Exception("cluster unreachable"))
+    watched = runner.watched
+    runner.check_watched_items()
+    assert runner.watched == watched
+    # no job is looked up individually or changes state
+    runner.get_cli_plugins.assert_not_called()
+    for ajs in watched:
+        assert ajs.old_state == model.Job.states.QUEUED
+        ajs.job_wrapper.change_state.assert_not_called()
+
+
+def test_shell_runner_checks_jobs_missing_from_batch_individually():
+    runner = _shell_runner({"1": model.Job.states.RUNNING})
+    runner.check_watched_items()
+    assert [ajs.old_state for ajs in runner.watched] == [model.Job.states.RUNNING, model.Job.states.RUNNING]
+    assert runner.get_cli_plugins.call_count == 1
+
+
+def test_slurm_batch_states():
+    runner = SlurmJobRunner.__new__(SlurmJobRunner)
+    runner.drmaa = SimpleNamespace(JobState=JOB_STATE)
+    job_states = [SimpleNamespace(job_id=job_id) for job_id in ("11", "12", "13", "21.other", "None")]
+
+    def execute(cmd):
+        if "-M" in cmd:
+            assert cmd[-1] == "21"
+            return "CLUSTER: other\n21 PENDING\n"
+        assert cmd[-1] == "11,12,13"
+        return "11 RUNNING\n12 CONFIGURING\n13 COMPLETING\n"
+
+    with mock.patch.object(commands, "execute", side_effect=execute) as execute_mock:
+        states = runner.check_watched_items_batch(job_states)
+    assert execute_mock.call_count == 2
+    # terminal and transitional states are left to DRMAA
+    assert states == {"11": "running", "12": "queued_active", "21.other": "queued_active"}
+
+
+def test_slurm_batch_states_invalid_job_ids():
+    runner = SlurmJobRunner.__new__(SlurmJobRunner)
+    runner.drmaa = SimpleNamespace(JobState=JOB_STATE)
+    error = commands.CommandLineException("squeue", "", "slurm_load_jobs error: Invalid job id specified", 1)
+    with mock.patch.object(commands, "execute", side_effect=error):
+        assert runner.check_watched_items_batch([SimpleNamespace(job_id="11")]) == {}
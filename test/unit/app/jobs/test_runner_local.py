@@ -1,7 +1,9 @@
 import os
 import threading
 import time
+from queue import Queue
 from typing import Optional
+from unittest import mock
 
 import psutil
 
@@ -89,6 +91,39 @@ class TestLocalJobRunner(TestCase, UsesTools):
         t.join(1)
         assert not psutil.pid_exists(external_id)
 
+    def test_put_many(self):
+        runner = local.LocalJobRunner(self.app, 1)
+        runner.work_queue = Queue()
+        fail_messages = []
+
+        def enqueue(flush=True):
+            raise Exception("Cannot queue job")
+
+        def fail(message, exception=False):
+            fail_messages.append(message)
+
+        broken_job_wrapper = bunch.Bunch(job_id=2, enqueue=enqueue, fail=fail)
+        runner.put_many([self.job_wrapper, broken_job_wrapper])  # type: ignore[list-item]
+        assert self.job_wrapper.enqueue_flushed is False
+        assert fail_messages == ["Cannot queue job"]
+        _, queued_job_wrapper = runner.work_queue.get_nowait()
+        assert queued_job_wrapper is self.job_wrapper
+        assert runner.work_queue.empty()
+
+    def test_put_many_commit_failure(self):
+        runner = local.LocalJobRunner(self.app, 1)
+        runner.work_queue = Queue()
+        sa_session = self.app.model.context
+        # jobs are queued one by one when their queued state can't be persisted together
+        with mock.patch.object(sa_session, "commit", side_effect=Exception("Cannot commit")):
+            with mock.patch.object(sa_session, "rollback") as rollback:
+                assert runner.put_many([self.job_wrapper]) == [self.job_wrapper]  # type: ignore[list-item]
+        rollback.assert_called_once()
+        assert self.job_wrapper.enqueue_flushed is True
+        _, queued_job_wrapper = runner.work_queue.get_nowait()
+        assert queued_job_wrapper is self.job_wrapper
+        assert runner.work_queue.empty()
+
     def test_shutdown_no_jobs(self):
         self.app.config.monitor_thread_join_timeout = 5
         runner = local.LocalJobRunner(self.app, 1)
@@ -128,6 +163,7 @@ class MockJobWrapper:
         self.environment_variables = []
         self.commands_in_new_shell = False
         self.prepare_called = False
+        self.enqueue_flushed: Optional[bool] = None
         self.dependency_shell_commands = None
         self.working_directory = working_directory
         self.tool_working_directory = tool_working_directory
@@ -169,6 +205,10 @@ class MockJobWrapper:
     def prepare(self):
         self.prepare_called = True
 
+    def enqueue(self, flush=True):
+        self.enqueue_flushed = flush
+        return True
+
     def set_external_id(self, external_id, **kwd):
         self.job.job_runner_external_id = external_id
 
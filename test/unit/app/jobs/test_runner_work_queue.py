@@ -0,0 +1,37 @@
+from queue import Queue
+
+from galaxy.jobs.runners import (
+    STOP_SIGNAL,
+    WorkQueue,
+)
+
+
+class Runner:
+    def queue_job(self, job_wrapper):
+        pass
+
+    def finish_job(self, job_state):
+        pass
+
+    def fail_job(self, job_state):
+        pass
+
+
+def test_work_queue_routes_finishing_to_finish_queue():
+    runner = Runner()
+    finish_queue: Queue = Queue()
+    work_queue = WorkQueue(finish_queue)
+    work_queue.put((runner.queue_job, 1))
+    work_queue.put((runner.finish_job, 2))
+    work_queue.put((runner.fail_job, 3))
+    work_queue.put((STOP_SIGNAL, None))
+    assert [work_queue.get_nowait()[1] for _ in range(work_queue.qsize())] == [1, None]
+    assert [finish_queue.get_nowait()[1] for _ in range(finish_queue.qsize())] == [2, 3]
+
+
+def test_work_queue_without_finish_queue():
+    runner = Runner()
+    work_queue = WorkQueue()
+    work_queue.put((runner.queue_job, 1))
+    work_queue.put((runner.finish_job, 2))
+    assert work_queue.qsize() == 2
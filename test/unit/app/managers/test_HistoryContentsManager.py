@@ -3,6 +3,7 @@
 
 import datetime
 import random
+from unittest import mock
 
 from sqlalchemy import (
     column,
@@ -11,6 +12,7 @@ from sqlalchemy import (
     true,
 )
 
+from galaxy.app_unittest_utils.galaxy_mock import mock_url_builder
 from galaxy.managers import (
     base,
     collections,
@@ -321,6 +323,49 @@ class TestHistoryAsContainer(HistoryAsContainerBaseTestCase):
         filters = [parsed_filter("orm", column("type_id").in_(["dataset-2", "dataset_collection-2"]))]
         assert self.contents_manager.contents(history, filters=filters) == [contents[1], contents[6]]
 
+    @mock.patch("galaxy.managers.hdas.HDASerializer.url_for", mock_url_builder)
+    def test_contents_as_rows(self):
+        user2 = self.user_manager.create(**user2_data)
+        user3 = self.user_manager.create(**user3_data)
+        self.trans.set_user(user2)
+        history = self.history_manager.create(name="history", user=user2)
+        datasets = [self.add_hda_to_history(history, name=("hda-" + str(x))) for x in range(3)]
+        hdca = self.add_list_collection_to_history(history, datasets[:2])
+        self.app.tag_handler.add_tags_from_list(user2, datasets[0], ["tag-one", "name:tag-two"])
+        security_agent = self.app.security_agent
+        security_agent.set_dataset_permission(
+            datasets[2].dataset,
+            {security_agent.permitted_actions.DATASET_ACCESS: [security_agent.get_private_user_role(user3)]},
+        )
+        session = self.trans.sa_session
+        with transaction(session):
+            session.commit()
+
+        self.log("contained items can be returned as rows")
+        contents = self.contents_manager.contents(history, contained_as_rows=True)
+        assert [content["id"] for content in contents[:3]] == [hda.id for hda in datasets]
+        assert contents[3] == hdca
+
+        self.log("rows should serialize like the models in the summary view")
+        serializer = self.app[hdas.HDASerializer]
+        keys = serializer.views["summary"]
+        assert serializer.can_serialize_rows(keys)
+        user_role_ids = {role.id for role in user2.all_roles()}
+        for row, hda in zip(contents[:2], datasets[:2]):
+            serialized = serializer.serialize_row(row, keys, user_role_ids, user=user2, trans=self.trans)
+            assert serialized == serializer.serialize_to_view(hda, view="summary", user=user2, trans=self.trans)
+        assert sorted(serializer.serialize_row(contents[0], ["tags"], user_role_ids)["tags"]) == [
+            "name:tag-two",
+            "tag-one",
+        ]
+
+        self.log("rows of datasets the user can't access aren't serialized")
+        assert serializer.serialize_row(contents[2], keys, user_role_ids) is None
+        assert serializer.serialize_row(contents[2], keys, None) is not None
+
+        self.log("keys without row serializers can't be serialized from rows")
+        assert not serializer.can_serialize_rows(keys + ["file_size"])
+
 
 class TestHistoryContentsFilterParser(HistoryAsContainerBaseTestCase):
     def set_up_managers(self):
@@ -1,7 +1,14 @@
 from typing import List
 
+import pytest
+from celery.exceptions import Retry
+
+from galaxy import model
 from galaxy.app_unittest_utils.galaxy_mock import MockApp
-from galaxy.celery.tasks import clean_object_store_caches
+from galaxy.celery.tasks import (
+    clean_object_store_caches,
+    push_dataset,
+)
 from galaxy.objectstore import BaseObjectStore
 from galaxy.objectstore.caching import CacheTarget
 
@@ -36,3 +43,33 @@ def test_clean_object_store_caches(tmp_path):
     clean_object_store_caches()
 
     assert not path.exists()
+
+
+class MockPushingObjectStore:
+    def __init__(self, results: List[bool]):
+        self.results = results
+
+    def push(self, obj) -> bool:
+        return self.results.pop(0)
+
+
+def test_push_dataset(monkeypatch):
+    container = MockApp()
+    container[BaseObjectStore] = MockPushingObjectStore([False, True, False])  # type: ignore[assignment]
+    session = container.model.context
+    datasets = [model.Dataset(state=model.Dataset.states.UPLOAD) for _ in range(2)]
+    session.add_all(datasets)
+    session.commit()
+    dataset_ids = [dataset.id for dataset in datasets]
+
+    # failed pushes are retried
+    with pytest.raises(Retry):
+        push_dataset(dataset_id=dataset_ids[0])
+    push_dataset(dataset_id=dataset_ids[0])
+    # tasks use their own session
+    assert session.get(model.Dataset, dataset_ids[0]).state == model.Dataset.states.OK
+
+    # the dataset is set to the error state once the retries are exhausted
+    monkeypatch.setattr(push_dataset, "max_retries", 0)
+    push_dataset(dataset_id=dataset_ids[1])
+    assert session.get(model.Dataset, dataset_ids[1]).state == model.Dataset.states.ERROR
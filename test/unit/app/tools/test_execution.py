@@ -62,6 +62,15 @@ class TestToolExecution(TestCase, tools_support.UsesTools):
         # Didn't specify a rerun_remap_id so this should be None
         assert self.tool_action.execution_call_args[0]["rerun_remap_job_id"] is None
 
+    def test_execute_without_history(self):
+        self._init_tool(tools_support.SIMPLE_TOOL_CONTENTS)
+        # The action creates the default history when the request has no current history.
+        self.trans.history = None
+        self.tool_action.default_history = self.history
+        vars = self.__handle_with_incoming(param1="moo")
+        self.__assert_executed(vars)
+        assert self.tool_action.execution_call_args[0]["history"] is None
+
     def test_execute_exception(self):
         self._init_tool(tools_support.SIMPLE_TOOL_CONTENTS)
         self.tool_action.raise_exception()
@@ -170,6 +179,7 @@ class MockAction(tools_support.MockActionI):
         self.expect_redirect = False
         self.exception_after_exection = None
         self.error_message_after_excution = None
+        self.default_history = None
 
     def execute(self, tool, trans, **kwds):
         assert self.expected_trans == trans
@@ -184,6 +194,8 @@ class MockAction(tools_support.MockActionI):
             if num_calls > self.error_message_after_excution:
                 return None, "Test Error Message"
 
+        if kwds["history"] is None and self.default_history is not None:
+            return galaxy.model.Job(), OrderedDict(out1="1"), self.default_history
         return galaxy.model.Job(), OrderedDict(out1="1")
 
     def raise_exception(self, after_execution=0):
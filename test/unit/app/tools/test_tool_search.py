@@ -0,0 +1,65 @@
+import os
+import time
+from unittest import mock
+
+from galaxy.app_unittest_utils.toolbox_support import BaseToolBoxTestCase
+from galaxy.app_unittest_utils.tools_support import SIMPLE_TOOL_CONTENTS
+from galaxy.tools.search import ToolBoxSearch
+
+SEARCH_CONFIG = dict(
+    tool_name_boost=20.0,
+    tool_name_exact_multiplier=10.0,
+    tool_id_boost=20.0,
+    tool_section_boost=3.0,
+    tool_description_boost=8.0,
+    tool_label_boost=1.0,
+    tool_stub_boost=2.0,
+    tool_help_boost=1.0,
+    tool_help_bm25f_k1=0.5,
+    tool_enable_ngram_search=False,
+    tool_ngram_minsize=3,
+    tool_ngram_maxsize=4,
+    tool_ngram_factor=0.2,
+)
+
+
+class TestToolBoxSearch(BaseToolBoxTestCase):
+    def setUp(self):
+        super().setUp()
+        for key, value in SEARCH_CONFIG.items():
+            setattr(self.app.config, key, value)
+        # sets the EDAM annotations of tools
+        self.app.biotools_metadata_source = mock.Mock(get_biotools_metadata=mock.Mock(return_value=None))
+
+    def test_index_updated_incrementally(self):
+        self._init_tool()
+        self._init_tool(filename="other_tool.xml", tool_id="other_tool")
+        self._add_config("""<toolbox><tool file="tool.xml" /><tool file="other_tool.xml" /></toolbox>""")
+        toolbox_search = ToolBoxSearch(self.toolbox, os.path.join(self.test_directory, "tool_search_index"))
+        self._reindex(toolbox_search)
+        assert sorted(self._search(toolbox_search, "test")) == ["other_tool", "test_tool"]
+        panel_search = toolbox_search.panel_searches["default"]
+        generation = panel_search.index.latest_generation()
+
+        # nothing changed, the index isn't written
+        self._reindex(toolbox_search)
+        assert panel_search.index.latest_generation() == generation
+
+        # a changed tool is indexed again
+        self._init_tool(tool_contents=SIMPLE_TOOL_CONTENTS.replace("Test Tool", "Renamed Tool"))
+        os.utime(self.tool_file, (time.time() + 10, time.time() + 10))
+        self.app.tool_cache.cleanup()
+        self._toolbox = None
+        self._reindex(toolbox_search)
+        assert self._search(toolbox_search, "renamed") == ["test_tool"]
+
+        # searchers in other processes see the changes
+        other_search = ToolBoxSearch(self.toolbox, os.path.join(self.test_directory, "tool_search_index"))
+        assert self._search(other_search, "renamed") == ["test_tool"]
+
+    def _reindex(self, toolbox_search):
+        toolbox_search.build_index(self.app.tool_cache, self.toolbox)
+        self.app.tool_cache.reset_status()
+
+    def _search(self, toolbox_search, q):
+        return toolbox_search.search(q, panel_view="default", config=self.app.config)
@@ -1,5 +1,7 @@
 import logging
+import os
 import time
+from unittest import mock
 
 import pytest
 import routes
@@ -7,6 +9,8 @@ import routes
 from galaxy import model
 from galaxy.app_unittest_utils.toolbox_support import BaseToolBoxTestCase
 from galaxy.model.base import transaction
+from galaxy.tool_util.toolbox import base as toolbox_base
+from galaxy.tool_util.toolbox.parallel import expand_tool_documents
 from galaxy.tool_util.unittest_utils import mock_trans
 from galaxy.tool_util.unittest_utils.sample_data import (
     SIMPLE_MACRO,
@@ -25,6 +29,36 @@ class TestToolBox(BaseToolBoxTestCase):
         assert toolbox.get_tool("test_tool") is not None
         assert toolbox.get_tool("not_a_test_tool") is None
 
+    def test_tool_tests_parsed_lazily(self):
+        self._init_tool(
+            tool_contents="""<tool id="test_tool" name="Test Tool" version="1.0">
+    <command>echo "$param1" &lt; $out1</command>
+    <inputs>
+        <param type="text" name="param1" value="" />
+    </inputs>
+    <outputs>
+        <data name="out1" format="data" />
+    </outputs>
+    <tests>
+        <test>
+            <param name="param1" value="moo" />
+        </test>
+    </tests>
+</tool>"""
+        )
+        self._add_config("""<toolbox><tool file="tool.xml" /></toolbox>""")
+        tool = self.toolbox.get_tool("test_tool")
+        assert tool._parse_tests_lazily
+        # Tests come from the loaded tool, not from the (possibly changed) file on disk.
+        with open(self.tool_file) as f:
+            tool_contents = f.read()
+        with open(self.tool_file, "w") as f:
+            f.write(tool_contents.replace("moo", "cow"))
+        tests = tool.tests
+        assert not tool._parse_tests_lazily
+        assert len(tests) == 1
+        assert tests[0].inputs == {"param1": "moo"}
+
     def test_record_macros(self):
         self._init_tool()
         self._init_tool(
@@ -42,6 +76,35 @@ class TestToolBox(BaseToolBoxTestCase):
         assert tool is not None
         assert len(tool._macro_paths) == 1
 
+    def test_tools_expanded_in_worker_processes(self):
+        self._init_tool()
+        self._init_tool(
+            filename="tool_with_macro.xml",
+            tool_contents=SIMPLE_TOOL_WITH_MACRO,
+            extra_file_contents=SIMPLE_MACRO.substitute(tool_version="2.0"),
+            extra_file_path="external.xml",
+        )
+        with open(os.path.join(self.test_directory, "broken.xml"), "w") as f:
+            f.write("<tool")
+        self._add_config(
+            """<toolbox><tool file="tool.xml" /><section id="s" name="S"><tool file="tool_with_macro.xml"/><tool file="broken.xml"/></section></toolbox>"""
+        )
+        self.app.config.tool_loading_processes = 2
+        expanded = {}
+
+        def expand(tool_files, processes):
+            expanded.update(expand_tool_documents(tool_files, processes))
+            return dict(expanded)
+
+        with mock.patch.object(toolbox_base, "expand_tool_documents", expand):
+            toolbox = self.toolbox
+        assert [os.path.basename(tool_file) for tool_file in expanded] == ["tool.xml", "tool_with_macro.xml"]
+        assert not toolbox._expanded_tool_documents
+        assert toolbox.get_tool("test_tool") is not None
+        tool = toolbox.get_tool("tool_with_macro")
+        assert tool.version == "2.0"
+        assert len(tool._macro_paths) == 1
+
     @pytest.mark.xfail(raises=AssertionError)
     def test_tool_reload_when_macro_is_altered(self):
         self._init_tool(
@@ -0,0 +1,153 @@
+import json
+
+from galaxy import model
+from galaxy.managers.jobs import JobSearch
+from galaxy.model import mapping
+from galaxy.model.base import transaction
+from galaxy.model.job_cache import (
+    backfill_job_cache_fingerprints,
+    job_cache_fingerprint,
+    job_cache_fingerprint_for_parameters,
+    job_cache_parameters_digest,
+    set_job_cache_fingerprint,
+)
+
+PARAMETERS = {
+    "input1": {"values": [{"id": 1, "src": "hda"}]},
+    "cond|threshold": 5,
+    "flag": True,
+}
+
+
+def test_fingerprint_ignores_input_ids():
+    other_inputs = dict(PARAMETERS, input1={"values": [{"id": 42, "src": "hda"}]})
+    assert job_cache_fingerprint("cat1", PARAMETERS) == job_cache_fingerprint("cat1", other_inputs)
+
+
+def test_fingerprint_covers_tool_inputs():
+    extra = dict(
+        PARAMETERS,
+        dbkey="hg19",
+        chromInfo="/tmp/hg19.len",
+        __input_ext="txt",
+        **{"input1|__identifier__": "forward"},
+    )
+    job, job_with_extra_parameters = _job("cat1"), _job("cat1", **extra)
+    set_job_cache_fingerprint(job, PARAMETERS)
+    set_job_cache_fingerprint(job_with_extra_parameters, PARAMETERS)
+    assert job_with_extra_parameters.job_cache_fingerprint == job_cache_fingerprint("cat1", PARAMETERS)
+    assert job_with_extra_parameters.job_cache_parameters_digest == job_cache_parameters_digest(PARAMETERS)
+    # a tool input named like a parameter recorded by Galaxy is covered
+    set_job_cache_fingerprint(job_with_extra_parameters, {**PARAMETERS, "dbkey": None})
+    assert job_with_extra_parameters.job_cache_fingerprint == job_cache_fingerprint(
+        "cat1", dict(PARAMETERS, dbkey="hg19")
+    )
+    # without tool inputs parameters recorded by Galaxy are told apart by their names
+    set_job_cache_fingerprint(job_with_extra_parameters)
+    assert job_with_extra_parameters.job_cache_fingerprint == job.job_cache_fingerprint
+
+
+def test_parameters_digest_covers_input_ids():
+    reordered_inputs = dict(PARAMETERS, input1={"values": [{"id": 2, "src": "hda"}, {"id": 1, "src": "hda"}]})
+    inputs = dict(PARAMETERS, input1={"values": [{"id": 1, "src": "hda"}, {"id": 2, "src": "hda"}]})
+    assert job_cache_fingerprint("cat1", inputs) == job_cache_fingerprint("cat1", reordered_inputs)
+    assert job_cache_parameters_digest(inputs) != job_cache_parameters_digest(reordered_inputs)
+    assert job_cache_parameters_digest({"p": {"__class__": "RuntimeValue"}}) == job_cache_parameters_digest({"p": None})
+
+
+def test_fingerprint_differs():
+    fingerprint = job_cache_fingerprint("cat1", PARAMETERS)
+    assert fingerprint != job_cache_fingerprint("cat2", PARAMETERS)
+    assert fingerprint != job_cache_fingerprint("cat1", dict(PARAMETERS, flag=False))
+    assert fingerprint != job_cache_fingerprint("cat1", dict(PARAMETERS, input1={"values": [{"id": 1, "src": "hdca"}]}))
+    assert fingerprint != job_cache_fingerprint("cat1", dict(PARAMETERS, extra=1))
+
+
+def test_fingerprint_runtime_value():
+    assert job_cache_fingerprint("cat1", {"p": {"__class__": "RuntimeValue"}}) == job_cache_fingerprint(
+        "cat1", {"p": None}
+    )
+
+
+def test_fingerprint_of_persisted_parameters():
+    persisted = [(name, json.dumps(value, sort_keys=True)) for name, value in PARAMETERS.items()]
+    persisted.append(("empty", None))
+    persisted.append(("__input_ext", '"txt"'))
+    expected = job_cache_fingerprint("cat1", dict(PARAMETERS, empty=None))
+    assert job_cache_fingerprint_for_parameters("cat1", persisted) == expected
+    assert job_cache_fingerprint_for_parameters("cat1", persisted, PARAMETERS) == job_cache_fingerprint(
+        "cat1", PARAMETERS
+    )
+
+
+def test_set_and_backfill():
+    session = mapping.init("/tmp", "sqlite:///:memory:", create_tables=True).session
+    new_job = _job("cat1")
+    set_job_cache_fingerprint(new_job, PARAMETERS)
+    old_jobs = [_job("cat1"), _job("cat1", flag=False)]
+    copied_job = _job("cat1")
+    session.add_all([new_job, copied_job, *old_jobs])
+    _commit(session)
+    copied_job.copied_from_job_id = old_jobs[0].id
+    _commit(session)
+
+    assert backfill_job_cache_fingerprints(session, batch_size=1) == 2
+    for job in old_jobs:
+        session.refresh(job)
+    assert old_jobs[0].job_cache_fingerprint == new_job.job_cache_fingerprint
+    assert old_jobs[0].job_cache_parameters_digest == new_job.job_cache_parameters_digest
+    assert old_jobs[1].job_cache_fingerprint not in (None, new_job.job_cache_fingerprint)
+    assert copied_job.job_cache_fingerprint is None
+    assert backfill_job_cache_fingerprints(session) == 0
+
+
+def test_job_search():
+    session = mapping.init("/tmp", "sqlite:///:memory:", create_tables=True).session
+    user = model.User(email="user@example.org", password="password")
+    fingerprinted_job = _job("cat1")
+    # jobs created before fingerprints were recorded are matched on their parameters
+    old_job, old_other_job = _job("cat1"), _job("cat1", flag=False)
+    # the fingerprint doesn't cover input ids, the parameters digest does
+    other_inputs_job = _job("cat1", input1={"values": [{"id": 2, "src": "hda"}]})
+    for job in (fingerprinted_job, other_inputs_job):
+        set_job_cache_fingerprint(job, PARAMETERS)
+    for job in (fingerprinted_job, old_job, old_other_job, other_inputs_job):
+        job.user = user
+    session.add_all([fingerprinted_job, old_job, old_other_job, other_inputs_job])
+    _commit(session)
+
+    assert _search(session, user) is fingerprinted_job
+    fingerprinted_job.state = model.Job.states.ERROR
+    _commit(session)
+    assert _search(session, user) is old_job
+    old_job.state = model.Job.states.ERROR
+    _commit(session)
+    assert _search(session, user) is None
+
+
+def _search(session, user):
+    job_search = JobSearch.__new__(JobSearch)
+    job_search.sa_session = session
+    wildcard_parameters = dict(PARAMETERS, input1={"values": [{"id": "__id_wildcard__", "src": "hda"}]})
+    return job_search._JobSearch__search(
+        tool_id="cat1",
+        tool_version=None,
+        user=user,
+        input_data={},
+        job_state=None,
+        param_dump=PARAMETERS,
+        wildcard_param_dump=wildcard_parameters,
+    )
+
+
+def _job(tool_id, **parameters):
+    job = model.Job()
+    job.tool_id = tool_id
+    for name, value in dict(PARAMETERS, **parameters).items():
+        job.add_parameter(name, json.dumps(value, sort_keys=True))
+    return job
+
+
+def _commit(session):
+    with transaction(session):
+        session.commit()
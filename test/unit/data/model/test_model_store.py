@@ -4,6 +4,7 @@ import json
 import os
 import pathlib
 import shutil
+import tarfile
 from tempfile import (
     mkdtemp,
     NamedTemporaryFile,
@@ -14,6 +15,7 @@ from typing import (
     NamedTuple,
     Optional,
 )
+from unittest import mock
 
 import pytest
 from rocrate.rocrate import ROCrate
@@ -40,6 +42,7 @@ from ..test_galaxy_mapping import (
     _invocation_for_workflow,
     _workflow_from_steps,
 )
+from ...objectstore.test_objectstore import MIXED_STORE_BY_DISTRIBUTED_TEST_CONFIG
 
 TESTCASE_DIRECTORY = pathlib.Path(__file__).parent
 TEST_PATH_1 = TESTCASE_DIRECTORY / "1.txt"
@@ -59,6 +62,52 @@ def test_import_export_history():
     _assert_simple_cat_job_imported(imported_history)
 
 
+def test_export_history_streams_dataset_files_into_archive(tmp_path):
+    app = _mock_app()
+
+    u, h, d1, d2, j = _setup_simple_cat_job(app)
+
+    dest_export = tmp_path / "moo.tgz"
+    with store.TarModelExportStore(dest_export, app=app, export_files="copy", file_read_workers=2) as export_store:
+        export_store.export_history(h)
+    # dataset files are added to the archive from their object store paths, not staged
+    assert not os.path.exists(os.path.join(export_store.export_directory, "datasets"))
+    assert sorted(export_store.dataset_files.values()) == sorted([d1.get_file_name(), d2.get_file_name()])
+    with tarfile.open(dest_export) as archive:
+        assert set(export_store.dataset_files) <= set(archive.getnames())
+
+    imported_history = import_archive(dest_export, app, h.user)
+    assert imported_history
+    _assert_simple_cat_job_imported(imported_history)
+
+
+def test_export_fetches_only_included_files(tmp_path):
+    app = _mock_app()
+
+    u, h, d1, d2, j = _setup_simple_cat_job(app)
+
+    export_store = store.DirectoryModelExportStore(tmp_path, app=app, export_files="copy", file_read_workers=2)
+    export_store.add_dataset(d1)
+    export_store.add_dataset(d2, include_files=False)
+    with mock.patch.object(app.object_store, "get_filename") as get_filename:
+        export_store._fetch_files()
+    fetched = [call.args[0] for call in get_filename.call_args_list]
+    # workers get plain identifiers of the included datasets only
+    assert [dataset.id for dataset in fetched] == [d1.dataset.id]
+    assert not isinstance(fetched[0], model.Dataset)
+
+
+def test_import_history_files_in_parallel():
+    app = _mock_app()
+
+    u, h, d1, d2, j = _setup_simple_cat_job(app)
+
+    import_options = store.ImportOptions(file_write_workers=2)
+    imported_history = _import_export_history(app, h, export_files="copy", import_options=import_options)
+
+    _assert_simple_cat_job_imported(imported_history)
+
+
 def test_import_export_history_failed_job():
     """Test a simple job import/export, make sure state is maintained correctly."""
     app = _mock_app()
@@ -833,6 +882,42 @@ def test_import_export_composite_datasets():
     )
 
 
+def test_import_export_composite_datasets_into_distributed_store():
+    app = TestApp()
+    app.object_store = TestConfig(MIXED_STORE_BY_DISTRIBUTED_TEST_CONFIG).object_store
+    app.model.Dataset.object_store = app.object_store
+    sa_session = app.model.context
+
+    u = model.User(email="collection@example.com", password="password")
+    h = model.History(name="Test History", user=u)
+
+    datasets = _create_datasets(sa_session, h, 6, extension="html")
+    for i, d in enumerate(datasets):
+        d.name = f"dataset {i}"
+        d.dataset.create_extra_files_path()
+        app.add_and_commit(h, d)
+        app.write_primary_file(d, f"cool primary file {i}")
+        app.write_composite_file(d, f"cool composite file {i}", "child_file")
+
+    temp_directory = mkdtemp()
+    with store.DirectoryModelExportStore(temp_directory, app=app, export_files="copy") as export_store:
+        for d in datasets:
+            export_store.add_dataset(d)
+
+    import_history = model.History(name="Test History for Import", user=u)
+    app.add_and_commit(import_history)
+    import_options = store.ImportOptions(file_write_workers=2)
+    _perform_import_from_directory(temp_directory, app, u, import_history, import_options)
+    assert len(import_history.datasets) == 6
+    for import_dataset in import_history.datasets:
+        i = import_dataset.name.rsplit(" ", 1)[-1]
+        with open(import_dataset.get_file_name()) as f:
+            assert f.read() == f"cool primary file {i}"
+        _assert_extra_files_has_parent_directory_with_single_file_containing(
+            import_dataset, "child_file", f"cool composite file {i}"
+        )
+
+
 def _assert_extra_files_has_parent_directory_with_single_file_containing(
     dataset, expected_file_name, expected_contents
 ):
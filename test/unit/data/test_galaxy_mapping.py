@@ -262,6 +262,36 @@ class TestMappings(BaseModelTestCase):
         assert h1_audits[0] == h1_latest
         assert h2_audits[0] == h2_latest
 
+    def test_defer_pending_items(self):
+        u = model.User(email=random_email(), password="password")
+        h = model.History(name="History for deferred hids", user=u)
+        self.persist(u, h)
+        session = self.session()
+
+        def stage(name):
+            hda = model.HistoryDatasetAssociation(extension="txt", name=name, create_dataset=True, sa_session=session)
+            session.add(hda)
+            h.stage_addition(hda)
+            return hda
+
+        hda1 = stage("1")
+        h.add_pending_items()
+        with h.defer_pending_items():
+            hda2 = stage("2")
+            h.add_pending_items()
+            hda3 = stage("3")
+            hda4 = stage("4")
+            h.add_pending_items()
+            assert hda2.hid is None and hda4.hid is None
+            unnumbered = stage("5")
+            h.add_pending_items(set_output_hid=False)
+        with transaction(session):
+            session.commit()
+        assert [hda1.hid, hda2.hid, hda3.hid, hda4.hid] == [1, 2, 3, 4]
+        assert unnumbered.hid is None
+        assert h.hid_counter == 5
+        assert all(hda.history == h for hda in (hda1, hda2, hda3, hda4, unnumbered))
+
     def _non_empty_flush(self):
         lf = model.LibraryFolder(name="RootFolder")
         session = self.session()
@@ -1,5 +1,7 @@
+import io
 import os
 import shutil
+import threading
 import time
 from functools import wraps
 from tempfile import (
@@ -12,18 +14,36 @@ from uuid import uuid4
 import pytest
 from requests import get
 
-from galaxy.exceptions import ObjectInvalid
-from galaxy.objectstore import persist_extra_files_for_dataset
+from galaxy.exceptions import (
+    ObjectInvalid,
+    ObjectNotFound,
+)
+from galaxy.objectstore import (
+    build_object_store_from_config,
+    persist_extra_files_for_dataset,
+)
+from galaxy.objectstore._util import (
+    BATCH_THREAD_NAME_PREFIX,
+    byte_ranges,
+    map_concurrently,
+    open_url_range,
+    parallel_ranged_download,
+    RangeReader,
+)
 from galaxy.objectstore.azure_blob import AzureBlobObjectStore
 from galaxy.objectstore.caching import (
+    CACHE_INDEX_FILENAME,
+    CacheIndex,
     CacheTarget,
     check_cache,
     InProcessCacheMonitor,
+    RemoteStateCache,
     reset_cache,
 )
 from galaxy.objectstore.cloud import Cloud
 from galaxy.objectstore.examples import get_example
 from galaxy.objectstore.pithos import PithosObjectStore
+from galaxy.objectstore.placement import PlacementEngine
 from galaxy.objectstore.s3 import S3ObjectStore
 from galaxy.objectstore.s3_boto3 import S3ObjectStore as Boto3ObjectStore
 from galaxy.objectstore.unittest_utils import (
@@ -148,6 +168,26 @@ def test_disk_store():
             assert not os.path.exists(to_delete_real_path)
 
 
+def test_disk_store_open_range():
+    with TestConfig(DISK_TEST_CONFIG_YAML) as (directory, object_store):
+        dataset = MockDataset(1)
+        path = os.path.join(directory.temp_directory, "files1", "000", "dataset_1.dat")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"\x00\xffHello World!")
+
+        with object_store.open_range(dataset, start=2, length=5) as fh:
+            assert fh.fileno() > 0
+            assert (fh.start, fh.length) == (2, 5)
+            assert fh.read() == b"Hello"
+            assert fh.read() == b""
+        with object_store.open_range(dataset) as fh:
+            assert fh.read(2) == b"\x00\xff"
+            assert fh.read() == b"Hello World!"
+        with pytest.raises(ObjectNotFound):
+            object_store.open_range(MockDataset(2))
+
+
 DISK_TEST_CONFIG_BY_UUID_YAML = """
 type: disk
 files_dir: "${temp_directory}/files1"
@@ -311,6 +351,19 @@ def test_concrete_name_without_objectstore_id():
             assert files1_name is None
 
 
+def test_hierarchical_store_batch_lookups():
+    with TestConfig(HIERARCHICAL_TEST_CONFIG_YAML) as (directory, object_store):
+        directory.write("Hello", "files1/000/dataset_1.dat")
+        directory.write("Hello World!", "files2/000/dataset_2.dat")
+        datasets = [MockDataset(1), MockDataset(2), MockDataset(3)]
+        assert object_store.exists_many(datasets) == [True, True, False]
+        assert object_store.size_many(datasets) == [5, 12, 0]
+        filenames = object_store.get_filename_many(datasets)
+        assert filenames[0].endswith("files1/000/dataset_1.dat")
+        assert filenames[1].endswith("files2/000/dataset_2.dat")
+        assert filenames[2] is None
+
+
 MIXED_STORE_BY_DISTRIBUTED_TEST_CONFIG = """<?xml version="1.0"?>
 <object_store type="distributed">
     <backends>
@@ -501,6 +554,26 @@ def test_distributed_store():
             assert device_source_map.get_device_id("files2") == "primary_disk"
 
 
+def test_distributed_store_batch_lookups():
+    with TestConfig(DISTRIBUTED_TEST_CONFIG_YAML) as (directory, object_store):
+        directory.write("Hello", "files1/000/dataset_1.dat")
+        directory.write("Hello World!", "files2/000/dataset_2.dat")
+        directory.write("Hi", "files2/000/dataset_3.dat")
+        assigned, missing, absent, invalid = MockDataset(1), MockDataset(2), MockDataset(3), MockDataset(4)
+        assigned.object_store_id = absent.object_store_id = "files1"
+        invalid.object_store_id = "files3"
+        datasets = [assigned, missing, absent, invalid]
+        assert object_store.exists_many(datasets) == [True, True, False, False]
+        # objects without object store id are found by searching all backends
+        assert missing.object_store_id == "files2"
+        assert object_store.size_many(datasets) == [5, 12, 0, 0]
+        filenames = object_store.get_filename_many(datasets)
+        assert filenames[0].endswith("files1/000/dataset_1.dat")
+        assert filenames[1].endswith("files2/000/dataset_2.dat")
+        assert filenames[2:] == [None, None]
+        assert object_store.exists_many([]) == []
+
+
 def test_distributed_store_empty_cache_targets():
     for config_str in [DISTRIBUTED_TEST_CONFIG, DISTRIBUTED_TEST_CONFIG_YAML]:
         with TestConfig(config_str) as (directory, object_store):
@@ -514,6 +587,107 @@ def test_distributed_store_with_cache_targets():
             assert len(object_store.cache_targets()) == 2
 
 
+DISTRIBUTED_PLACEMENT_TEST_CONFIG = """<?xml version="1.0"?>
+<object_store type="distributed">
+    <backends placement="consistent_hash" placement_locality="user" placement_usage_refresh_interval="0">
+        <backend id="files1" type="disk" weight="1" maxpctfull="90">
+            <files_dir path="${temp_directory}/files1"/>
+            <extra_dir type="temp" path="${temp_directory}/tmp1"/>
+            <extra_dir type="job_work" path="${temp_directory}/job_working_directory1"/>
+        </backend>
+        <backend id="files2" type="disk" weight="1">
+            <files_dir path="${temp_directory}/files2"/>
+            <extra_dir type="temp" path="${temp_directory}/tmp2"/>
+            <extra_dir type="job_work" path="${temp_directory}/job_working_directory2"/>
+        </backend>
+    </backends>
+</object_store>
+"""
+
+
+class MockJob:
+    def __init__(self, history_id, user_id):
+        self.history_id = history_id
+        self.user_id = user_id
+
+
+def test_distributed_store_consistent_hash_placement():
+    with TestConfig(DISTRIBUTED_PLACEMENT_TEST_CONFIG) as (directory, object_store):
+        assert object_store.to_dict()["placement"] == {
+            "strategy": "consistent_hash",
+            "locality": "user",
+            "usage_refresh_interval": 0.0,
+        }
+        files1, files2 = object_store.backends["files1"], object_store.backends["files2"]
+        with patch.object(files1, "get_store_usage_percent", return_value=10.0), patch.object(
+            files2, "get_store_usage_percent", return_value=10.0
+        ):
+            for user_id in range(5):
+                persisted_ids = set()
+                for i in range(10):
+                    dataset = MockDataset(100 * user_id + i)
+                    dataset.job = MockJob(history_id=i, user_id=user_id)
+                    object_store.create(dataset)
+                    persisted_ids.add(dataset.object_store_id)
+                assert len(persisted_ids) == 1
+
+            # a backend over its max_percent_full is skipped right away
+            files1.get_store_usage_percent.return_value = 95.0
+            for i in range(10):
+                dataset = MockDataset(1000 + i)
+                dataset.job = MockJob(history_id=i, user_id=i)
+                object_store.create(dataset)
+                assert dataset.object_store_id == "files2"
+
+            # nothing is placed once all backends are full
+            object_store.placement_engine.max_percent_full["files2"] = 90.0
+            files2.get_store_usage_percent.return_value = 95.0
+            dataset = MockDataset(2000)
+            dataset.job = MockJob(history_id=1, user_id=1)
+            with pytest.raises(ObjectInvalid):
+                object_store.create(dataset)
+            assert dataset.object_store_id is None
+
+
+def test_distributed_store_free_space_placement():
+    with TestConfig(DISTRIBUTED_TEST_CONFIG_YAML) as (directory, object_store):
+        object_store.placement_engine = PlacementEngine(
+            lambda backend_id: 100.0 if backend_id == "files1" else 50.0,
+            object_store.backends.keys(),
+            strategy="free_space",
+        )
+        for i in range(20):
+            dataset = MockDataset(i)
+            object_store.create(dataset)
+            assert dataset.object_store_id == "files2"
+
+        path = os.path.join(directory.temp_directory, "upload")
+        with open(path, "w") as f:
+            f.write("Hello")
+        object_store.update_from_file(dataset, file_name=path)
+        statistics = object_store.placement_statistics()
+        assert statistics["strategy"] == "free_space"
+        assert statistics["backends"]["files1"]["placements"] == 0
+        files2_statistics = statistics["backends"]["files2"]
+        assert files2_statistics["placements"] == 20
+        assert files2_statistics["writes"] == 1
+        assert files2_statistics["bytes_written"] == 5
+        assert files2_statistics["usage_percent"] == 50.0
+
+
+def test_throughput_placement_prefers_faster_backends():
+    engine = PlacementEngine(lambda backend_id: 0.0, ["fast", "slow"], strategy="throughput")
+    engine.record_write("fast", 1000, 1.0)
+    engine.record_write("slow", 10, 1.0)
+    placements = [engine.select(MockDataset(i), ["fast", "slow"]) for i in range(200)]
+    assert placements.count("fast") > placements.count("slow")
+
+
+def test_placement_engine_rejects_unknown_strategy():
+    with pytest.raises(Exception, match="Unknown object store placement strategy"):
+        PlacementEngine(lambda backend_id: 0.0, ["files1"], strategy="round_robin")
+
+
 HIERARCHICAL_MUST_HAVE_UNIFIED_QUOTA_SOURCE = """<?xml version="1.0"?>
 <object_store type="hierarchical" private="true">
     <backends>
@@ -976,6 +1150,410 @@ def test_fits_in_cache_check(tmp_path):
     assert noop_cache_target.fits_in_cache(1024 * 1024 * 1024 * 100)
 
 
+def test_cache_index_evicts_least_recently_used(tmp_path):
+    cache_index = CacheIndex(tmp_path)
+    for name in ["a", "b", "c"]:
+        (tmp_path / name).write_text("0123456789")
+        cache_index.record(name)
+    assert cache_index.total_size == 30
+    cache_index.touch(str(tmp_path / "a"))
+
+    assert cache_index.evict(15) == 20
+    assert [path.name for path in tmp_path.iterdir() if not path.name.startswith(CACHE_INDEX_FILENAME)] == ["a"]
+    assert "a" in cache_index
+    assert len(cache_index) == 1
+    assert cache_index.total_size == 10
+
+
+def test_cache_index_discard_tree(tmp_path):
+    cache_index = CacheIndex(tmp_path)
+    cache_index.record("000/dataset_1_files/a", 1)
+    cache_index.record("000/dataset_1_files/b/c", 2)
+    cache_index.record("000/dataset_10.dat", 4)
+    cache_index.discard_tree("000/dataset_1_files/")
+    assert len(cache_index) == 1
+    assert cache_index.total_size == 4
+
+
+def test_cache_index_close(tmp_path):
+    cache_index = CacheIndex(tmp_path)
+    cache_index.record("a", 1)
+    thread = threading.Thread(target=cache_index.record, args=("b", 2))
+    thread.start()
+    thread.join()
+    # the connection of a thread is closed when the thread exits
+    assert len(cache_index._connections) == 1
+    # the index is shared between hosts, WAL mode doesn't work on network file systems
+    assert cache_index._connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    # connections of all threads are closed
+    cache_index.close()
+    assert len(cache_index._connections) == 0
+    assert len(cache_index) == 2
+    cache_index.close()
+
+
+def test_check_cache_with_index(tmp_path):
+    cache_dir = tmp_path
+    path = cache_dir / "a_file_0"
+    path.write_text("this is an example file")
+    big_cache_target = CacheTarget(cache_dir, 1, 0.2, use_index=True)
+    check_cache(big_cache_target)
+    # the index is built from the cache directory on first use and not part of the cache
+    assert path.exists()
+    assert CacheIndex(cache_dir).built
+    small_cache_target = CacheTarget(cache_dir, 1, 0.000000001, use_index=True)
+    check_cache(small_cache_target)
+    assert not path.exists()
+    assert CacheIndex(cache_dir).total_size == 0
+    # the walker skips the index as well
+    check_cache(CacheTarget(cache_dir, 1, 0.000000001))
+    assert (cache_dir / CACHE_INDEX_FILENAME).exists()
+
+
+def test_check_cache_skips_partial_downloads(tmp_path):
+    cache_dir = tmp_path
+    (cache_dir / "a_file_0").write_text("this is an example file")
+    partial_dir = cache_dir / ".b_file_0.abc123.part"
+    partial_dir.mkdir()
+    (partial_dir / "b_file_0").write_text("this is an interrupted download")
+    (cache_dir / ".c_file_0.def456.part").write_text("this is an interrupted download")
+    cache_index = CacheIndex(cache_dir)
+    cache_index.rebuild()
+    assert len(cache_index) == 1
+    assert "a_file_0" in cache_index
+    check_cache(CacheTarget(cache_dir, 1, 0.000000001))
+    assert not (cache_dir / "a_file_0").exists()
+    assert (partial_dir / "b_file_0").exists()
+
+
+@patch_object_stores_to_skip_initialize
+def test_cache_options_survive_to_dict():
+    for config_str in [S3_TEST_CONFIG, get_example("boto3_simple.xml"), AZURE_BLOB_TEST_CONFIG, CLOUD_AWS_TEST_CONFIG]:
+        config_str = config_str.replace("<cache ", '<cache index="true" remote_state_ttl="30" remote_state_size="100" ')
+        with TestConfig(config_str) as (directory, object_store):
+            assert object_store.use_cache_index
+            as_dict = object_store.to_dict()
+            assert as_dict["cache"]["index"] is True
+            assert as_dict["cache"]["remote_state_ttl"] == 30.0
+            assert as_dict["cache"]["remote_state_size"] == 100
+            # object stores of jobs and metadata processes are built from to_dict()
+            rebuilt_object_store = build_object_store_from_config(directory.global_config, config_dict=as_dict)
+            assert rebuilt_object_store.use_cache_index
+            remote_state_cache = rebuilt_object_store.remote_state_cache
+            assert remote_state_cache is not None
+            assert (remote_state_cache.ttl, remote_state_cache.max_size) == (30.0, 100)
+
+
+def test_remote_state_cache():
+    remote_state_cache = RemoteStateCache(ttl=60, max_size=2)
+    lookups = []
+
+    def lookup(value):
+        lookups.append(value)
+        return value
+
+    assert remote_state_cache.get("exists", "000/dataset_1.dat", lambda: lookup(True))
+    assert remote_state_cache.get("exists", "000/dataset_1.dat", lambda: lookup(False))
+    assert remote_state_cache.get("size", "000/dataset_1.dat", lambda: lookup(42)) == 42
+    assert lookups == [True, 42]
+    assert (remote_state_cache.hits, remote_state_cache.misses) == (1, 2)
+
+    remote_state_cache.get("exists", "000/dataset_2.dat", lambda: lookup(True))
+    assert len(remote_state_cache) == 2
+    remote_state_cache.invalidate("000/dataset_2.dat")
+    assert len(remote_state_cache) == 1
+
+    remote_state_cache.get("exists", "000/dataset_3_files/a", lambda: lookup(True))
+    remote_state_cache.invalidate_tree("000/dataset_3_files/")
+    assert len(remote_state_cache) == 1
+
+    expired_cache = RemoteStateCache(ttl=0.000001)
+    expired_cache.get("exists", "000/dataset_1.dat", lambda: lookup(False))
+    time.sleep(0.01)
+    assert expired_cache.get("exists", "000/dataset_1.dat", lambda: lookup(True))
+    assert expired_cache.misses == 2
+
+
+def test_remote_state_cache_reports_hits(caplog):
+    caplog.set_level("DEBUG", logger="galaxy.objectstore.caching")
+    remote_state_cache = RemoteStateCache(ttl=60, report_interval=0)
+    remote_state_cache.get("exists", "000/dataset_1.dat", lambda: True)
+    remote_state_cache.get("exists", "000/dataset_1.dat", lambda: True)
+    assert "Remote state cache: 0 hits, 1 misses (0.0% hit rate), 1 entries" in caplog.text
+
+
+S3_TEMP_CACHE_TEST_CONFIG_YAML = """
+type: s3
+auth:
+  access_key: access_moo
+  secret_key: secret_cow
+
+bucket:
+  name: unique_bucket_name_all_lowercase
+
+cache:
+  path: "${temp_directory}/object_store_cache"
+  size: 1000
+
+extra_dirs:
+- type: job_work
+  path: "${temp_directory}/job_working_directory_s3"
+- type: temp
+  path: "${temp_directory}/tmp_s3"
+"""
+
+
+@patch_object_stores_to_skip_initialize
+def test_concurrent_pulls_into_cache_download_once():
+    with TestConfig(S3_TEMP_CACHE_TEST_CONFIG_YAML) as (directory, object_store):
+        rel_path = "000/dataset_1.dat"
+        downloads = []
+
+        def download(rel_path):
+            downloads.append(rel_path)
+            with object_store._atomic_cache_file(rel_path) as download_path:
+                # downloaders like axel don't overwrite existing files
+                assert not os.path.exists(download_path)
+                time.sleep(0.1)
+                # nothing shows up in the cache until the download completed
+                assert not object_store._in_cache(rel_path)
+                with open(download_path, "w") as f:
+                    f.write("Hello World!")
+            return True
+
+        object_store._download = download
+        threads = [threading.Thread(target=object_store._pull_into_cache, args=(rel_path,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert downloads == [rel_path]
+        cache_path = object_store._get_cache_path(rel_path)
+        assert os.listdir(os.path.dirname(cache_path)) == ["dataset_1.dat"]
+        with open(cache_path) as f:
+            assert f.read() == "Hello World!"
+
+
+class MockRangeResponse:
+    def __init__(self, content, headers):
+        start, end = headers["Range"][len("bytes=") :].split("-")
+        self.content = content[int(start) : int(end) + 1 if end else None]
+        self.raw = io.BytesIO(self.content)
+        self.status_code = 206
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), 3):
+            yield self.content[i : i + 3]
+
+
+def test_parallel_ranged_download(tmp_path):
+    assert byte_ranges(10, 4) == [(0, 3), (4, 7), (8, 9)]
+    content = b"0123456789abcdefghij"
+    path = tmp_path / "download"
+    with patch("galaxy.objectstore._util.requests.get") as get:
+        get.side_effect = lambda url, headers, **kwd: MockRangeResponse(content, headers)
+        parallel_ranged_download("https://example.org/object", str(path), len(content), 7, 2)
+    assert path.read_bytes() == content
+    assert get.call_count == 3
+
+
+def test_open_url_range():
+    content = b"0123456789abcdefghij"
+    with patch("galaxy.objectstore._util.requests.get") as get:
+        get.side_effect = lambda url, headers, **kwd: MockRangeResponse(content, headers)
+        with open_url_range("https://example.org/object", 5, 4) as fh:
+            assert fh.read() == b"5678"
+        with open_url_range("https://example.org/object", 15) as fh:
+            assert fh.read() == b"fghij"
+
+
+class MockStreamDownloader:
+    """Only provides ``read``, like the Azure ``StorageStreamDownloader``."""
+
+    def __init__(self, content):
+        self._raw = io.BytesIO(content)
+
+    def read(self, size=-1):
+        return self._raw.read(min(size, 2))
+
+
+def test_range_reader_without_close():
+    with RangeReader(MockStreamDownloader(b"0123456789"), 2, 5) as fh:
+        assert fh.read() == b"01234"
+        with pytest.raises(io.UnsupportedOperation):
+            fh.fileno()
+    assert fh.closed
+
+
+@patch_object_stores_to_skip_initialize
+def test_caching_store_open_range_streams_without_caching():
+    with TestConfig(S3_TEMP_CACHE_TEST_CONFIG_YAML) as (directory, object_store):
+        content = b"0123456789abcdefghij"
+        dataset = MockDataset(1)
+        rel_path = object_store._construct_path(dataset)
+        object_store._exists_remotely = lambda rel_path: True
+        object_store._get_remote_size = lambda rel_path: len(content)
+
+        def open_remote_range(rel_path, start, length):
+            return RangeReader(io.BytesIO(content[start:]), start, length)
+
+        def download(rel_path):
+            with object_store._atomic_cache_file(rel_path) as download_path:
+                with open(download_path, "wb") as f:
+                    f.write(content)
+            return True
+
+        object_store._open_remote_range = open_remote_range
+        object_store._download = download
+        with object_store.open_range(dataset, start=10, length=3) as fh:
+            assert fh.read() == b"abc"
+        with object_store.open_range(dataset, start=30) as fh:
+            assert fh.read() == b""
+        assert not object_store._in_cache(rel_path)
+
+        # stores that cannot stream ranges pull the object into the cache
+        object_store._open_remote_range = lambda rel_path, start, length: None
+        with object_store.open_range(dataset, start=18) as fh:
+            assert fh.read() == b"ij"
+        assert object_store._in_cache(rel_path)
+
+
+@patch_object_stores_to_skip_initialize
+def test_caching_store_batch_lookups_use_plain_objects():
+    with TestConfig(S3_TEMP_CACHE_TEST_CONFIG_YAML) as (directory, object_store):
+        looked_up = []
+
+        def exists(obj, **kwargs):
+            looked_up.append((obj, threading.current_thread().name))
+            return obj.id % 2 == 0
+
+        object_store._exists = exists
+        datasets = [MockDataset(i) for i in range(10)]
+        assert object_store.exists_many(datasets) == [i % 2 == 0 for i in range(10)]
+        for obj, thread_name in looked_up:
+            # model objects are not handed to the batch threads
+            assert not isinstance(obj, MockDataset)
+            assert thread_name.startswith(BATCH_THREAD_NAME_PREFIX)
+        assert object_store._construct_path(looked_up[0][0]) in [object_store._construct_path(d) for d in datasets]
+
+
+@patch_object_stores_to_skip_initialize
+def test_caching_store_write_behind():
+    config_str = S3_TEMP_CACHE_TEST_CONFIG_YAML.replace("type: s3", "type: boto3").replace(
+        "  size: 1000\n", "  size: 1000\n  write_behind: true\n"
+    )
+    with TestConfig(config_str) as (directory, object_store):
+        assert object_store.to_dict()["cache"]["write_behind"] is True
+        remote = {}
+        push_results = [False, True]
+
+        def push_file_to_path(rel_path, source_file):
+            if not push_results.pop(0):
+                return False
+            with open(source_file) as f:
+                remote[rel_path] = f.read()
+            return True
+
+        object_store._exists_remotely = lambda rel_path: rel_path in remote
+        object_store._get_remote_size = lambda rel_path: len(remote[rel_path])
+        object_store._push_string_to_path = lambda rel_path, from_string: remote.update({rel_path: from_string}) or True
+        object_store._push_file_to_path = push_file_to_path
+
+        dataset = MockDataset(1)
+        rel_path = object_store._construct_path(dataset)
+        output_path = directory.write("NEW CONTENTS", "job_working_directory_s3/example_output")
+        assert object_store.defers_push(dataset)
+        object_store.update_from_file(dataset, file_name=output_path, create=True, defer_push=True)
+        assert object_store.exists(dataset)
+        assert remote[rel_path] == ""
+        # files that are not pushed yet are never evicted
+        reset_cache(object_store.cache_target)
+        reset_cache(object_store.cache_target._replace(use_index=True))
+        assert object_store.get_data(dataset) == "NEW CONTENTS"
+
+        assert not object_store.push(dataset)
+        assert remote[rel_path] == ""
+        assert object_store.push(dataset)
+        assert remote[rel_path] == "NEW CONTENTS"
+        # nothing left to push
+        assert object_store.push(dataset)
+        reset_cache(object_store.cache_target)
+        assert not os.listdir(os.path.dirname(object_store._get_cache_path(rel_path)))
+
+        # without defer_push data is pushed right away
+        other_dataset = MockDataset(2)
+        push_results.append(True)
+        object_store.update_from_file(other_dataset, file_name=output_path, create=True)
+        assert remote[object_store._construct_path(other_dataset)] == "NEW CONTENTS"
+
+
+def test_map_concurrently_runs_nested_calls_on_the_batch_thread():
+    def thread_names(item):
+        return map_concurrently(lambda _: threading.current_thread().name, [item, item], 4)
+
+    # nested calls don't wait for the pool they run on
+    for first, second in map_concurrently(thread_names, list(range(8)), 4):
+        assert first == second
+        assert first.startswith(BATCH_THREAD_NAME_PREFIX)
+    assert map_concurrently(lambda item: item * 2, [1, 2, 3], 2) == [2, 4, 6]
+
+
+S3_REMOTE_STATE_CACHE_TEST_CONFIG_YAML = """
+type: s3
+auth:
+  access_key: access_moo
+  secret_key: secret_cow
+
+bucket:
+  name: unique_bucket_name_all_lowercase
+
+cache:
+  path: database/object_store_cache
+  size: 1000
+  remote_state_ttl: 60
+
+extra_dirs:
+- type: job_work
+  path: database/job_working_directory_s3
+- type: temp
+  path: database/tmp_s3
+"""
+
+
+@patch_object_stores_to_skip_initialize
+def test_remote_state_cache_invalidated_on_delete():
+    with TestConfig(S3_REMOTE_STATE_CACHE_TEST_CONFIG_YAML) as (directory, object_store):
+        assert object_store.remote_state_cache.ttl == 60
+        lookups = []
+
+        def exists_remotely(rel_path):
+            lookups.append(rel_path)
+            return True
+
+        object_store._exists_remotely = exists_remotely
+        object_store._get_remote_size = lambda rel_path: 42
+        object_store._delete_existing_remote = lambda rel_path: True
+        dataset = MockDataset(1)
+        assert object_store.exists(dataset)
+        assert object_store.exists(dataset)
+        assert object_store.size(dataset) == 42
+        assert len(lookups) == 1
+
+        object_store.delete(dataset)
+        lookups.clear()
+        assert object_store.exists(dataset)
+        assert len(lookups) == 1
+
+
 AZURE_BLOB_NO_CACHE_TEST_CONFIG = get_example("azure_default_cache.xml")
 AZURE_BLOB_NO_CACHE_TEST_CONFIG_YAML = get_example("azure_default_cache.yml")
 
@@ -1,9 +1,14 @@
 import sys
 
 import pytest
+from Cheetah.Compiler import Compiler
 from Cheetah.NameMapper import NotFound
 
-from galaxy.util.template import fill_template
+from galaxy.util.template import (
+    CompiledTemplateCache,
+    create_compiler_class,
+    fill_template,
+)
 
 # In Python 3.12 calling `locals()`` inside a comprehension now includes
 # variables from outside the comprehension, see
@@ -99,3 +104,28 @@ def test_fix_template_two_to_three():
 def test_fix_template_invalid_cheetah():
     template_str = fill_template(INVALID_CHEETAH_SYNTAX, python_template_version="2", retry=1)
     assert template_str == "1 is 1\n"
+
+
+def test_compiled_template_cache():
+    cache = CompiledTemplateCache(maxsize=2)
+    klass = cache.compile(SIMPLE_TEMPLATE, Compiler)
+    assert cache.compile(SIMPLE_TEMPLATE, Compiler) is klass
+    assert str(klass(searchList=[{"a_list": [1, 2]}])) == FILLED_SIMPLE_TEMPLATE
+    # compiler classes with the same fixed module code share an entry
+    module_code = klass._CHEETAH_generatedModuleCode
+    fixed_klass = cache.compile(SIMPLE_TEMPLATE, create_compiler_class(module_code))
+    assert fixed_klass is not klass
+    assert cache.compile(SIMPLE_TEMPLATE, create_compiler_class(module_code)) is fixed_klass
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 2, "misses": 2, "hit_rate": 0.5}
+    # least recently used templates are evicted
+    cache.compile(TWO_TO_THREE_TEMPLATE, Compiler)
+    assert cache.stats()["size"] == 2
+    assert cache.compile(SIMPLE_TEMPLATE, Compiler) is not klass
+
+
+def test_compiled_template_cache_reports_hits(caplog):
+    caplog.set_level("DEBUG", logger="galaxy.util.template")
+    cache = CompiledTemplateCache(maxsize=2, report_interval=0)
+    cache.compile(SIMPLE_TEMPLATE, Compiler)
+    cache.compile(SIMPLE_TEMPLATE, Compiler)
+    assert "Compiled template cache: 0 hits, 1 misses (0.0% hit rate), 1 of 2 templates" in caplog.text
@@ -0,0 +1,179 @@
+from galaxy import model
+from galaxy.model import mapping
+from galaxy.model.base import transaction
+from galaxy.workflow.dirty_invocations import (
+    DirtyInvocationTracker,
+    round_robin,
+)
+
+HANDLER = "handler0"
+SCHEDULER = "core"
+
+
+def test_round_robin():
+    assert round_robin({10: [1, 2, 5], 11: [3, 4], None: [6]}) == [1, 3, 6, 2, 4, 5]
+    assert round_robin({11: [4], 10: [1, 2]}) == [1, 4, 2]
+    assert round_robin({}) == []
+
+
+def test_tracker_only_reports_changed_invocations():
+    mapping = _mapping()
+    session = mapping.session
+    user = model.User(email="u1@example.com", password="pass1")
+    history = model.History(user=user)
+    other_history = model.History(user=user)
+    invocation = _new_invocation(session, history)
+    other_invocation = _new_invocation(session, other_history)
+    _new_invocation(session, history, handler="other_handler")
+    _commit(session)
+
+    tracker = _tracker(mapping)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == [invocation.id, other_invocation.id]
+    _evaluate(tracker, invocation.id)
+    _evaluate(tracker, other_invocation.id)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == []
+
+    # a job in the history of an invocation changes
+    job = model.Job()
+    job.history = history
+    session.add(job)
+    _commit(session)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == [invocation.id]
+    # evaluating it changes nothing, it isn't dirty anymore
+    _evaluate(tracker, invocation.id)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == []
+
+    other_invocation.state = model.WorkflowInvocation.states.CANCELLING
+    _commit(session)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == [other_invocation.id]
+
+    # invocations that are no longer active are dropped
+    other_invocation.state = model.WorkflowInvocation.states.CANCELLED
+    _commit(session)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == []
+    assert len(tracker) == 0
+
+
+def test_tracker_resync():
+    mapping = _mapping()
+    session = mapping.session
+    invocation = _new_invocation(session, model.History(user=model.User(email="u1@example.com", password="pass1")))
+    _commit(session)
+
+    tracker = _tracker(mapping, resync_interval=0)
+    tracker.refresh()
+    _evaluate(tracker, invocation.id)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == [invocation.id]
+
+
+def test_tracker_changes_during_evaluation():
+    mapping = _mapping()
+    session = mapping.session
+    history = model.History(user=model.User(email="u1@example.com", password="pass1"))
+    invocation = _new_invocation(session, history)
+    _commit(session)
+
+    tracker = _tracker(mapping)
+    tracker.refresh()
+    tracker.evaluating(invocation.id)
+    tracker.refresh()
+    # not dirty again while being evaluated unless something changed
+    assert tracker.dirty_invocation_ids() == []
+    job = model.Job()
+    job.history = history
+    session.add(job)
+    _commit(session)
+    tracker.refresh()
+    tracker.evaluated(invocation.id)
+    assert tracker.dirty_invocation_ids() == [invocation.id]
+
+
+def test_tracker_ignores_evaluations_without_progress():
+    mapping = _mapping()
+    session = mapping.session
+    invocation = _new_invocation(session, model.History(user=model.User(email="u1@example.com", password="pass1")))
+    _commit(session)
+
+    tracker = _tracker(mapping)
+    tracker.refresh()
+    # the invocation is still delayed, evaluating it sets the state it already has
+    tracker.evaluating(invocation.id)
+    invocation.set_state(model.WorkflowInvocation.states.READY)
+    _commit(session)
+    tracker.evaluated(invocation.id)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == []
+
+    tracker.evaluating(invocation.id)
+    invocation.set_state(model.WorkflowInvocation.states.REQUIRES_MATERIALIZATION)
+    _commit(session)
+    tracker.evaluated(invocation.id)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == [invocation.id]
+
+
+def test_tracker_drops_evaluations_of_inactive_invocations():
+    mapping = _mapping()
+    session = mapping.session
+    invocation = _new_invocation(session, model.History(user=model.User(email="u1@example.com", password="pass1")))
+    _commit(session)
+
+    tracker = _tracker(mapping)
+    tracker.refresh()
+    # the evaluation finishes the invocation, but the worker never reports back
+    tracker.evaluating(invocation.id)
+    invocation.state = model.WorkflowInvocation.states.SCHEDULED
+    _commit(session)
+    tracker.refresh()
+    assert tracker._evaluating == {}
+    tracker.evaluated(invocation.id)
+    assert tracker._evaluated == {}
+
+
+def test_tracker_alternates_between_users():
+    mapping = _mapping()
+    session = mapping.session
+    history1 = model.History(user=model.User(email="u1@example.com", password="pass1"))
+    history2 = model.History(user=model.User(email="u2@example.com", password="pass2"))
+    invocations = [_new_invocation(session, history) for history in (history1, history1, history1, history2)]
+    _commit(session)
+
+    tracker = _tracker(mapping)
+    tracker.refresh()
+    assert tracker.dirty_invocation_ids() == [invocations[i].id for i in (0, 3, 1, 2)]
+
+
+def _mapping():
+    return mapping.init("/tmp", "sqlite:///:memory:", create_tables=True)
+
+
+def _tracker(mapping, resync_interval=300):
+    return DirtyInvocationTracker(mapping.engine, SCHEDULER, HANDLER, resync_interval=resync_interval)
+
+
+def _new_invocation(session, history, handler=HANDLER):
+    invocation = model.WorkflowInvocation()
+    invocation.workflow = model.Workflow()
+    invocation.history = history
+    invocation.state = model.WorkflowInvocation.states.READY
+    invocation.scheduler = SCHEDULER
+    invocation.handler = handler
+    session.add(invocation)
+    return invocation
+
+
+def _evaluate(tracker, invocation_id):
+    tracker.evaluating(invocation_id)
+    tracker.evaluated(invocation_id)
+
+
+def _commit(session):
+    with transaction(session):
+        session.commit()
@@ -0,0 +1,75 @@
+import queue
+import threading
+
+from galaxy import model
+from galaxy.model import mapping
+from galaxy.model.base import transaction
+from galaxy.util.bunch import Bunch
+from galaxy.workflow.scheduling_manager import WorkflowRequestMonitor
+
+
+def test_workers_schedule_histories_in_parallel():
+    monitor, scheduled, release = _monitor(parallelize_within_histories=False)
+    history1, history2 = _invocations(monitor.app.model, [2, 1])
+
+    monitor._WorkflowRequestMonitor__dispatch(history1 + history2, None, None)
+    # history2 is scheduled while history1 is still busy with its first invocation
+    assert scheduled.get(timeout=5) in (history1[0], history2[0])
+    assert scheduled.get(timeout=5) in (history1[0], history2[0])
+    assert scheduled.empty()
+    # invocations of histories still being scheduled are not dispatched again
+    monitor._WorkflowRequestMonitor__dispatch(history1 + history2, None, None)
+    release.set()
+    monitor.scheduling_workers.shutdown(wait=True)
+    assert sorted(scheduled.queue) == [history1[1]]
+
+
+def test_workers_parallelize_within_histories():
+    monitor, scheduled, release = _monitor(parallelize_within_histories=True)
+    (history1,) = _invocations(monitor.app.model, [2])
+
+    monitor._WorkflowRequestMonitor__dispatch(history1, None, None)
+    assert {scheduled.get(timeout=5), scheduled.get(timeout=5)} == set(history1)
+    release.set()
+    monitor.shutdown()
+
+
+def _monitor(parallelize_within_histories):
+    model_mapping = mapping.init("/tmp", "sqlite:///:memory:", create_tables=True)
+    config = Bunch(
+        workflow_monitor_incremental_scheduling=False,
+        workflow_scheduling_workers=2,
+        parallelize_workflow_scheduling_within_histories=parallelize_within_histories,
+        monitor_thread_join_timeout=0,
+    )
+    app = Bunch(config=config, model=model_mapping, job_config=Bunch(self_handler_tags=[]))
+    manager = Bunch(default_handler_id="handler0", handler_assignment_methods=None, active_workflow_schedulers={})
+    monitor = WorkflowRequestMonitor(app, manager)
+    scheduled: queue.Queue[int] = queue.Queue()
+    release = threading.Event()
+
+    def attempt_schedule(invocation_id, workflow_scheduler):
+        scheduled.put(invocation_id)
+        release.wait(timeout=5)
+
+    monitor._WorkflowRequestMonitor__attempt_schedule = attempt_schedule
+    return monitor, scheduled, release
+
+
+def _invocations(model_mapping, invocations_per_history):
+    session = model_mapping.session
+    user = model.User(email="u1@example.com", password="pass1")
+    histories = []
+    for invocation_count in invocations_per_history:
+        history = model.History(user=user)
+        invocations = []
+        for _ in range(invocation_count):
+            invocation = model.WorkflowInvocation()
+            invocation.workflow = model.Workflow()
+            invocation.history = history
+            session.add(invocation)
+            invocations.append(invocation)
+        histories.append(invocations)
+    with transaction(session):
+        session.commit()
+    return [[invocation.id for invocation in invocations] for invocations in histories]
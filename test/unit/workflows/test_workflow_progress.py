@@ -178,6 +178,9 @@ class TestWorkflowProgress(TestCase):
         }
         replacement = progress.replacement_for_input(None, self._step(4), step_dict)
         assert replacement is hda3
+        # the runtime state of scheduled steps isn't recomputed
+        module_injector = cast(MockModuleInjector, progress.module_injector)
+        assert module_injector.computed_runtime_state == [self._step(4)]
 
     # TODO: Replace multiple true HDA with HDCA
     # TODO: Test explicit delay
@@ -232,10 +235,14 @@ class TestWorkflowProgress(TestCase):
 class MockModuleInjector:
     def __init__(self, progress):
         self.progress = progress
+        self.computed_runtime_state = []
 
     def inject(self, step, step_args=None, steps=None, **kwargs):
         step.module = MockModule(self.progress)
 
+    def inject_for_recovery(self, step, **kwargs):
+        step.module = MockModule(self.progress)
+
     def inject_all(self, workflow, param_map=None, ignore_tool_missing_exception=True, **kwargs):
         param_map = param_map or {}
         for step in workflow.steps:
@@ -243,7 +250,7 @@ class MockModuleInjector:
             self.inject(step, step_args=step_args)
 
     def compute_runtime_state(self, step, step_args=None):
-        pass
+        self.computed_runtime_state.append(step)
 
 
 class MockModule: